@@ -30,6 +30,7 @@ import sys
 
 from optparse import OptionParser
 
+from launchpadlib.bulk import bulk_write
 from launchpadlib.launchpad import Launchpad
 from launchpadlib.uris import service_roots
 
@@ -103,10 +104,20 @@ def main(args):
                 print "Ok, leaving them alone."
                 return
 
+        bug_ids = {}
         for task in committed_tasks:
-            print "Releasing %s" % task.bug.id
+            bug_ids[task.self_link] = task.bug.id
             task.status = FIX_RELEASED
-            task.lp_save()
+
+        def report(done, total, result):
+            bug_id = bug_ids[result.item.self_link]
+            if result.succeeded:
+                print "Released %s (%d/%d)" % (bug_id, done, total)
+            else:
+                print "Failed to release %s: %s" % (bug_id, result.error)
+        results = bulk_write(committed_tasks, progress=report)
+        if not all(result.succeeded for result in results):
+            return 1
         print "Done."
 
     return 0
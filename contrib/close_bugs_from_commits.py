@@ -25,6 +25,7 @@ from ConfigParser import RawConfigParser
 
 from bzrlib.branch import Branch
 
+from launchpadlib.bulk import bulk_write
 from launchpadlib.launchpad import Launchpad
 
 fixed_bug_freeform_re = re.compile(
@@ -84,12 +85,14 @@ def main():
             rev_id = branch.get_rev_id(revno)
             revision = repository.get_revision(rev_id)
             fixed_bugs = get_fixed_bug_ids(revision)
-            for fixed_bug in sorted(fixed_bugs):
-                try:
-                    lp_bug = launchpad.bugs[int(fixed_bug)]
-                except KeyError:
-                    # Invalid bug id specified, skip it.
-                    continue
+            # Invalid bug ids are left out of the result, so they're
+            # skipped.
+            lp_bugs = launchpad.bugs.get_many(
+                int(fixed_bug) for fixed_bug in sorted(fixed_bugs))
+            bug_ids = []
+            transitions = []
+            messages = []
+            for lp_bug in lp_bugs.values():
                 for bug_task in lp_bug.bug_tasks:
                     if bug_task.target.self_link in projects_links:
                         break
@@ -104,11 +107,34 @@ def main():
                         'bzr+ssh', 'http')
                     codebrowse_url = (
                         branch_location + '/revision/' + str(revno))
-                    bug_task.transitionToStatus(status=u'Fix Committed')
-                    bug_task.bug.newMessage(
-                        subject=u'Bug fixed by a commit',
-                        content=u'Fixed in %s r%s <%s>' % (
-                        branch_name, revno, codebrowse_url))
+                    bug_ids.append(lp_bug.id)
+                    transitions.append((
+                        bug_task, 'transitionToStatus',
+                        dict(status=u'Fix Committed')))
+                    messages.append((
+                        lp_bug, 'newMessage',
+                        dict(subject=u'Bug fixed by a commit',
+                             content=u'Fixed in %s r%s <%s>' % (
+                                 branch_name, revno, codebrowse_url))))
+            failures = []
+            marked = []
+            for bug_id, message, result in zip(
+                bug_ids, messages, bulk_write(transitions)):
+                if result.succeeded:
+                    marked.append((bug_id, message))
+                else:
+                    failures.append((bug_id, result.error))
+            # Only comment on the bugs that were marked as fixed, so
+            # that the others get a single comment when they're retried.
+            comments = bulk_write([message for bug_id, message in marked])
+            for (bug_id, message), result in zip(marked, comments):
+                if not result.succeeded:
+                    failures.append((bug_id, result.error))
+            if failures:
+                for bug_id, error in failures:
+                    print "Failed to update bug %s: %s" % (bug_id, error)
+                # Try this revision again next time.
+                return 1
             set_last_revno(
                 'close_bugs_from_commits.conf', branch_name, revno)
     return 0
@@ -20,7 +20,6 @@ import os
 import sys
 import re
 
-from launchpadlib import errors
 from launchpadlib.launchpad import Launchpad
 
 
@@ -31,19 +30,26 @@ launchpad = Launchpad.login_with(os.path.basename(sys.argv[0]), 'production')
 bugs = launchpad.bugs
 
 
-def add_summary_to_bug(match):
-    text = match.group()
-    bugnum = match.group("bugnum")
-    try:
-        bug = bugs[bugnum]
-        summary = bug.title
-    except errors.HTTPError:
-        summary = 'Private'
-    return "%s (%s)" % (text, summary)
+def get_summaries(text):
+    """Look up the summaries of all the bugs mentioned in the text."""
+    bugnums = [match.group("bugnum") for match in bug_re.finditer(text)]
+    found = bugs.get_many(bugnums)
+    summaries = dict(
+        (bugnum, bug.title) for bugnum, bug in found.items())
+    for bugnum in found.errors:
+        summaries[bugnum] = 'Private'
+    for bugnum in found.missing:
+        summaries[bugnum] = 'Not found'
+    return summaries
 
 
 def main():
     text = sys.stdin.read()
+    summaries = get_summaries(text)
+
+    def add_summary_to_bug(match):
+        text = match.group()
+        return "%s (%s)" % (text, summaries[match.group("bugnum")])
     print bug_re.sub(add_summary_to_bug, text)
 
 if __name__ == '__main__':
@@ -26,6 +26,7 @@ from bzrlib.branch import Branch
 
 from close_bugs_from_commits import get_fixed_bug_ids
 from editmoin import editshortcut
+from launchpadlib.entrycache import EntryCache
 from launchpadlib.launchpad import Launchpad
 
 
@@ -47,19 +48,6 @@ class Config:
         return self.tag_to_story_name.keys()
 
 
-def get_assignee_name(bugtask):
-    """Get the name of the person assigned to the bug task.
-
-    Instead of accessing bugtask.assignee.name, the name is extracted
-    from the assignee_link, which avoids fetching the assignee object
-    from the web service.
-    """
-    if bugtask.assignee_link is None:
-        return None
-    url_parts = bugtask.assignee_link.split('/')
-    return url_parts[-1].lstrip('~')
-
-
 def string_isodate_to_date(string_isodate):
     if 'T' in string_isodate:
         string_isodate, rest = string_isodate.split('T', 1)
@@ -197,10 +185,12 @@ def generate_milestone_table(milestone_state, stories, config):
                 '[[https://launchpad.net/bugs/%(bug_id)s|#%(bug_id)s]]:'
                 ' %(title)s' % dict(
                     bug_id=bugtask.bug.id, title=bugtask.bug.title))
-            assignee_name = get_assignee_name(bugtask)
-            if assignee_name is not None:
+            # The assignee's name comes from the link, so this doesn't
+            # fetch the person.
+            assignee = bugtask.assignee
+            if assignee is not None:
                 row_items.append(" [[/%s|%s]] "% (
-                    assignee_name, assignee_name))
+                    assignee.name, assignee.name))
             else:
                 row_items.append('') # Assignee
             task_state = ''
@@ -248,6 +238,9 @@ def main():
     config = get_config('update-milestone-progress.conf')
     launchpad = Launchpad.login_with(os.path.basename(sys.argv[0]),
                                      'production')
+    # Bugs and assignees are looked at over and over, and a report
+    # doesn't need them to be any fresher than a few minutes.
+    launchpad.entry_cache = EntryCache()
     stories = dict(
         (story_tag, Story(story_name, story_tag))
         for story_tag, story_name in sorted(config.tag_to_story_name.items()))
@@ -271,9 +264,8 @@ def main():
                                            milestone=milestone))
     assignees = set()
     for task in milestone_bugtasks.values():
-        assignee_name = get_assignee_name(task)
-        if assignee_name is not None:
-            assignees.add(assignee_name)
+        if task.assignee is not None:
+            assignees.add(task.assignee.name)
         associated_story_tags = get_associated_story_tags(task)
         if len(associated_story_tags) == 0:
             # This bug isn't part of a story. Put it into the pseudo
@@ -50,6 +50,8 @@ install_requires = [
     ]
 if sys.version < "2.6":
     install_requires.append('simplejson')
+if sys.version_info < (3,):
+    install_requires.append('futures')
 
 setup(
     name='launchpadlib',
@@ -0,0 +1,337 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Use launchpadlib from an asyncio event loop.
+
+This module requires Python 3.6 or later.
+
+    >>> launchpad = await AsyncLaunchpad.login_with('my app', 'production')
+    >>> bug = await launchpad.bugs[1]
+    >>> print(await bug.title)
+    >>> async for task in await project.searchTasks(status='New'):
+    ...     print(await task.title)
+
+`AsyncLaunchpad` wraps an ordinary `Launchpad` object. The HTTP
+requests are made by the same code (and with the same credentials,
+OAuth signing and resource classes) as always, but in a thread pool, so
+they don't block the event loop. Accessing data that has already been
+fetched doesn't involve the thread pool at all.
+"""
+
+__all__ = [
+    'AsyncCollection',
+    'AsyncEntry',
+    'AsyncLaunchpad',
+    'AsyncResource',
+    ]
+
+import asyncio
+from functools import partial
+import inspect
+from json import loads
+
+from lazr.restfulclient.resource import (
+    Collection,
+    CollectionWithKeyBasedLookup,
+    Entry,
+    Resource,
+    )
+from lazr.uri import URI
+
+from launchpadlib.launchpad import Launchpad
+
+
+class _Runner:
+    """Run blocking launchpadlib code in an executor."""
+
+    def __init__(self, loop=None, executor=None):
+        self.loop = loop
+        self.executor = executor
+
+    def __call__(self, function, *args, **kwargs):
+        """Call `function` in the executor and return an awaitable."""
+        loop = self.loop or asyncio.get_event_loop()
+        return loop.run_in_executor(
+            self.executor, partial(function, *args, **kwargs))
+
+    def done(self, value):
+        """Return an awaitable that's already resolved to `value`."""
+        future = (self.loop or asyncio.get_event_loop()).create_future()
+        future.set_result(value)
+        return future
+
+    def wrap(self, value):
+        """Wrap a launchpadlib resource in the matching async proxy."""
+        if isinstance(value, CollectionWithKeyBasedLookup):
+            return AsyncCollectionWithKeyBasedLookup(value, self)
+        if isinstance(value, Collection):
+            return AsyncCollection(value, self)
+        if isinstance(value, Entry):
+            return AsyncEntry(value, self)
+        if isinstance(value, Resource):
+            return AsyncResource(value, self)
+        if isinstance(value, list):
+            return [self.wrap(item) for item in value]
+        return value
+
+
+class _PendingAttribute:
+    """An attribute of a resource that hasn't been fetched yet.
+
+    Until the resource is fetched there's no way to tell whether the
+    attribute is a value or a named operation, so this can be either
+    awaited or called.
+    """
+
+    def __init__(self, proxy, name):
+        self._proxy = proxy
+        self._name = name
+
+    async def _get(self):
+        await self._proxy._resolve()
+        value = getattr(self._proxy, self._name)
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    def __await__(self):
+        return self._get().__await__()
+
+    async def __call__(self, **kwargs):
+        await self._proxy._resolve()
+        return await getattr(self._proxy, self._name)(**kwargs)
+
+
+class AsyncResource:
+    """An asyncio-friendly proxy for a launchpadlib resource.
+
+    Named operations are coroutine functions. Links to other
+    resources (`bug.owner`, `launchpad.bugs`) are proxies of their own,
+    and any other attribute is an awaitable that resolves to the
+    attribute's value:
+
+        >>> owner = bug.owner
+        >>> print(await owner.name)
+        >>> await bug.subscribe(person=owner)
+
+    :ivar lp_resource: The wrapped resource, for anything this proxy
+        doesn't cover. Accessing it may block. For a proxy that came
+        from a link on a resource that hadn't been fetched yet, this is
+        None until something about the proxy is awaited.
+    """
+
+    def __init__(self, resource, runner, parent=None, link_name=None):
+        self.__dict__['lp_resource'] = resource
+        self.__dict__['_runner'] = runner
+        self.__dict__['_parent'] = parent
+        self.__dict__['_link_name'] = link_name
+
+    async def _resolve(self):
+        """Make sure the wrapped resource exists, following our link."""
+        if self.lp_resource is None:
+            resource = await self._runner(
+                getattr, await self._parent._resolve(), self._link_name)
+            if resource is None:
+                raise ValueError(
+                    "The %s link is empty." % self._link_name)
+            self.__dict__['lp_resource'] = resource
+        return self.lp_resource
+
+    def _has_representation(self):
+        """Can attributes be read without making an HTTP request?"""
+        return self.lp_resource._wadl_resource.representation is not None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        resource = self.lp_resource
+        if resource is None:
+            return _PendingAttribute(self, name)
+        try:
+            operation = resource.lp_get_named_operation(name)
+        except KeyError:
+            pass
+        else:
+            return self._operation(operation)
+        wadl_resource = resource._wadl_resource
+        for suffix, proxy_class in (('_collection_link', AsyncCollection),
+                                    ('_link', AsyncEntry)):
+            if wadl_resource.get_parameter(
+                    name + suffix, resource.JSON_MEDIA_TYPE) is None:
+                continue
+            if self._has_representation():
+                # Creating a linked resource never blocks.
+                return self._runner.wrap(getattr(resource, name))
+            return proxy_class(None, self._runner, self, name)
+        if self._has_representation():
+            try:
+                return self._runner.done(getattr(resource, name))
+            except AttributeError:
+                raise AttributeError(
+                    "%r has no attribute '%s'" % (self, name))
+        return self._runner(getattr, resource, name)
+
+    def _operation(self, operation):
+        runner = self._runner
+
+        async def call(**kwargs):
+            kwargs = dict(
+                (key, getattr(value, 'lp_resource', value))
+                for key, value in kwargs.items())
+            return runner.wrap(await runner(operation, **kwargs))
+        return call
+
+    async def lp_refresh(self):
+        """Fetch a new representation of this resource."""
+        await self._runner((await self._resolve()).lp_refresh)
+
+    def __str__(self):
+        return str(self.lp_resource)
+
+    def __repr__(self):
+        if self.lp_resource is None:
+            return '<%s for %s of %r>' % (
+                self.__class__.__name__, self._link_name, self._parent)
+        return '<%s for %r>' % (self.__class__.__name__, self.lp_resource)
+
+    def __eq__(self, other):
+        return self.lp_resource == getattr(other, 'lp_resource', other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = object.__hash__
+
+
+class AsyncEntry(AsyncResource):
+    """An asyncio-friendly proxy for an entry."""
+
+    def __setattr__(self, name, value):
+        # Setting an attribute only records the change, so it never
+        # blocks.
+        if self.lp_resource is None:
+            raise AttributeError(
+                "Await one of %r's attributes before changing it." % self)
+        setattr(self.lp_resource, name, getattr(
+            value, 'lp_resource', value))
+
+    async def lp_save(self):
+        """Save changes to the entry."""
+        await self._runner((await self._resolve()).lp_save)
+
+    async def lp_delete(self):
+        """Delete the entry."""
+        await self._runner((await self._resolve()).lp_delete)
+
+
+class AsyncCollection(AsyncResource):
+    """An asyncio-friendly proxy for a collection.
+
+    Iterate over it with `async for`. Pages are fetched as they're
+    needed.
+    """
+
+    async def __getitem__(self, key):
+        """Get a slice of the collection, or an entry by its index."""
+        collection = await self._resolve()
+        return self._runner.wrap(
+            await self._runner(collection.__getitem__, key))
+
+    async def lp_length(self):
+        """The number of entries in the collection."""
+        return await self._runner(len, await self._resolve())
+
+    def _next_page(self, url):
+        content = self.lp_resource._root._browser.get(URI(url))
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        return loads(content)
+
+    async def __aiter__(self):
+        collection = await self._resolve()
+        if not self._has_representation():
+            await self._runner(collection._ensure_representation)
+        page = collection._wadl_resource.representation
+        while True:
+            for entry in collection._convert_dicts_to_entries(
+                    page.get('entries', [])):
+                yield self._runner.wrap(entry)
+            next_link = page.get('next_collection_link')
+            if next_link is None:
+                break
+            page = await self._runner(self._next_page, next_link)
+
+
+class AsyncCollectionWithKeyBasedLookup(AsyncCollection):
+    """An asyncio-friendly proxy for collections like `launchpad.bugs`."""
+
+    def __call__(self, key):
+        """Get an entry by key without fetching it.
+
+        This never blocks for the collections launchpadlib knows
+        about, so it returns the proxy itself rather than an awaitable.
+        """
+        if self.lp_resource is None:
+            raise TypeError(
+                "%r hasn't been fetched; use 'await collection[key]'." % self)
+        return self._runner.wrap(self.lp_resource(key))
+
+
+class AsyncLaunchpad(AsyncResource):
+    """An asyncio-friendly proxy for a `Launchpad` object.
+
+    Create one with `login_with` or `login_anonymously`, which take
+    the same arguments as their `Launchpad` counterparts, plus:
+
+    :param loop: The event loop to use. Defaults to the current loop.
+    :param executor: The `concurrent.futures.Executor` that makes the
+        HTTP requests. Defaults to the loop's default executor.
+    """
+
+    # The class whose login methods create the wrapped object.
+    launchpad_class = Launchpad
+
+    def __init__(self, launchpad, loop=None, executor=None):
+        super(AsyncLaunchpad, self).__init__(
+            launchpad, _Runner(loop, executor))
+
+    @classmethod
+    async def login_with(cls, *args, loop=None, executor=None, **kwargs):
+        """Log in to Launchpad without blocking the event loop.
+
+        See `Launchpad.login_with`.
+        """
+        runner = _Runner(loop, executor)
+        launchpad = await runner(
+            cls.launchpad_class.login_with, *args, **kwargs)
+        return cls(launchpad, loop, executor)
+
+    @classmethod
+    async def login_anonymously(cls, *args, loop=None, executor=None,
+                                **kwargs):
+        """Get anonymous access to Launchpad without blocking the loop.
+
+        See `Launchpad.login_anonymously`.
+        """
+        runner = _Runner(loop, executor)
+        launchpad = await runner(
+            cls.launchpad_class.login_anonymously, *args, **kwargs)
+        return cls(launchpad, loop, executor)
+
+    async def load(self, url):
+        """Load a resource given its URL."""
+        return self._runner.wrap(
+            await self._runner(self.lp_resource.load, url))
@@ -14,25 +14,47 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
 
-"""Command-line applications for Launchpadlib.
+"""Command-line and web applications for Launchpadlib.
 
-This module contains the code for various applications. The applications
-themselves are kept in bin/.
+This module contains the code for various applications. The command-line
+applications themselves are kept in bin/.
 """
 
 __all__ = [
+    'RateLimiter',
     'RequestTokenApp',
+    'RequestTokenWSGIApp',
     ]
 
+import logging
+import math
+import socket
+import threading
+import time
+try:
+    from urllib.parse import parse_qs
+except ImportError:
+    from urlparse import parse_qs
+
 try:
     import json
 except ImportError:
     import simplejson as json
 
-from launchpadlib.credentials import Credentials
+import httplib2
+
+from lazr.restfulclient.errors import HTTPError
+
+from launchpadlib.credentials import (
+    AccessToken,
+    Credentials,
+    )
 from launchpadlib.uris import lookup_web_root
 
 
+log = logging.getLogger('launchpadlib')
+
+
 class RequestTokenApp(object):
     """An application that creates request tokens."""
 
@@ -50,3 +72,171 @@ class RequestTokenApp(object):
         return json.dumps(token)
 
 
+class RateLimiter(object):
+    """Limit how often something happens, separately for each key.
+
+    Each key has a bucket of `burst` tokens, which refills at `rate`
+    tokens a second. Each event takes a token, and an event that finds
+    the bucket empty is refused.
+    """
+
+    # Forget about keys whose buckets have been full for a while, once
+    # there are this many.
+    MAX_KEYS = 10000
+
+    def __init__(self, rate, burst):
+        if rate <= 0:
+            raise ValueError("rate must be positive, not %r" % (rate,))
+        self.rate = float(rate)
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Take a token from `key`'s bucket.
+
+        :return: 0 if there was a token, or else how many seconds it'll
+            be until there is one.
+        """
+        now = time.time()
+        with self._lock:
+            tokens, then = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - then) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._buckets[key] = (tokens - 1, now)
+            if len(self._buckets) > self.MAX_KEYS:
+                self._forget_full_buckets(now)
+            return 0
+
+    def _forget_full_buckets(self, now):
+        full = self.burst / self.rate
+        for key, (tokens, then) in list(self._buckets.items()):
+            if now - then > full:
+                del self._buckets[key]
+
+
+class RequestTokenWSGIApp(object):
+    """A WSGI application that gets tokens for other programs.
+
+    This does what launchpad-request-token does, for any number of
+    clients at once, without starting a process for each one. Token
+    requests share connections to Launchpad.
+
+    POST consumer (and optionally context) to /request-token to get
+    a request token, described as RequestTokenApp describes it.
+
+    POST consumer, oauth_token and oauth_token_secret to /access-token
+    to exchange an authorized request token for an access token. The
+    response is 401 if the end-user hasn't decided yet, and 403 if
+    they declined.
+
+    Each consumer may make `rate` requests a second, in bursts of up
+    to `burst`. Further requests get a 429 response.
+    """
+
+    def __init__(self, web_root, consumers=None, rate=1, burst=10):
+        """Constructor.
+
+        :param web_root: The Launchpad website to get tokens from.
+        :param consumers: If not None, the consumer names that tokens
+            may be requested for.
+        :param rate: How many requests a second each consumer may make.
+        :param burst: How many requests a consumer may make at once.
+        """
+        self.web_root = lookup_web_root(web_root)
+        self.consumers = consumers
+        self.rate_limiter = RateLimiter(rate, burst)
+
+    def __call__(self, environ, start_response):
+        try:
+            status, headers, body = self.respond(environ)
+        except HTTPError as e:
+            # Pass Launchpad's complaints about the token on.
+            status, headers, body = self.error(
+                e.response.status, e.content)
+        except (socket.error, httplib2.HttpLib2Error):
+            log.exception("Couldn't reach %s", self.web_root)
+            status, headers, body = self.error(
+                502, "Couldn't reach Launchpad.")
+        start_response(status, headers)
+        return [body]
+
+    @staticmethod
+    def make_response(status, document, headers=()):
+        """Turn a status code and a JSON document into a WSGI response."""
+        reasons = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized',
+                   403: 'Forbidden', 404: 'Not Found',
+                   405: 'Method Not Allowed', 429: 'Too Many Requests',
+                   502: 'Bad Gateway'}
+        body = json.dumps(document).encode('utf-8')
+        headers = [('Content-Type', 'application/json'),
+                   ('Content-Length', str(len(body)))] + list(headers)
+        return '%d %s' % (status, reasons.get(status, '')), headers, body
+
+    def error(self, status, message, headers=()):
+        if isinstance(message, bytes):
+            message = message.decode('utf-8', 'replace')
+        return self.make_response(status, dict(error=message), headers)
+
+    def respond(self, environ):
+        """Handle a request.
+
+        :return: A 3-tuple (status, headers, body), for start_response.
+        """
+        path = environ.get('PATH_INFO', '')
+        if path == '/request-token':
+            handler = self.request_token
+        elif path == '/access-token':
+            handler = self.access_token
+        else:
+            return self.error(404, "No such page: %s" % path)
+        if environ['REQUEST_METHOD'] != 'POST':
+            return self.error(405, "Use POST.", [('Allow', 'POST')])
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self.error(400, "Bad Content-Length.")
+        body = environ['wsgi.input'].read(length) if length else b''
+        if isinstance(body, bytes):
+            try:
+                body = body.decode('utf-8')
+            except UnicodeDecodeError:
+                return self.error(400, "The form isn't UTF-8.")
+        form = dict(
+            (name, values[0]) for name, values in parse_qs(body).items())
+        consumer = form.get('consumer')
+        if not consumer:
+            return self.error(400, "No consumer given.")
+        if self.consumers is not None and consumer not in self.consumers:
+            return self.error(403, "Unknown consumer: %s" % consumer)
+        wait = self.rate_limiter.acquire(consumer)
+        if wait:
+            return self.error(
+                429, "Too many requests for %s." % consumer,
+                [('Retry-After', str(int(math.ceil(wait))))])
+        return handler(consumer, form)
+
+    def request_token(self, consumer, form):
+        """Get a new request token."""
+        app = RequestTokenApp(self.web_root, consumer, form.get('context'))
+        return self.make_response(200, json.loads(app.run()))
+
+    def access_token(self, consumer, form):
+        """Exchange an authorized request token for an access token."""
+        if 'oauth_token' not in form or 'oauth_token_secret' not in form:
+            return self.error(
+                400, "Give both oauth_token and oauth_token_secret.")
+        credentials = Credentials(consumer)
+        credentials._request_token = AccessToken(
+            form['oauth_token'], form['oauth_token_secret'])
+        credentials.exchange_request_token_for_access_token(self.web_root)
+        token = credentials.access_token
+        document = dict(
+            oauth_token=token.key, oauth_token_secret=token.secret)
+        if token.context is not None:
+            document['lp.context'] = token.context
+        return self.make_response(200, document)
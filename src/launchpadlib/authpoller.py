@@ -0,0 +1,254 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Wait for many end-users to authorize request tokens at once.
+
+A `RequestTokenAuthorizationEngine` blocks until its one end-user
+decides, so authorizing dozens of accounts that way takes dozens of
+threads. An `AuthorizationPoller` gets a request token for each
+account, and then one thread asks Launchpad about all of them, over
+the same connections:
+
+    >>> engine = AuthorizeRequestTokenWithBrowser(
+    ...     'production', consumer_name='onboarding')
+    >>> with AuthorizationPoller(engine) as poller:
+    ...     pending = dict(
+    ...         (account, poller.submit()) for account in accounts)
+    ...     for account, authorization in pending.items():
+    ...         send_to(account, authorization.authorization_url)
+    ...     for account, authorization in pending.items():
+    ...         store(account, authorization.result())
+
+Each `PendingAuthorization` is a `concurrent.futures.Future`. Its
+result is the authorized `Credentials`. It fails with
+`EndUserDeclinedAuthorization` if the end-user says no, and with
+`TokenAuthorizationTimedOut` if they don't decide in time.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'AuthorizationPoller',
+    'PendingAuthorization',
+    ]
+
+from concurrent.futures import Future
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from lazr.restfulclient.errors import HTTPError
+
+from launchpadlib import credentials as _credentials
+from launchpadlib.credentials import (
+    Credentials,
+    EndUserDeclinedAuthorization,
+    TokenAuthorizationTimedOut,
+    )
+
+
+log = logging.getLogger('launchpadlib')
+
+
+class PendingAuthorization(Future):
+    """A request token waiting for an end-user's decision.
+
+    :ivar credentials: The `Credentials` the access token will be set on.
+    :ivar request_token: The request token's key.
+    :ivar authorization_url: The page the end-user should visit.
+    """
+
+    def __init__(self, credentials, request_token, authorization_url,
+                 unique_key):
+        super(PendingAuthorization, self).__init__()
+        self.credentials = credentials
+        self.request_token = request_token
+        self.authorization_url = authorization_url
+        self.unique_key = unique_key
+        self.started = time.time()
+        self.intervals = None
+
+
+class AuthorizationPoller:
+    """Ask Launchpad about many request tokens, from a single thread.
+
+    Each token is asked about less and less often, as
+    `AuthorizeRequestTokenWithCallback` does when it can't listen for
+    a callback.
+    """
+
+    MIN_POLL_INTERVAL = 1
+    MAX_POLL_INTERVAL = 10
+    POLL_BACKOFF = 1.5
+
+    def __init__(self, engine, credential_store=None):
+        """Constructor.
+
+        :param engine: A `RequestTokenAuthorizationEngine`, which
+            decides the consumer, Launchpad instance and access levels.
+            It's only used to get request tokens and authorization
+            URLs; the end-users are left to visit those themselves.
+        :param credential_store: If not None, a `CredentialStore` to
+            save credentials to as they're authorized.
+        """
+        self.engine = engine
+        self.credential_store = credential_store
+        self._schedule = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def poll_intervals(self):
+        """How long to wait before each poll for one token."""
+        interval = self.MIN_POLL_INTERVAL
+        while True:
+            yield interval
+            interval = min(
+                interval * self.POLL_BACKOFF, self.MAX_POLL_INTERVAL)
+
+    def submit(self, credentials=None, unique_key=None):
+        """Get a request token, and start waiting for it to be authorized.
+
+        :param credentials: The `Credentials` to authorize. By default,
+            new credentials for the engine's consumer.
+        :param unique_key: The key to save the credentials under in the
+            credential store. Defaults to the engine's
+            unique_consumer_id, which is the same for every token, so
+            give a key of your own when authorizing more than one
+            end-user.
+        :return: A `PendingAuthorization`.
+        """
+        if credentials is None:
+            credentials = Credentials(None)
+            credentials.consumer = self.engine.consumer
+        if unique_key is None:
+            unique_key = self.engine.unique_consumer_id
+        request_token = self.engine.get_request_token(credentials)
+        pending = PendingAuthorization(
+            credentials, request_token,
+            self.engine.authorization_url(request_token), unique_key)
+        pending.intervals = self.poll_intervals()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The poller has been closed.")
+            self._add(pending)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='AuthorizationPoller')
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+        return pending
+
+    def _add(self, pending):
+        """Schedule the next poll for a token. Hold the condition."""
+        heapq.heappush(
+            self._schedule,
+            (time.time() + next(pending.intervals), next(self._sequence),
+             pending))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if self._schedule:
+                        wait = self._schedule[0][0] - time.time()
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    self._condition.wait(wait)
+                if self._closed:
+                    return
+                due, sequence, pending = heapq.heappop(self._schedule)
+            if self._poll(pending):
+                with self._condition:
+                    if self._closed:
+                        pending.cancel()
+                    else:
+                        self._add(pending)
+
+    def _poll(self, pending):
+        """Ask Launchpad about one token.
+
+        :return: True if the end-user hasn't decided yet.
+        """
+        if pending.cancelled():
+            return False
+        try:
+            pending.credentials.exchange_request_token_for_access_token(
+                self.engine.web_root)
+        except HTTPError as e:
+            if e.response.status == 403:
+                # The user decided not to authorize this application.
+                self._finish(
+                    pending, exception=EndUserDeclinedAuthorization(e.content))
+                return False
+            elif e.response.status != 401:
+                # 401 means the user hasn't decided yet; anything else
+                # is a problem with the server, which may go away.
+                log.warning(
+                    "Unexpected response from Launchpad about request "
+                    "token %s: %s", pending.request_token, e)
+        except Exception as e:
+            self._finish(pending, exception=e)
+            return False
+        else:
+            try:
+                if self.credential_store is not None:
+                    # save() invokes the callback on failure, if
+                    # there is one.
+                    self.credential_store.save(
+                        pending.credentials, pending.unique_key)
+            except Exception as e:
+                self._finish(pending, exception=e)
+            else:
+                self._finish(pending, result=pending.credentials)
+            return False
+        timeout = _credentials.access_token_poll_timeout
+        if time.time() >= pending.started + timeout:
+            self._finish(pending, exception=TokenAuthorizationTimedOut(
+                "Timed out after %d seconds." % timeout))
+            return False
+        return True
+
+    def _finish(self, pending, result=None, exception=None):
+        if not pending.set_running_or_notify_cancel():
+            return
+        if exception is not None:
+            pending.set_exception(exception)
+        else:
+            pending.set_result(result)
+
+    def close(self):
+        """Stop polling, and cancel the authorizations still pending."""
+        with self._condition:
+            self._closed = True
+            schedule, self._schedule = self._schedule, []
+            self._condition.notify()
+        for due, sequence, pending in schedule:
+            pending.cancel()
+        if (self._thread is not None
+            and self._thread is not threading.current_thread()):
+            self._thread.join()
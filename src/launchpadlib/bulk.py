@@ -0,0 +1,122 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Make many changes at once.
+
+Saving hundreds of bug tasks one after the other spends most of its
+time waiting for the server. `bulk_write` sends the changes a few at
+a time instead:
+
+    >>> for task in tasks:
+    ...     task.status = 'Fix Released'
+    >>> results = bulk_write(tasks)
+    >>> failed = [result for result in results if not result.succeeded]
+
+Besides modified entries, it takes (entry, operation, arguments)
+tuples, which invoke named operations:
+
+    >>> bulk_write([(task, 'transitionToStatus', {'status': 'Triaged'}),
+    ...             (task.bug, 'newMessage', {'content': 'Triaged.'})])
+
+Every write is attempted, even if some of them fail.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'BulkResult',
+    'bulk_write',
+    ]
+
+from concurrent.futures import (
+    as_completed,
+    ThreadPoolExecutor,
+    )
+
+
+class BulkResult:
+    """The outcome of one write.
+
+    :ivar item: The entry or (entry, operation, arguments) tuple.
+    :ivar value: What lp_save() or the named operation returned.
+    :ivar error: The exception raised, or None if it succeeded.
+    """
+
+    def __init__(self, item, value=None, error=None):
+        self.item = item
+        self.value = value
+        self.error = error
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.succeeded:
+            return '<BulkResult %r: succeeded>' % (self.item,)
+        return '<BulkResult %r: %r>' % (self.item, self.error)
+
+
+def _write(item):
+    """Make one change."""
+    if isinstance(item, tuple):
+        entry, operation = item[:2]
+        arguments = item[2] if len(item) > 2 else {}
+        return getattr(entry, operation)(**arguments)
+    return item.lp_save()
+
+
+def _has_connection_pool(item):
+    """Can threads share the Launchpad object this item came from?"""
+    entry = item[0] if isinstance(item, tuple) else item
+    return getattr(entry._root, 'connection_pool', None) is not None
+
+
+def bulk_write(items, max_workers=4, progress=None):
+    """Save entries and invoke named operations concurrently.
+
+    The Launchpad object the entries came from is shared by all the
+    threads. That's only safe if it has a connection pool; if it
+    doesn't, its threads would share connections, so the writes are
+    made one at a time instead. Each entry should only appear once.
+
+    :param items: Modified entries to save, and (entry, operation,
+        arguments) tuples of named operations to invoke. The
+        arguments may be left out.
+    :param max_workers: How many writes to make at once. Keep this
+        small, to go easy on the server.
+    :param progress: A callable that's passed (done, total, result)
+        as each write finishes, in the calling thread.
+    :return: A `BulkResult` for each item, in the same order.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    if not all(_has_connection_pool(item) for item in items):
+        max_workers = 1
+    with ThreadPoolExecutor(max_workers) as executor:
+        futures = dict(
+            (executor.submit(_write, item), index)
+            for index, item in enumerate(items))
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            error = future.exception()
+            if error is None:
+                result = BulkResult(items[index], value=future.result())
+            else:
+                result = BulkResult(items[index], error=error)
+            results[index] = result
+            if progress is not None:
+                progress(done, len(items), result)
+    return results
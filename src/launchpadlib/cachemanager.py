@@ -0,0 +1,289 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Keep the HTTP cache directory from growing without limit.
+
+Every representation launchpadlib fetches is stored in a file in the
+cache directory, and nothing ever removes them. A `CacheManager` keeps
+the directory under a size or entry limit by removing the least
+recently used (or least frequently used) files. Pruning happens at
+most once per `prune_interval`, in a background thread, so it doesn't
+slow down logging in.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'CacheManager',
+    'ManagedRepresentationCache',
+    ]
+
+from collections import defaultdict
+import errno
+import json
+import os
+import threading
+import time
+
+from launchpadlib.representationcache import ThreadSafeRepresentationCache
+
+
+def _scan(directory):
+    """Yield (name, size, mtime) for each file in a directory."""
+    try:
+        scandir = os.scandir
+    except AttributeError:
+        for name in os.listdir(directory):
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except OSError:
+                continue
+            yield name, stat.st_size, stat.st_mtime
+        return
+    for entry in scandir(directory):
+        try:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+        except OSError:
+            continue
+        yield entry.name, stat.st_size, stat.st_mtime
+
+
+class CacheManager:
+    """Keep a cache directory under a size and entry limit.
+
+    :ivar last_pruned: How many files the most recent `prune` removed.
+    """
+
+    LRU = 'lru'
+    LFU = 'lfu'
+
+    # Book-keeping files, which are never pruned. Their names can't
+    # clash with cache entries, which never start with a dot.
+    STAMP_FILE = '.launchpadlib-pruned'
+    USAGE_FILE = '.launchpadlib-usage'
+
+    def __init__(self, directory, max_bytes=None, max_entries=None,
+                 policy=LRU, low_water=0.8, prune_interval=3600):
+        """Constructor.
+
+        :param directory: The cache directory.
+        :param max_bytes: The most the files in the cache may add up to.
+        :param max_entries: The most files the cache may hold.
+        :param policy: CacheManager.LRU to remove the least recently
+            used files first, or CacheManager.LFU to remove the least
+            frequently used files first.
+        :param low_water: When the cache is over a limit, files are
+            removed until it's this fraction of the limit, so that
+            it's a while before the cache needs pruning again.
+        :param prune_interval: How often, in seconds, `maybe_prune`
+            looks at the directory. Writing many new entries can also
+            prompt a look.
+        """
+        if policy not in (self.LRU, self.LFU):
+            raise ValueError("Unknown cache eviction policy: %s" % policy)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.policy = policy
+        self.low_water = low_water
+        self.prune_interval = prune_interval
+        self.last_pruned = 0
+        self._lock = threading.Lock()
+        self._hits = defaultdict(int)
+        self._writes = 0
+        self._pruning = None
+
+    def touch(self, path):
+        """Note that a cache entry was used."""
+        if self.policy == self.LRU:
+            # The modification time doubles as the last access time,
+            # since access times are often not kept up to date.
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+        else:
+            with self._lock:
+                self._hits[os.path.basename(path)] += 1
+
+    def added(self, path):
+        """Note that a cache entry was written.
+
+        If enough entries have been written since the directory was
+        last pruned, it might be over a limit, so prune it.
+        """
+        if self.policy == self.LFU:
+            self.touch(path)
+        with self._lock:
+            self._writes += 1
+            writes = self._writes
+        limit = self.max_entries
+        if limit is None:
+            limit = 1000
+        if writes >= max(1, int(limit * (1 - self.low_water))):
+            self.prune_in_background()
+
+    def _usage_path(self):
+        return os.path.join(self.directory, self.USAGE_FILE)
+
+    def _load_hits(self):
+        """Combine the hit counts on disk with our own."""
+        try:
+            with open(self._usage_path()) as usage_file:
+                stored = json.load(usage_file)
+        except (IOError, OSError, ValueError):
+            stored = {}
+        with self._lock:
+            hits, self._hits = self._hits, defaultdict(int)
+        for name, count in hits.items():
+            stored[name] = stored.get(name, 0) + count
+        return stored
+
+    def _save_hits(self, hits):
+        path = self._usage_path()
+        temp_path = '%s.%d.%d' % (
+            path, os.getpid(), threading.current_thread().ident)
+        try:
+            with open(temp_path, 'w') as usage_file:
+                json.dump(hits, usage_file)
+            os.rename(temp_path, path)
+        except (IOError, OSError):
+            pass
+
+    def _entries(self):
+        """The cache's entries, as (name, size, mtime) tuples."""
+        return [entry for entry in _scan(self.directory)
+                if not entry[0].startswith('.')]
+
+    def usage(self):
+        """The cache's current size.
+
+        :return: A 2-tuple (entries, bytes).
+        """
+        entries = self._entries()
+        return len(entries), sum(size for name, size, mtime in entries)
+
+    def prune(self):
+        """Remove entries until the cache is within its limits.
+
+        :return: The number of entries removed.
+        """
+        with self._lock:
+            self._writes = 0
+        entries = self._entries()
+        count = len(entries)
+        total = sum(size for name, size, mtime in entries)
+        if self.policy == self.LFU:
+            hits = self._load_hits()
+            entries.sort(key=lambda entry: (hits.get(entry[0], 0), entry[2]))
+        else:
+            hits = None
+            entries.sort(key=lambda entry: entry[2])
+        over_entries = (self.max_entries is not None
+                        and count > self.max_entries)
+        over_bytes = self.max_bytes is not None and total > self.max_bytes
+        removed = 0
+        if over_entries or over_bytes:
+            max_entries = max_bytes = None
+            if self.max_entries is not None:
+                max_entries = int(self.max_entries * self.low_water)
+            if self.max_bytes is not None:
+                max_bytes = int(self.max_bytes * self.low_water)
+            for name, size, mtime in entries:
+                if ((max_entries is None or count <= max_entries)
+                    and (max_bytes is None or total <= max_bytes)):
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError as e:
+                    # Another process may have got there first.
+                    if e.errno != errno.ENOENT:
+                        continue
+                removed += 1
+                count -= 1
+                total -= size
+                if hits is not None:
+                    hits.pop(name, None)
+        if hits is not None:
+            self._save_hits(hits)
+        self._touch_stamp()
+        self.last_pruned = removed
+        return removed
+
+    def _touch_stamp(self):
+        path = os.path.join(self.directory, self.STAMP_FILE)
+        try:
+            with open(path, 'a'):
+                pass
+            os.utime(path, None)
+        except (IOError, OSError):
+            pass
+
+    def prune_in_background(self):
+        """Start pruning in a thread, unless that's already happening.
+
+        :return: The thread doing the pruning.
+        """
+        with self._lock:
+            if self._pruning is not None and self._pruning.is_alive():
+                return self._pruning
+
+            def prune():
+                try:
+                    self.prune()
+                except (IOError, OSError):
+                    # The cache directory may have gone away.
+                    pass
+            self._pruning = threading.Thread(
+                target=prune, name='Cache pruning')
+            self._pruning.daemon = True
+            self._pruning.start()
+            return self._pruning
+
+    def maybe_prune(self):
+        """Prune in the background if it's been a while.
+
+        This costs a single stat() if the cache was pruned recently.
+
+        :return: The thread doing the pruning, or None.
+        """
+        try:
+            last = os.stat(
+                os.path.join(self.directory, self.STAMP_FILE)).st_mtime
+        except OSError:
+            last = 0
+        if time.time() - last < self.prune_interval:
+            return None
+        return self.prune_in_background()
+
+
+class ManagedRepresentationCache(ThreadSafeRepresentationCache):
+    """A `ThreadSafeRepresentationCache` that reports to a `CacheManager`."""
+
+    def __init__(self, cache, manager):
+        super(ManagedRepresentationCache, self).__init__(cache)
+        self.manager = manager
+
+    def get(self, key):
+        value = super(ManagedRepresentationCache, self).get(key)
+        if value is not None:
+            self.manager.touch(self._get_key_path(key))
+        return value
+
+    def set(self, key, value):
+        super(ManagedRepresentationCache, self).set(key, value)
+        self.manager.added(self._get_key_path(key))
@@ -0,0 +1,275 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Persistent HTTP connection pooling.
+
+httplib2 keeps one connection per host in each `Http` object, and that
+connection can't be used by more than one thread at a time. The classes
+in this module let any number of `Http` objects (and any number of
+threads) share a pool of keep-alive connections, so that a TLS
+handshake only has to happen when every pooled connection to a host is
+busy.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'ConnectionPool',
+    'PooledConnectionsMixin',
+    'PooledHttp',
+    ]
+
+from collections import deque
+import threading
+import time
+
+import httplib2
+
+
+class ConnectionPool:
+    """A thread-safe pool of idle keep-alive connections, keyed by host.
+
+    The keys are httplib2's connection keys, which look like
+    "https:api.launchpad.net".
+    """
+
+    DEFAULT_MAX_SIZE = 4
+    DEFAULT_IDLE_TIMEOUT = 60
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        """Constructor.
+
+        :param max_size: The maximum number of idle connections to keep
+            open to any one host. Connections returned to a full pool
+            are closed.
+        :param idle_timeout: Connections that have been idle for more
+            than this many seconds are closed instead of being reused,
+            since the server has probably dropped them already. If
+            None, idle connections never expire.
+        """
+        if max_size < 0:
+            raise ValueError("max_size must not be negative.")
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        # Map connection keys to deques of (connection, released_at).
+        self._idle = {}
+        self._in_use = 0
+        self._created = 0
+        self._reused = 0
+        self._expired = 0
+        self._discarded = 0
+
+    def acquire(self, key):
+        """Check out an idle connection to the given host.
+
+        :return: A connection, or None if the caller should create a
+            new one (and hand it to `created`).
+        """
+        now = time.time()
+        stale = []
+        try:
+            with self._lock:
+                idle = self._idle.get(key)
+                while idle:
+                    # Take the most recently used connection: it's
+                    # the one least likely to have been dropped.
+                    connection, released_at = idle.pop()
+                    if (self.idle_timeout is not None
+                        and now - released_at > self.idle_timeout):
+                        stale.append(connection)
+                        self._expired += 1
+                        continue
+                    self._in_use += 1
+                    self._reused += 1
+                    return connection
+                return None
+        finally:
+            for connection in stale:
+                connection.close()
+
+    def created(self, key, connection):
+        """Note that a new connection was opened and is in use."""
+        with self._lock:
+            self._in_use += 1
+            self._created += 1
+
+    def release(self, key, connection):
+        """Return a connection to the pool once a request is done with it.
+
+        If the pool already holds `max_size` idle connections to the
+        host, the connection is closed instead.
+        """
+        with self._lock:
+            self._in_use -= 1
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.max_size:
+                idle.append((connection, time.time()))
+                return
+            self._discarded += 1
+        connection.close()
+
+    def discard(self, key, connection):
+        """Close a checked-out connection rather than reusing it."""
+        with self._lock:
+            self._in_use -= 1
+            self._discarded += 1
+        connection.close()
+
+    def clear(self):
+        """Close every idle connection in the pool."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection, released_at in connections:
+                connection.close()
+
+    def stats(self):
+        """Describe the pool's current state and its history.
+
+        :return: A dict with these keys: 'idle' and 'in_use' (the
+            number of connections currently in each state), 'created'
+            (connections opened), 'reused' (requests that didn't need
+            a new connection), 'expired' (connections closed after
+            their idle timeout), and 'discarded' (connections closed
+            because the pool was full or the connection went bad).
+        """
+        with self._lock:
+            return dict(
+                idle=sum(len(idle) for idle in self._idle.values()),
+                in_use=self._in_use, created=self._created,
+                reused=self._reused, expired=self._expired,
+                discarded=self._discarded)
+
+
+class _PooledConnections:
+    """A stand-in for `httplib2.Http.connections` that uses a pool.
+
+    httplib2 looks up `connections[key]` before each request and stores
+    a new connection there if it finds nothing. This mapping answers
+    those lookups by checking connections out of a `ConnectionPool`,
+    and remembers which connections the current thread holds so they
+    can be checked back in once the request is over.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._local = threading.local()
+
+    @property
+    def _held(self):
+        held = getattr(self._local, 'held', None)
+        if held is None:
+            held = self._local.held = {}
+        return held
+
+    def get(self, key, default=None):
+        connection = self._held.get(key)
+        if connection is None:
+            connection = self.pool.acquire(key)
+            if connection is None:
+                return default
+            self._held[key] = connection
+        return connection
+
+    def __getitem__(self, key):
+        connection = self.get(key)
+        if connection is None:
+            raise KeyError(key)
+        return connection
+
+    def __setitem__(self, key, connection):
+        self._held[key] = connection
+        self.pool.created(key, connection)
+
+    def pop(self, key, default=None):
+        # httplib2 pops a connection when it times out. Don't let it
+        # go back into the pool.
+        connection = self._held.pop(key, None)
+        if connection is None:
+            return default
+        self.pool.discard(key, connection)
+        return connection
+
+    def items(self):
+        return list(self._held.items())
+
+    def release_all(self):
+        """Check in every connection the current thread is holding."""
+        held = self._held
+        for key, connection in list(held.items()):
+            del held[key]
+            if getattr(connection, 'sock', None) is None:
+                # The connection was closed during the request (say,
+                # by a HEAD request or a "Connection: close" from the
+                # server). There's no point in pooling it.
+                self.pool.discard(key, connection)
+            else:
+                self.pool.release(key, connection)
+
+
+class PooledConnectionsMixin:
+    """Make an `httplib2.Http` subclass draw connections from a pool.
+
+    Mix this in before the `Http` class, and set the pool with
+    `use_connection_pool`. Without a pool, the object behaves like a
+    normal `Http`.
+    """
+
+    connection_pool = None
+    _pooled_request_depth = None
+
+    def use_connection_pool(self, pool):
+        """Start drawing connections from the given `ConnectionPool`."""
+        self.connection_pool = pool
+        if pool is not None:
+            self.connections = _PooledConnections(pool)
+            self._pooled_request_depth = threading.local()
+
+    def request(self, *args, **kwargs):
+        """Make a request, then check its connection back into the pool."""
+        if self.connection_pool is None:
+            return super(PooledConnectionsMixin, self).request(
+                *args, **kwargs)
+        # httplib2 calls request() recursively to follow redirects.
+        # Only the outermost call releases connections.
+        depth = getattr(self._pooled_request_depth, 'value', 0)
+        self._pooled_request_depth.value = depth + 1
+        try:
+            return super(PooledConnectionsMixin, self).request(
+                *args, **kwargs)
+        finally:
+            self._pooled_request_depth.value = depth
+            if depth == 0:
+                self.connections.release_all()
+
+    def close(self):
+        """Close the pool's idle connections along with our own."""
+        if self.connection_pool is None:
+            return super(PooledConnectionsMixin, self).close()
+        connections = self.connections
+        super(PooledConnectionsMixin, self).close()
+        # Http.close() replaced our mapping with a plain dict.
+        self.connections = connections
+        self.connection_pool.clear()
+
+
+class PooledHttp(PooledConnectionsMixin, httplib2.Http):
+    """An `httplib2.Http` that draws its connections from a pool."""
+
+    def __init__(self, connection_pool=None, *args, **kwargs):
+        super(PooledHttp, self).__init__(*args, **kwargs)
+        self.use_connection_pool(connection_pool)
@@ -23,33 +23,42 @@ __all__ = [
     'AccessToken',
     'AnonymousAccessToken',
     'AuthorizeRequestTokenWithBrowser',
+    'AuthorizeRequestTokenWithCallback',
     'CredentialStore',
     'RequestTokenAuthorizationEngine',
     'Consumer',
     'Credentials',
+    'LayeredCredentialStore',
+    'MemoryCredentialStore',
+    'PrivateFileCredentialStore',
     ]
 
-import cgi
+import errno
+import hashlib
 try:
     from cStringIO import StringIO
 except ImportError:
     from io import StringIO
 
-import httplib2
 import os
-from select import select
+import socket
 import stat
 from sys import stdin
+import tempfile
+import threading
 import time
 try:
-    from urllib.parse import urlencode
+    from urllib.parse import (
+        parse_qs,
+        urlencode,
+        )
 except ImportError:
     from urllib import urlencode
+    from urlparse import parse_qs
 try:
     from urllib.parse import urljoin
 except ImportError:
     from urlparse import urljoin
-import webbrowser
 from base64 import (
     b64decode,
     b64encode,
@@ -75,6 +84,10 @@ from lazr.restfulclient.authorize.oauth import (
     )
 
 from launchpadlib import uris
+from launchpadlib.connections import (
+    ConnectionPool,
+    PooledHttp,
+    )
 
 request_token_page = '+request-token'
 access_token_page = '+access-token'
@@ -84,6 +97,9 @@ access_token_poll_timeout = 15 * 60
 
 EXPLOSIVE_ERRORS = (MemoryError, KeyboardInterrupt, SystemExit)
 
+# Token requests all go to the same website, so they share connections.
+token_connection_pool = ConnectionPool()
+
 
 def _ssl_certificate_validation_disabled():
     """Whether the user has disabled SSL certificate connection.
@@ -104,9 +120,12 @@ def _http_post(url, headers, params):
 
     Wraps it up to make sure we avoid the SSL certificate validation if our
     environment tells us to.  Also, raises an error on non-200 statuses.
+    Connections are kept open in `token_connection_pool`, since a
+    token authorization makes many POSTs to the same host.
     """
     cert_disabled = _ssl_certificate_validation_disabled()
-    response, content = httplib2.Http(
+    response, content = PooledHttp(
+        token_connection_pool,
         disable_ssl_certificate_validation=cert_disabled).request(
         url, method='POST', headers=headers, body=urlencode(params))
     if response.status != 200:
@@ -248,7 +267,7 @@ class AccessToken(_AccessToken):
         """Create and return a new `AccessToken` from the given string."""
         if not isinstance(query_string, unicode_type):
             query_string = query_string.decode('utf-8')
-        params = cgi.parse_qs(query_string, keep_blank_values=False)
+        params = parse_qs(query_string, keep_blank_values=False)
         key = params['oauth_token']
         assert len(key) == 1, (
             "Query string must have exactly one oauth_token.")
@@ -433,6 +452,159 @@ class UnencryptedFileCredentialStore(CredentialStore):
         return None
 
 
+class MemoryCredentialStore(CredentialStore):
+    """Keep credentials in memory, for as long as the process runs.
+
+    On its own this is only useful for tests, but as the first of a
+    `LayeredCredentialStore`'s stores it saves a process that logs in
+    more than once from going to slower stores each time.
+    """
+
+    def __init__(self, credential_save_failed=None):
+        super(MemoryCredentialStore, self).__init__(credential_save_failed)
+        self._credentials = {}
+
+    def do_save(self, credentials, unique_key):
+        """Remember the credentials."""
+        # Keep a serialized copy, so that changes the caller makes to
+        # its Credentials object don't show up here.
+        self._credentials[unique_key] = credentials.serialize()
+
+    def do_load(self, unique_key):
+        """Look up the credentials."""
+        serialized = self._credentials.get(unique_key)
+        if serialized is None:
+            return None
+        return Credentials.from_string(serialized)
+
+
+class PrivateFileCredentialStore(CredentialStore):
+    """Store credentials unencrypted, in a file for each consumer.
+
+    Unlike `UnencryptedFileCredentialStore`, this can hold any number
+    of credentials: they go in a directory, one file for each unique
+    key. Files are written atomically, readable only by their owner,
+    and a file that anyone else could read or write is ignored.
+    """
+
+    def __init__(self, directory, credential_save_failed=None):
+        super(PrivateFileCredentialStore, self).__init__(
+            credential_save_failed)
+        self.directory = directory
+
+    def _path(self, unique_key):
+        if not isinstance(unique_key, bytes):
+            unique_key = unique_key.encode('utf-8')
+        return os.path.join(
+            self.directory, hashlib.sha1(unique_key).hexdigest())
+
+    def do_save(self, credentials, unique_key):
+        """Save the credentials to their file."""
+        try:
+            os.makedirs(self.directory, 0o700)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        # mkstemp makes a file only its owner can read and write.
+        fd, temp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as credentials_file:
+                credentials_file.write(credentials.serialize())
+            os.rename(temp_path, self._path(unique_key))
+        except:
+            os.remove(temp_path)
+            raise
+
+    def do_load(self, unique_key):
+        """Load the credentials from their file, if it's private."""
+        try:
+            fd = os.open(self._path(unique_key), os.O_RDONLY)
+        except OSError as e:
+            if e.errno == errno.ENOENT:
+                return None
+            raise
+        with os.fdopen(fd, 'rb') as credentials_file:
+            info = os.fstat(fd)
+            if (info.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+                or (hasattr(os, 'getuid') and info.st_uid != os.getuid())):
+                return None
+            credential_string = credentials_file.read()
+        try:
+            return Credentials.from_string(credential_string)
+        except:
+            # As with the keyring, a corrupt file just means the
+            # consumer has to be authorized again.
+            return None
+
+
+class LayeredCredentialStore(CredentialStore):
+    """Look for credentials in a series of stores, fastest first.
+
+    Credentials found in one store are saved to the stores before it,
+    so that they're found sooner next time, and newly-authorized
+    credentials are saved to every store. Going to the keyring can
+    take seconds while it's unlocked, so a script that logs in often
+    could use:
+
+        >>> store = LayeredCredentialStore([
+        ...     MemoryCredentialStore(),
+        ...     PrivateFileCredentialStore(
+        ...         os.path.expanduser('~/.launchpadlib/credentials')),
+        ...     KeyringCredentialStore()])
+        >>> launchpad = Launchpad.login_with(
+        ...     'my script', 'production', credential_store=store)
+
+    Bear in mind that doing so copies the credentials out of the
+    keyring into an unencrypted file.
+    """
+
+    def __init__(self, stores, credential_save_failed=None):
+        """Constructor.
+
+        :param stores: A list of `CredentialStore` objects, in the
+            order to look in them. Their own credential_save_failed
+            callbacks aren't used.
+        """
+        super(LayeredCredentialStore, self).__init__(credential_save_failed)
+        self.stores = list(stores)
+
+    def do_save(self, credentials, unique_key):
+        """Save the credentials to every store.
+
+        If any store fails, the others are still saved to, and then
+        the first error is raised.
+        """
+        error = None
+        for store in self.stores:
+            try:
+                store.do_save(credentials, unique_key)
+            except EXPLOSIVE_ERRORS:
+                raise
+            except Exception as e:
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
+
+    def do_load(self, unique_key):
+        """Load the credentials from the first store that has them."""
+        for index, store in enumerate(self.stores):
+            credentials = store.load(unique_key)
+            if credentials is None:
+                continue
+            for faster_store in self.stores[:index]:
+                try:
+                    faster_store.do_save(credentials, unique_key)
+                except EXPLOSIVE_ERRORS:
+                    raise
+                except Exception:
+                    # The credentials will just be found more slowly
+                    # next time.
+                    pass
+            return credentials
+        return None
+
+
 class RequestTokenAuthorizationEngine(object):
     """The superclass of all request token authorizers.
 
@@ -579,7 +751,7 @@ class RequestTokenAuthorizationEngine(object):
 
 
 class AuthorizeRequestTokenWithBrowser(RequestTokenAuthorizationEngine):
-    """The simplest (and, right now, the only) request token authorizer.
+    """The simplest request token authorizer.
 
     This authorizer simply opens up the end-user's web browser to a
     Launchpad URL and lets the end-user authorize the request token
@@ -630,8 +802,15 @@ class AuthorizeRequestTokenWithBrowser(RequestTokenAuthorizationEngine):
 
     def make_end_user_authorize_token(self, credentials, request_token):
         """Have the end-user authorize the token in their browser."""
+        self.open_authorization_page(self.authorization_url(request_token))
+        self.wait_for_access_token(credentials)
+
+    def open_authorization_page(self, authorization_url):
+        """Show the end-user the authorization page, in a browser if any."""
+        # Only scripts that authorize tokens need these.
+        from select import select
+        import webbrowser
 
-        authorization_url = self.authorization_url(request_token)
         self.output(self.WAITING_FOR_USER % authorization_url)
 
         try:
@@ -653,9 +832,30 @@ class AuthorizeRequestTokenWithBrowser(RequestTokenAuthorizationEngine):
         self.output(self.WAITING_FOR_LAUNCHPAD)
         if browser_obj is not None:
             webbrowser.open(authorization_url)
+
+    def poll_intervals(self):
+        """How long to wait before each attempt to get an access token.
+
+        :return: An iterator of times in seconds.
+        """
+        while True:
+            yield access_token_poll_time
+
+    def wait_for_access_token(self, credentials, decided=None):
+        """Keep asking for an access token until the end-user decides.
+
+        :param decided: A `threading.Event` that's set when the
+            end-user might have made a decision. If it's set, the next
+            attempt is made straight away.
+        """
         start_time = time.time()
+        intervals = self.poll_intervals()
         while credentials.access_token is None:
-            time.sleep(access_token_poll_time)
+            interval = next(intervals)
+            if decided is None:
+                time.sleep(interval)
+            elif decided.wait(interval):
+                decided.clear()
             try:
                 credentials.exchange_request_token_for_access_token(
                     self.web_root)
@@ -677,6 +877,136 @@ class AuthorizeRequestTokenWithBrowser(RequestTokenAuthorizationEngine):
                     "Timed out after %d seconds." % access_token_poll_timeout)
 
 
+class AuthorizeRequestTokenWithCallback(AuthorizeRequestTokenWithBrowser):
+    """Authorize a token in a browser, and hear back when it's done.
+
+    Rather than asking Launchpad every second whether the end-user has
+    decided yet, this listens on a port of the loopback interface, and
+    passes Launchpad its URL as the oauth_callback. Launchpad sends
+    the browser there once the end-user has decided, and the access
+    token is asked for straight away.
+
+    Meanwhile, and if nothing can listen on the loopback interface,
+    Launchpad is asked less and less often, starting after
+    `MIN_POLL_INTERVAL` seconds and waiting at most `MAX_POLL_INTERVAL`
+    seconds between attempts.
+    """
+
+    MIN_POLL_INTERVAL = 1
+    MAX_POLL_INTERVAL = 10
+    POLL_BACKOFF = 1.5
+    CALLBACK_HOST = '127.0.0.1'
+    CALLBACK_PAGE = (
+        b"<html><head><title>Authorization complete</title></head>"
+        b"<body><p>Launchpad has your decision. You can close this window "
+        b"and return to the application.</p></body></html>")
+
+    _callback_url = None
+
+    def authorization_url(self, request_token):
+        """Return the authorization URL, with the callback if there is one."""
+        url = super(AuthorizeRequestTokenWithCallback, self).authorization_url(
+            request_token)
+        if self._callback_url is not None:
+            url += '&' + urlencode(dict(oauth_callback=self._callback_url))
+        return url
+
+    def poll_intervals(self):
+        """Back off exponentially, up to MAX_POLL_INTERVAL seconds."""
+        interval = self.MIN_POLL_INTERVAL
+        while True:
+            yield interval
+            interval = min(
+                interval * self.POLL_BACKOFF, self.MAX_POLL_INTERVAL)
+
+    def listen_for_callback(self, request_token, decided):
+        """Listen for the end-user's browser on the loopback interface.
+
+        :param decided: A `threading.Event` to set when the browser
+            comes back with this request token.
+        :return: A function that stops listening.
+        :raise socket.error: If nothing can listen.
+        """
+        try:
+            from http.server import (
+                BaseHTTPRequestHandler,
+                HTTPServer,
+                )
+            from socketserver import TCPServer
+            from urllib.parse import (
+                parse_qs,
+                urlsplit,
+                )
+        except ImportError:
+            from BaseHTTPServer import (
+                BaseHTTPRequestHandler,
+                HTTPServer,
+                )
+            from SocketServer import TCPServer
+            from urlparse import (
+                parse_qs,
+                urlsplit,
+                )
+        page = self.CALLBACK_PAGE
+
+        class CallbackServer(HTTPServer):
+
+            def server_bind(self):
+                # HTTPServer looks up the host's name, which can be slow.
+                TCPServer.server_bind(self)
+                self.server_name, self.server_port = self.server_address[:2]
+
+        class CallbackHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                query = parse_qs(urlsplit(self.path).query)
+                if request_token not in query.get('oauth_token', []):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(page)))
+                self.end_headers()
+                self.wfile.write(page)
+                decided.set()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = CallbackServer((self.CALLBACK_HOST, 0), CallbackHandler)
+        thread = threading.Thread(
+            target=server.serve_forever, name='AuthorizationCallback')
+        thread.daemon = True
+        thread.start()
+        # Launchpad adds the token to the callback URL itself, but it
+        # does no harm to put it there first.
+        host, port = server.server_address[:2]
+        self._callback_url = 'http://%s:%d/?%s' % (
+            host, port, urlencode(dict(oauth_token=request_token)))
+
+        def stop():
+            self._callback_url = None
+            server.shutdown()
+            server.server_close()
+        return stop
+
+    def make_end_user_authorize_token(self, credentials, request_token):
+        """Have the end-user authorize the token, and wait to hear back."""
+        decided = threading.Event()
+        try:
+            stop_listening = self.listen_for_callback(request_token, decided)
+        except socket.error:
+            # Poll for the access token instead.
+            stop_listening = None
+        try:
+            self.open_authorization_page(
+                self.authorization_url(request_token))
+            self.wait_for_access_token(credentials, decided)
+        finally:
+            if stop_listening is not None:
+                stop_listening()
+
+
 class TokenAuthorizationException(Exception):
     pass
 
@@ -0,0 +1,143 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Keep recently fetched entries in memory for a while.
+
+Even when a representation is in the HTTP cache, getting it again
+costs a conditional request to the server. Scripts that follow the
+same links over and over (task.bug, task.assignee) can instead use
+the copy they got a moment ago:
+
+    >>> launchpad.entry_cache = EntryCache()
+
+Each resource type is kept for its own time to live, and the cache
+as a whole is limited to a number of bytes, beyond which the least
+recently used entries are dropped. An entry is dropped as soon as
+this Launchpad object changes it, and refreshing an entry with
+lp_refresh() always asks the server.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'DEFAULT_TTLS',
+    'EntryCache',
+    ]
+
+from collections import OrderedDict
+import copy
+import threading
+import time
+
+from launchpadlib.metrics import resource_type_of
+
+
+# How long, in seconds, to keep each type of entry. Types that aren't
+# listed aren't kept at all.
+DEFAULT_TTLS = {
+    'bug': 60,
+    'distribution': 600,
+    'milestone': 300,
+    'person': 300,
+    'project': 600,
+    'project_group': 600,
+    'team': 300,
+    }
+
+
+class EntryCache:
+    """A size-limited in-memory cache of entry representations.
+
+    :ivar hits: How many requests were answered from the cache.
+    :ivar misses: How many requests had to be sent.
+    """
+
+    def __init__(self, ttls=None, max_bytes=16 * 1024 * 1024,
+                 clock=time.time):
+        """Constructor.
+
+        :param ttls: A dict mapping resource types to how long, in
+            seconds, to keep entries of that type. Defaults to
+            `DEFAULT_TTLS`.
+        :param max_bytes: How much entry content to keep, at most.
+        :param clock: A function returning the time, for testing.
+        """
+        if ttls is None:
+            ttls = DEFAULT_TTLS
+        self.ttls = dict(ttls)
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Maps (url, media type) to (expiry time, response, content).
+        self._entries = OrderedDict()
+
+    def get(self, url, media_type):
+        """Look up an entry.
+
+        :return: A (response, content) tuple, or None.
+        """
+        key = (str(url), media_type)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                expires, response, content = cached
+                if expires > self.clock():
+                    # Move it to the most recently used end.
+                    del self._entries[key]
+                    self._entries[key] = cached
+                    self.hits += 1
+                    return copy.copy(response), content
+                self._remove(key)
+            self.misses += 1
+        return None
+
+    def store(self, url, media_type, response, content):
+        """Keep an entry, if it's of a type that's kept."""
+        if response.status != 200 or not isinstance(content, bytes):
+            return
+        ttl = self.ttls.get(resource_type_of(response, content))
+        if not ttl or len(content) > self.max_bytes:
+            return
+        key = (str(url), media_type)
+        response = copy.copy(response)
+        # Whatever it came from, it'll next come from here.
+        response.fromcache = False
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (self.clock() + ttl, response, content)
+            self.size += len(content)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        cached = self._entries.pop(key, None)
+        if cached is not None:
+            self.size -= len(cached[2])
+
+    def invalidate(self, url):
+        """Forget every representation of a URL."""
+        url = str(url)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == url]:
+                self._remove(key)
+
+    def clear(self):
+        """Forget everything."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
@@ -0,0 +1,150 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Spread work over several processes, each with its own Launchpad object.
+
+Parsing JSON and finding your way around the WADL take enough CPU
+time that big reports can keep more than one core busy. `process_map`
+calls a function for each of many keys in a pool of worker processes:
+
+    >>> def bug_title(launchpad, bug_id):
+    ...     return launchpad.bugs[bug_id].title
+    >>> titles = process_map(launchpad, bug_title, bug_ids)
+
+Each worker logs in once, when it starts, with the credentials of the
+Launchpad object passed in, and shares its WADL and HTTP caches, so
+workers start without asking the user for anything or fetching the
+WADL again. The function and its results must be picklable, so the
+function has to be defined at the top level of a module.
+
+This needs Python 3.7 or later.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'SessionBootstrap',
+    'process_map',
+    ]
+
+from concurrent.futures import ProcessPoolExecutor
+
+from launchpadlib.credentials import Credentials
+from launchpadlib.sqlitecache import SQLiteCache
+from launchpadlib.wadlcache import WADLCache
+
+
+class SessionBootstrap:
+    """What a worker process needs to recreate a Launchpad object.
+
+    Unlike a Launchpad object, this can be pickled.
+    """
+
+    def __init__(self, launchpad_class, credentials, service_root, version,
+                 cache=None, sqlite_cache=None, wadl_cache=None,
+                 timeout=None):
+        """Constructor.
+
+        :param launchpad_class: The `Launchpad` class to instantiate.
+        :param credentials: `Credentials.serialize` of the credentials.
+        :param cache: The HTTP cache directory, if any.
+        :param sqlite_cache: The `SQLiteCache` database, if any.
+        :param wadl_cache: The `WADLCache` directory, if any.
+        """
+        self.launchpad_class = launchpad_class
+        self.credentials = credentials
+        self.service_root = service_root
+        self.version = version
+        self.cache = cache
+        self.sqlite_cache = sqlite_cache
+        self.wadl_cache = wadl_cache
+        self.timeout = timeout
+
+    @classmethod
+    def from_launchpad(cls, launchpad):
+        """Describe how to recreate a Launchpad object."""
+        if '_deferred_init' in launchpad.__dict__:
+            cache = launchpad._deferred_init[2]
+        else:
+            cache = launchpad._browser._connection.cache
+        cache_dir = sqlite_cache = None
+        if isinstance(cache, SQLiteCache):
+            sqlite_cache = cache.path
+        elif cache is not None:
+            # Only the cache directory is shared, not the cache object.
+            cache_dir = getattr(cache, '_cache_dir', cache)
+        wadl_cache = None
+        if launchpad.wadl_cache is not None:
+            wadl_cache = launchpad.wadl_cache.directory
+        return cls(
+            type(launchpad), launchpad.credentials.serialize(),
+            launchpad._service_root, launchpad._version, cache_dir,
+            sqlite_cache, wadl_cache, launchpad._timeout)
+
+    def login(self):
+        """Create a Launchpad object.
+
+        The new object never asks the end-user to authorize a new
+        token; if the token is rejected, the request fails.
+        """
+        if self.sqlite_cache is not None:
+            cache = SQLiteCache(self.sqlite_cache)
+        else:
+            cache = self.cache
+        wadl_cache = None
+        if self.wadl_cache is not None:
+            wadl_cache = WADLCache(self.wadl_cache)
+        return self.launchpad_class(
+            Credentials.from_string(self.credentials), None, None,
+            service_root=self.service_root, cache=cache,
+            timeout=self.timeout, version=self.version,
+            wadl_cache=wadl_cache)
+
+
+# The Launchpad object of a worker process.
+_worker_launchpad = None
+
+
+def _start_worker(bootstrap):
+    global _worker_launchpad
+    _worker_launchpad = bootstrap.login()
+
+
+def _call(function, key):
+    return function(_worker_launchpad, key)
+
+
+def process_map(launchpad, function, keys, max_workers=None, chunksize=1):
+    """Call function(launchpad, key) for each key, in worker processes.
+
+    :param launchpad: The Launchpad object whose credentials and
+        caches the workers use.
+    :param function: A picklable function taking a worker's Launchpad
+        object and a key.
+    :param keys: The keys, such as bug IDs or package names.
+    :param max_workers: How many processes to start. Defaults to the
+        number of CPUs.
+    :param chunksize: How many keys to send to a worker at a time.
+        Larger chunks cost less to send when there are many keys.
+    :return: A list of the results, in the same order as the keys. If
+        a call raised an exception, it's raised here.
+    """
+    bootstrap = SessionBootstrap.from_launchpad(launchpad)
+    with ProcessPoolExecutor(
+        max_workers, initializer=_start_worker,
+        initargs=(bootstrap,)) as executor:
+        keys = list(keys)
+        return list(executor.map(
+            _call, [function] * len(keys), keys, chunksize=chunksize))
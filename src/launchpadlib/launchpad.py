@@ -21,14 +21,30 @@ __all__ = [
     'Launchpad',
     ]
 
+from collections import OrderedDict
+import copy
 import errno
 import os
+import re
+import sys
+import threading
+import time
 try:
-    from urllib.parse import urlsplit
+    from urllib.parse import unquote, urlsplit
 except:
+    from urllib import unquote
     from urlparse import urlsplit
 import warnings
 
+if sys.version_info[0] >= 3:
+    basestring = str
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+import httplib2
 try:
     from httplib2 import proxy_info_from_environment
 except ImportError:
@@ -37,12 +53,22 @@ except ImportError:
 
 from lazr.restfulclient.resource import (
     CollectionWithKeyBasedLookup,
+    Entry,
     HostedFile,           # Re-import for client convenience
     ScalarValue,          # Re-import for client convenience
     ServiceRoot,
     )
 from lazr.restfulclient.authorize.oauth import SystemWideConsumer
 from lazr.restfulclient._browser import RestfulHttp
+from lazr.restfulclient.errors import HTTPError
+from launchpadlib.connections import (
+    ConnectionPool,
+    PooledConnectionsMixin,
+    )
+# The cache manager, metrics, read-ahead, retry policy, SQLite cache
+# and WADL cache are imported when they're first needed, so that
+# scripts that never make a request (to print --help, say) don't pay
+# for them.
 from launchpadlib.credentials import (
     AccessToken,
     AnonymousAccessToken,
@@ -52,15 +78,85 @@ from launchpadlib.credentials import (
     KeyringCredentialStore,
     UnencryptedFileCredentialStore,
     )
+from launchpadlib.representationcache import (
+    PerThreadMediaTypeMixin,
+    ThreadSafeRepresentationCache,
+    )
 from launchpadlib import uris
 
 
 # Import old constants for backwards compatibility
 from launchpadlib.uris import STAGING_SERVICE_ROOT, EDGE_SERVICE_ROOT
 OAUTH_REALM = 'https://api.launchpad.net'
+WADL_MEDIA_TYPE = 'application/vnd.sun.wadl+xml'
+
+
+class MultiGetResult(OrderedDict):
+    """The entries found by `get_many`, in the order they were asked for.
+
+    :ivar missing: A list of the keys that don't correspond to any entry.
+    :ivar errors: A dict mapping keys to the `HTTPError` the server
+        returned when they were looked up, for keys that failed for
+        some reason other than not existing (for instance, because the
+        entry is private).
+    """
+
+    def __init__(self):
+        super(MultiGetResult, self).__init__()
+        self.missing = []
+        self.errors = {}
+
+
+class KeyBasedLookupSet(CollectionWithKeyBasedLookup):
+    """A top-level collection whose entries can be looked up in bulk."""
+
+    DEFAULT_MAX_WORKERS = 8
+
+    def get_many(self, keys, max_workers=DEFAULT_MAX_WORKERS):
+        """Look up many entries at once, by key.
 
+        The lookups are made concurrently, in up to `max_workers`
+        threads, unless the Launchpad object has no connection pool:
+        then its threads would share connections, so the lookups are
+        made one at a time. Each distinct key is only looked up once.
 
-class PersonSet(CollectionWithKeyBasedLookup):
+        :param keys: An iterable of keys, as you'd pass to `__getitem__`.
+        :return: A `MultiGetResult` mapping each key that was found to
+            its entry. Keys that weren't found are listed in its
+            `missing` attribute rather than raising KeyError.
+        """
+        unique_keys = list(OrderedDict((key, None) for key in keys))
+        result = MultiGetResult()
+        if len(unique_keys) == 0:
+            return result
+
+        def lookup(key):
+            try:
+                return self[key], None
+            except KeyError as error:
+                return None, error
+            except HTTPError as error:
+                return None, error
+
+        if (max_workers <= 1 or len(unique_keys) == 1
+            or self._root.connection_pool is None):
+            outcomes = [lookup(key) for key in unique_keys]
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(
+                    min(max_workers, len(unique_keys))) as executor:
+                outcomes = list(executor.map(lookup, unique_keys))
+        for key, (entry, error) in zip(unique_keys, outcomes):
+            if isinstance(error, KeyError):
+                result.missing.append(key)
+            elif error is not None:
+                result.errors[key] = error
+            else:
+                result[key] = entry
+        return result
+
+
+class PersonSet(KeyBasedLookupSet):
     """A custom subclass capable of person lookup by username."""
 
     def _get_url_from_id(self, key):
@@ -73,7 +169,7 @@ class PersonSet(CollectionWithKeyBasedLookup):
     collection_of = 'team'
 
 
-class BugSet(CollectionWithKeyBasedLookup):
+class BugSet(KeyBasedLookupSet):
     """A custom subclass capable of bug lookup by bug ID."""
 
     def _get_url_from_id(self, key):
@@ -83,7 +179,7 @@ class BugSet(CollectionWithKeyBasedLookup):
     collection_of = 'bug'
 
 
-class PillarSet(CollectionWithKeyBasedLookup):
+class PillarSet(KeyBasedLookupSet):
     """A custom subclass capable of lookup by pillar name.
 
     Projects, project groups, and distributions are all pillars.
@@ -116,13 +212,274 @@ class DistributionSet(PillarSet):
     collection_of = 'distribution'
 
 
-class LaunchpadOAuthAwareHttp(RestfulHttp):
-    """Detects expired/invalid OAuth tokens and tries to get a new token."""
+class EntryWithIdentity(Entry):
+    """An entry that can work out some of its fields from its URL.
+
+    Following a link, like `bug.owner`, doesn't fetch the linked entry
+    until one of its fields is used. For entries of this class, the
+    fields that are part of the URL (and `self_link`) are answered
+    without fetching the entry at all.
+    """
+
+    def _field_from_url(self, name, segments):
+        """Work out the value of a field from the entry's URL.
+
+        :param segments: The segments of the URL's path, relative to
+            the service root.
+        :raise KeyError: If the field can't be worked out.
+        """
+        if name == 'self_link':
+            return str(self._wadl_resource.url)
+        raise KeyError(name)
+
+    def __getattr__(self, name):
+        if (self._wadl_resource.representation is None
+            and not name.startswith('_')
+            and name not in self._dirty_attributes):
+            url = str(self._wadl_resource.url)
+            root = str(self._root._root_uri.ensureSlash())
+            if url.startswith(root):
+                segments = url[len(root):].split('/')
+                try:
+                    return self._field_from_url(name, segments)
+                except KeyError:
+                    pass
+        return super(EntryWithIdentity, self).__getattr__(name)
+
+
+class Person(EntryWithIdentity):
+    """A person or team, which knows its name from its URL."""
+
+    def _field_from_url(self, name, segments):
+        if (name == 'name' and len(segments) == 1
+            and segments[0].startswith('~')):
+            return segments[0][1:]
+        return super(Person, self)._field_from_url(name, segments)
+
+
+class Bug(EntryWithIdentity):
+    """A bug, which knows its ID from its URL."""
+
+    def _field_from_url(self, name, segments):
+        if (name == 'id' and len(segments) == 2 and segments[0] == 'bugs'
+            and segments[1].isdigit()):
+            return int(segments[-1])
+        return super(Bug, self)._field_from_url(name, segments)
+
+
+class Pillar(EntryWithIdentity):
+    """A project, project group or distribution.
+
+    These know their names from their URLs.
+    """
+
+    def _field_from_url(self, name, segments):
+        if name == 'name' and len(segments) == 1:
+            return segments[0]
+        return super(Pillar, self)._field_from_url(name, segments)
+
+
+OAUTH_TOKEN_RE = re.compile(r'oauth_token="([^"]*)"')
+
+
+def _signing_token_key(headers):
+    """The key of the access token that signed a request, or None."""
+    for name, value in headers.items():
+        if name.lower() == 'authorization':
+            match = OAUTH_TOKEN_RE.search(value)
+            if match is not None:
+                return unquote(match.group(1))
+    return None
+
+
+class LaunchpadOAuthAwareHttp(PooledConnectionsMixin, RestfulHttp):
+    """Detects expired/invalid OAuth tokens and tries to get a new token.
+
+    If the Launchpad object has a `ConnectionPool`, connections are
+    drawn from it, so they stay open between requests and can be used
+    by more than one thread. If it also has a `PagePrefetcher`, pages
+    of collections are read ahead in the background. If it has a
+    `WADLCache`, the WADL document comes from there when possible, and
+    if it has an `EntryCache`, so do recently fetched entries.
+
+    If the Launchpad object's `request_metrics` isn't None, every
+    request is recorded there. Requests that fail for passing reasons
+    are retried as its `retry_policy` says.
+    """
 
     def __init__(self, launchpad, authorization_engine, *args):
         self.launchpad = launchpad
         self.authorization_engine = authorization_engine
         super(LaunchpadOAuthAwareHttp, self).__init__(*args)
+        self.use_connection_pool(getattr(launchpad, 'connection_pool', None))
+        if self.connection_pool is None:
+            # Background requests need connections of their own.
+            self.page_prefetcher = None
+        else:
+            self.page_prefetcher = getattr(launchpad, 'page_prefetcher', None)
+        self.wadl_cache = getattr(launchpad, 'wadl_cache', None)
+        # Counts the requests that reach the network, per thread.
+        self._network_requests = threading.local()
+        # Only one thread at a time replaces a bad access token.
+        self._reauthorization_lock = threading.Lock()
+        # Counts the token replacements for the request being made,
+        # per thread.
+        self._reauthorizations = threading.local()
+
+    @property
+    def request_metrics(self):
+        """Where to record requests, or None."""
+        return getattr(self.launchpad, 'request_metrics', None)
+
+    def request(self, uri, method="GET", body=None, headers=None,
+                *args, **kwargs):
+        metrics = self.request_metrics
+        if metrics is None:
+            return self._get_response(
+                uri, method, body, headers, *args, **kwargs)
+        network_requests = getattr(self._network_requests, 'count', 0)
+        start = time.time()
+        response, content = self._get_response(
+            uri, method, body, headers, *args, **kwargs)
+        if getattr(self._network_requests, 'count', 0) == network_requests:
+            # _request wasn't called, so nothing has been recorded.
+            from launchpadlib.metrics import (
+                CACHE_HIT,
+                CACHE_LOCAL,
+                RequestRecord,
+                resource_type_of,
+                )
+            if getattr(response, 'fromcache', False):
+                cache = CACHE_HIT
+            else:
+                cache = CACHE_LOCAL
+            metrics.record(RequestRecord(
+                method, str(uri), response.status, time.time() - start,
+                len(body or ''), len(content or ''), cache,
+                resource_type_of(response, content)))
+        return response, content
+
+    @property
+    def entry_cache(self):
+        """Where to keep recently fetched entries, or None."""
+        return getattr(self.launchpad, 'entry_cache', None)
+
+    def _get_response(self, uri, method, body, headers, *args, **kwargs):
+        """Answer a request locally if possible, or send it."""
+        entry_cache = self.entry_cache
+        if method == "GET" and body is None:
+            partial_root = self.launchpad._partial_root_response(uri, headers)
+            if partial_root is not None:
+                return partial_root
+            if (self.wadl_cache is not None
+                and (headers or {}).get('Accept') == WADL_MEDIA_TYPE):
+                return self._request_wadl(uri, headers, *args, **kwargs)
+            if entry_cache is not None:
+                return self._request_entry(uri, headers, *args, **kwargs)
+            return self._get(uri, headers, *args, **kwargs)
+        if entry_cache is not None:
+            # The entry may be about to change.
+            entry_cache.invalidate(uri)
+        try:
+            return super(LaunchpadOAuthAwareHttp, self).request(
+                uri, method, body, headers, *args, **kwargs)
+        finally:
+            if entry_cache is not None:
+                entry_cache.invalidate(uri)
+
+    def _get(self, uri, headers, *args, **kwargs):
+        """Send a GET request."""
+        if self.page_prefetcher is not None:
+            return self._request_page(uri, headers, *args, **kwargs)
+        return super(LaunchpadOAuthAwareHttp, self).request(
+            uri, "GET", None, headers, *args, **kwargs)
+
+    def _request_entry(self, uri, headers, *args, **kwargs):
+        """GET a representation, from the `EntryCache` if possible."""
+        entry_cache = self.entry_cache
+        headers = headers or {}
+        media_type = headers.get('Accept')
+        if 'If-None-Match' in headers:
+            # Someone wants to know if the entry changed, so ask.
+            entry_cache.invalidate(uri)
+        else:
+            cached = entry_cache.get(uri, media_type)
+            if cached is not None:
+                return cached
+        response, content = self._get(uri, headers, *args, **kwargs)
+        entry_cache.store(uri, media_type, response, content)
+        return response, content
+
+    def _request_wadl(self, uri, headers, *args, **kwargs):
+        """GET a WADL document, from the `WADLCache` if possible."""
+        cached = self.wadl_cache.get(uri)
+        if cached is None:
+            response, content = super(LaunchpadOAuthAwareHttp, self).request(
+                uri, "GET", None, headers, *args, **kwargs)
+            if response.status == 200:
+                self.wadl_cache.store(uri, response.get('etag'), content)
+            return response, content
+        etag, markup = cached
+        self.wadl_cache.revalidate(uri, etag, self._revalidate_wadl)
+        info = {'status': '200', 'content-type': WADL_MEDIA_TYPE,
+                'content-length': str(len(markup))}
+        if etag is not None:
+            info['etag'] = etag
+        return httplib2.Response(info), markup
+
+    def _revalidate_wadl(self, uri, headers, timeout):
+        """Ask the server for a WADL document, in a worker thread.
+
+        This uses an Http object of its own, without a cache, so it
+        can't disturb requests being made in the meantime.
+        """
+        if self.timeout is not None:
+            timeout = min(timeout, self.timeout)
+        http = self.launchpad.httpFactory(
+            self.authorizer, None, timeout, self.proxy_info)
+        # Never ask the end-user to authorize a token from here.
+        http.authorization_engine = None
+        headers = dict(headers, Accept=WADL_MEDIA_TYPE)
+        return super(LaunchpadOAuthAwareHttp, http).request(
+            uri, headers=headers)
+
+    def _request_page(self, uri, headers, *args, **kwargs):
+        """GET a page, reading ahead if it's part of a collection."""
+        prefetcher = self.page_prefetcher
+        headers = dict(headers or {})
+        prefetched = prefetcher.take(uri, headers)
+        if prefetched is not None:
+            try:
+                response, content = prefetched.result()
+            except Exception:
+                # Try again in the foreground, where the error can be
+                # handled.
+                prefetched = None
+            else:
+                if self._bad_oauth_token(response, content):
+                    # Only the foreground replaces a bad token.
+                    prefetched = None
+        if prefetched is None:
+            response, content = super(LaunchpadOAuthAwareHttp, self).request(
+                uri, "GET", None, dict(headers), *args, **kwargs)
+        prefetcher.page_delivered(
+            self._prefetch, uri, headers, response, content)
+        return response, content
+
+    def _prefetch(self, uri, headers):
+        """Fetch a page for the `PagePrefetcher`, in a worker thread."""
+        if isinstance(self.cache, PerThreadMediaTypeMixin):
+            # Do what the Browser does in the thread that asks for
+            # the page.
+            self.cache.request_media_type = headers.get('Accept')
+        # Never ask the end-user to authorize a token from here; the
+        # page may never be wanted.
+        self._reauthorizations.count = self.MAX_REAUTHORIZATIONS
+        return super(LaunchpadOAuthAwareHttp, self).request(
+            uri, headers=dict(headers))
+
+    # How many times to get a new token for the same request.
+    MAX_REAUTHORIZATIONS = 2
 
     def _bad_oauth_token(self, response, content):
         """Helper method to detect an error caused by a bad OAuth token."""
@@ -131,30 +488,123 @@ class LaunchpadOAuthAwareHttp(RestfulHttp):
                  or content.startswith(b"Invalid token")
                  or content.startswith(b"Unknown access token")))
 
+    @property
+    def retry_policy(self):
+        """The `RetryPolicy` for failed requests, or None."""
+        return getattr(self.launchpad, 'retry_policy', None)
+
     def _request(self, *args):
-        response, content = super(
-            LaunchpadOAuthAwareHttp, self)._request(*args)
+        (conn, host, absolute_uri, request_uri, method, body, headers,
+         redirections, cachekey) = args
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            start = time.time()
+            response, content = super(
+                LaunchpadOAuthAwareHttp, self)._request(*args)
+            retry = (policy is not None
+                     and policy.should_retry(method, response, attempt))
+            self._record(
+                method, absolute_uri, body, response, content,
+                time.time() - start, retry)
+            if not retry:
+                break
+            policy.wait(method, absolute_uri, response, attempt)
+            attempt += 1
         return self.retry_on_bad_token(response, content, *args)
 
+    def _record(self, method, uri, body, response, content, latency, retry):
+        """Record a request that reached the network."""
+        metrics = self.request_metrics
+        if metrics is None:
+            return
+        from launchpadlib.metrics import (
+            CACHE_MISS,
+            CACHE_REVALIDATED,
+            RequestRecord,
+            resource_type_of,
+            )
+        self._network_requests.count = (
+            getattr(self._network_requests, 'count', 0) + 1)
+        if response.status == 304:
+            cache = CACHE_REVALIDATED
+        else:
+            cache = CACHE_MISS
+        metrics.record(RequestRecord(
+            method, uri, response.status, latency, len(body or ''),
+            len(content or ''), cache, resource_type_of(response, content),
+            oauth_retry=(self._bad_oauth_token(response, content)
+                         and self.authorization_engine is not None),
+            retry=retry))
+
     def retry_on_bad_token(self, response, content, *args):
         """If the response indicates a bad token, get a new token and retry.
 
+        A request is retried at most `MAX_REAUTHORIZATIONS` times.
         Otherwise, just return the response.
         """
-        if (self._bad_oauth_token(response, content)
-            and self.authorization_engine is not None):
-            # This access token is bad. Scrap it and create a new one.
-            self.launchpad.credentials.access_token = None
-            self.authorization_engine(
-                self.launchpad.credentials, self.launchpad.credential_store)
-            # Retry the request with the new credentials.
+        if (not self._bad_oauth_token(response, content)
+            or self.authorization_engine is None):
+            return response, content
+        count = getattr(self._reauthorizations, 'count', 0)
+        if count >= self.MAX_REAUTHORIZATIONS:
+            return response, content
+        headers = args[6] if len(args) > 6 else {}
+        if not self._reauthorize(_signing_token_key(headers)):
+            return response, content
+        # Retry the request with the new credentials.
+        self._reauthorizations.count = count + 1
+        try:
             return self._request(*args)
-        return response, content
+        finally:
+            self._reauthorizations.count = count
+
+    def _reauthorize(self, bad_key):
+        """Replace a bad access token.
+
+        When many threads find out at once that the token is bad, the
+        first one gets a new token, and the others wait for it and
+        use the same token. Threads making other requests in the
+        meantime carry on with the bad token until the new one is
+        ready, which may take as long as the end-user needs to
+        authorize it.
+
+        :param bad_key: The key of the token that was rejected, or
+            None if it isn't known.
+        :return: True if there's a new token to retry with.
+        """
+        credentials = self.launchpad.credentials
+        with self._reauthorization_lock:
+            current = credentials.access_token
+            if (bad_key is not None and current is not None
+                and current.key != bad_key):
+                # Another thread has already replaced the bad token.
+                return True
+            # This access token is bad. Authorize a new one on a copy
+            # of the credentials, since other threads are still signing
+            # requests with them.
+            fresh = copy.copy(credentials)
+            fresh.access_token = None
+            self.authorization_engine(
+                fresh, self.launchpad.credential_store)
+            if fresh.access_token is None:
+                return False
+            credentials.access_token = fresh.access_token
+            return True
 
 
 class Launchpad(ServiceRoot):
     """Root Launchpad API class.
 
+    One Launchpad object can be used by many threads at once, which
+    saves each thread from parsing the WADL and loading credentials.
+    Requests draw connections from a thread-safe pool, the HTTP cache
+    keeps each thread's idea of the media type it's asking for apart
+    and writes entries atomically, and a bad access token is replaced
+    by one thread while the others wait. The entries, collections and
+    other resources that a Launchpad object hands out aren't
+    thread-safe, though, so threads shouldn't share those.
+
     :ivar credentials: The credentials instance used to access Launchpad.
     :type credentials: `Credentials`
     """
@@ -162,18 +612,32 @@ class Launchpad(ServiceRoot):
     DEFAULT_VERSION = '1.0'
 
     RESOURCE_TYPE_CLASSES = {
+            'bug': Bug,
             'bugs': BugSet,
+            'distribution': Pillar,
             'distributions': DistributionSet,
             'people': PersonSet,
+            'person': Person,
+            'project': Pillar,
+            'project_group': Pillar,
             'project_groups': ProjectGroupSet,
             'projects': ProjectSet,
+            'team': Person,
             }
     RESOURCE_TYPE_CLASSES.update(ServiceRoot.RESOURCE_TYPE_CLASSES)
 
+    # The top-level collections a lazy Launchpad object can find
+    # without fetching the service root, and their paths.
+    LAZY_COLLECTIONS = {
+        'bugs': 'bugs',
+        'people': 'people',
+        'projects': 'projects',
+        }
+
     def __init__(self, credentials, authorization_engine,
                  credential_store, service_root=uris.STAGING_SERVICE_ROOT,
                  cache=None, timeout=None, proxy_info=proxy_info_from_environment,
-                 version=DEFAULT_VERSION):
+                 version=DEFAULT_VERSION, wadl_cache=None, lazy=False):
         """Root access to the Launchpad API.
 
         :param credentials: The credentials used to access Launchpad.
@@ -186,6 +650,14 @@ class Launchpad(ServiceRoot):
         :type authorization_engine: `RequestTokenAuthorizationEngine`
         :param service_root: The URL to the root of the web service.
         :type service_root: string
+        :param wadl_cache: Where to keep the WADL document describing
+            the web service between runs. If this is None, the
+            document is fetched every time.
+        :type wadl_cache: `WADLCache`
+        :param lazy: If True, don't talk to the web service until this
+            object is first used. Then, if the first thing used is one
+            of the `LAZY_COLLECTIONS`, only get the WADL; the rest of
+            the service root is fetched when it's needed.
         """
         service_root = uris.lookup_service_root(service_root)
         if (service_root.endswith(version)
@@ -196,6 +668,11 @@ class Launchpad(ServiceRoot):
                      "launchpadlib.uris instead, or at least remove "
                      "the version name from the root URI." % version)
             raise ValueError(error)
+        # Kept so that the object can be recreated elsewhere; see
+        # launchpadlib.fanout.
+        self._service_root = service_root
+        self._version = version
+        self._timeout = timeout
 
         self.credential_store = credential_store
 
@@ -204,8 +681,107 @@ class Launchpad(ServiceRoot):
         # case we need to authorize a new token during use.
         self.authorization_engine = authorization_engine
 
-        super(Launchpad, self).__init__(
-            credentials, service_root, cache, timeout, proxy_info, version)
+        # Every HTTP request made on behalf of this object draws its
+        # connection from this pool.
+        self.connection_pool = self.connection_pool_factory()
+        # This reads ahead when iterating over big collections.
+        self.page_prefetcher = self.page_prefetcher_factory()
+        self.wadl_cache = wadl_cache
+        # Set this to a `RequestMetrics` to record every request.
+        self.request_metrics = self.request_metrics_factory()
+        # Set this to an `EntryCache` to keep entries in memory.
+        self.entry_cache = self.entry_cache_factory()
+        self.retry_policy = self.retry_policy_factory()
+        # This keeps a cache directory from growing without limit.
+        self.cache_manager = None
+        if isinstance(cache, basestring):
+            self.cache_manager = self.cache_manager_factory(cache)
+            if self.cache_manager is not None:
+                from launchpadlib.cachemanager import (
+                    ManagedRepresentationCache)
+                cache = ManagedRepresentationCache(cache, self.cache_manager)
+                self.cache_manager.maybe_prune()
+            else:
+                cache = ThreadSafeRepresentationCache(cache)
+
+        if lazy:
+            self.credentials = credentials
+            self._deferred_init = (
+                credentials, service_root, cache, timeout, proxy_info,
+                version)
+            self._deferred_init_lock = threading.RLock()
+            self._loading_thread = None
+        else:
+            super(Launchpad, self).__init__(
+                credentials, service_root, cache, timeout, proxy_info,
+                version)
+            self._disable_browser_retries()
+
+    def _disable_browser_retries(self):
+        """Leave retrying failed requests to our own `RetryPolicy`.
+
+        Newer versions of lazr.restfulclient retry 502 and 503
+        responses themselves, regardless of the request method.
+        """
+        if self.retry_policy is not None:
+            self._browser.max_retries = 0
+
+    def _load_service_root(self, partial=False):
+        """Do the work that a lazy Launchpad object put off.
+
+        :param partial: If True, get the WADL but not the service root,
+            pretending it only links to the `LAZY_COLLECTIONS`.
+        """
+        with self._deferred_init_lock:
+            if '_deferred_init' not in self.__dict__:
+                return
+            self._partial_root = partial
+            self._loading_thread = threading.current_thread()
+            try:
+                super(Launchpad, self).__init__(*self._deferred_init)
+            finally:
+                self._loading_thread = None
+            del self._deferred_init
+            self._disable_browser_retries()
+
+    def _load_full_root(self):
+        """Replace a partial service root with the real thing."""
+        with self._deferred_init_lock:
+            if self._partial_root:
+                self._partial_root = False
+                self.lp_refresh()
+
+    def _partial_root_response(self, uri, headers):
+        """Answer a request for a partial service root.
+
+        :return: A (response, content) tuple, or None if this isn't
+            a request for the service root that should be answered
+            locally.
+        """
+        if (not self.__dict__.get('_partial_root')
+            or str(uri) != str(self._root_uri)
+            or (headers or {}).get('Accept') != 'application/json'):
+            return None
+        root = dict(
+            (name + '_collection_link', str(self._root_uri.append(path)))
+            for name, path in self.LAZY_COLLECTIONS.items())
+        root['resource_type_link'] = str(self._root_uri) + '#service-root'
+        content = json.dumps(root).encode('utf-8')
+        return httplib2.Response({
+            'status': '200', 'content-type': 'application/json',
+            'content-length': str(len(content))}), content
+
+    def __getattr__(self, attr):
+        if '_deferred_init' in self.__dict__:
+            if (attr.startswith('__')
+                or self._loading_thread is threading.current_thread()):
+                raise AttributeError(attr)
+            self._load_service_root(partial=attr in self.LAZY_COLLECTIONS)
+            return getattr(self, attr)
+        if (self.__dict__.get('_partial_root') and not attr.startswith('_')
+            and attr not in self.LAZY_COLLECTIONS):
+            self._load_full_root()
+        return super(Launchpad, self).__getattr__(attr)
 
     def httpFactory(self, credentials, cache, timeout, proxy_info):
         return LaunchpadOAuthAwareHttp(
@@ -220,6 +796,79 @@ class Launchpad(ServiceRoot):
     def credential_store_factory(cls, credential_save_failed):
         return KeyringCredentialStore(credential_save_failed)
 
+    @classmethod
+    def connection_pool_factory(cls):
+        """Create the pool of persistent connections for a new instance.
+
+        Override this to change the pool's size or idle timeout, or
+        return None to open connections the way httplib2 normally does.
+        """
+        return ConnectionPool()
+
+    @classmethod
+    def request_metrics_factory(cls):
+        """Create the `RequestMetrics` for a new instance, if any.
+
+        By default requests aren't recorded. Return a `RequestMetrics`
+        to record them from the very first one.
+        """
+        return None
+
+    @classmethod
+    def retry_policy_factory(cls):
+        """Create the `RetryPolicy` for a new instance.
+
+        Override this to change how often and how patiently failed
+        requests are retried, or return None to never retry them.
+        """
+        from launchpadlib.retry import RetryPolicy
+        return RetryPolicy()
+
+    @classmethod
+    def entry_cache_factory(cls):
+        """Create the `EntryCache` for a new instance, if any.
+
+        By default every request for an entry goes to the server, if
+        only to check that the cached copy is still good. Return an
+        `EntryCache` to keep recently fetched entries in memory.
+        """
+        return None
+
+    @classmethod
+    def cache_manager_factory(cls, cache_dir):
+        """Create the `CacheManager` for a new instance's cache directory.
+
+        Override this to change the cache's limits or eviction policy,
+        or return None to let the cache grow without limit.
+        """
+        from launchpadlib.cachemanager import CacheManager
+        return CacheManager(
+            cache_dir, max_bytes=256 * 1024 * 1024, max_entries=20000)
+
+    @classmethod
+    def page_prefetcher_factory(cls):
+        """Create the collection read-ahead for a new instance.
+
+        Override this to change how many pages are fetched ahead of
+        time, or return None to fetch each page only when it's needed.
+        Read-ahead needs a connection pool, so it's turned off if
+        `connection_pool_factory` returns None.
+        """
+        from launchpadlib.prefetch import PagePrefetcher
+        return PagePrefetcher()
+
+    @classmethod
+    def wadl_cache_factory(cls, service_root_dir):
+        """Create the `WADLCache` used by login_with and login_anonymously.
+
+        Return None to fetch the WADL every time.
+
+        :param service_root_dir: The directory for files specific to
+            the service root, as returned by `_get_paths`.
+        """
+        from launchpadlib.wadlcache import WADLCache
+        return WADLCache(os.path.join(service_root_dir, 'wadl'))
+
     @classmethod
     def login(cls, consumer_name, token_string, access_secret,
               service_root=uris.STAGING_SERVICE_ROOT,
@@ -311,7 +960,7 @@ class Launchpad(ServiceRoot):
     def _authorize_token_and_login(
         cls, consumer_name, service_root, cache, timeout, proxy_info,
         authorization_engine, allow_access_levels, credential_store,
-        credential_save_failed, version):
+        credential_save_failed, version, wadl_cache=None, lazy=False):
         """Authorize a request token. Log in with the resulting access token.
 
         This is the private, non-deprecated implementation of the
@@ -366,21 +1015,31 @@ class Launchpad(ServiceRoot):
                 authorization_engine.application_name)
 
         return cls(credentials, authorization_engine, credential_store,
-                   service_root, cache, timeout, proxy_info, version)
+                   service_root, cache, timeout, proxy_info, version,
+                   wadl_cache=wadl_cache, lazy=lazy)
 
     @classmethod
     def login_anonymously(
         cls, consumer_name, service_root=uris.STAGING_SERVICE_ROOT,
         launchpadlib_dir=None, timeout=None, proxy_info=proxy_info_from_environment,
-        version=DEFAULT_VERSION):
-        """Get access to Launchpad without providing any credentials."""
+        version=DEFAULT_VERSION, lazy=False, cache=None):
+        """Get access to Launchpad without providing any credentials.
+
+        :param lazy: If True, don't contact Launchpad until the new
+            object is used. See `Launchpad.__init__`.
+        :param cache: The kind of HTTP cache to use. See `login_with`.
+        """
         (service_root, launchpadlib_dir, cache_path,
-         service_root_dir) = cls._get_paths(service_root, launchpadlib_dir)
+         service_root_dir) = cls._get_paths(
+             service_root, launchpadlib_dir, cache)
         token = AnonymousAccessToken()
         credentials = Credentials(consumer_name, access_token=token)
         return cls(credentials, None, None, service_root=service_root,
-                   cache=cache_path, timeout=timeout, proxy_info=proxy_info,
-                   version=version)
+                   cache=cls._make_cache(cache, cache_path),
+                   timeout=timeout, proxy_info=proxy_info,
+                   version=version,
+                   wadl_cache=cls.wadl_cache_factory(service_root_dir),
+                   lazy=lazy)
 
     @classmethod
     def login_with(cls, application_name=None,
@@ -389,7 +1048,8 @@ class Launchpad(ServiceRoot):
                    authorization_engine=None, allow_access_levels=None,
                    max_failed_attempts=None, credentials_file=None,
                    version=DEFAULT_VERSION, consumer_name=None,
-                   credential_save_failed=None, credential_store=None):
+                   credential_save_failed=None, credential_store=None,
+                   lazy=False, cache=None):
         """Log in to Launchpad, possibly acquiring and storing credentials.
 
         Use this method to get a `Launchpad` object. If the end-user
@@ -482,12 +1142,24 @@ class Launchpad(ServiceRoot):
             provided, then tokens are stored unencrypted in that file.
         :type credential_store: `CredentialStore`
 
+        :param lazy: If True, the web service root isn't fetched until
+            the new object is used, and may not be fetched at all if
+            only `bugs`, `people` or `projects` is used. Credentials
+            are still loaded (or acquired) straight away.
+        :type lazy: bool
+
+        :param cache: The kind of HTTP cache to use: 'file' (the
+            default) to keep each representation in a file of its own
+            in the cache directory, 'sqlite' to keep them all in a
+            single `SQLiteCache` database, or an httplib2 cache object.
+
         :return: A web service root authorized as the end-user.
         :rtype: `Launchpad`
 
         """
         (service_root, launchpadlib_dir, cache_path,
-         service_root_dir) = cls._get_paths(service_root, launchpadlib_dir)
+         service_root_dir) = cls._get_paths(
+             service_root, launchpadlib_dir, cache)
 
         if (application_name is None and consumer_name is None and
             authorization_engine is None):
@@ -544,9 +1216,10 @@ class Launchpad(ServiceRoot):
 
         return cls._authorize_token_and_login(
             authorization_engine.consumer, service_root,
-            cache_path, timeout, proxy_info, authorization_engine,
-            allow_access_levels, credential_store,
-            credential_save_failed, version)
+            cls._make_cache(cache, cache_path), timeout, proxy_info,
+            authorization_engine, allow_access_levels, credential_store,
+            credential_save_failed, version,
+            cls.wadl_cache_factory(service_root_dir), lazy)
 
     @classmethod
     def _warn_of_deprecated_login_method(cls, name):
@@ -581,7 +1254,21 @@ class Launchpad(ServiceRoot):
 
 
     @classmethod
-    def _get_paths(cls, service_root, launchpadlib_dir=None):
+    def _make_cache(cls, cache, cache_path):
+        """Open the HTTP cache that `_get_paths` found a place for.
+
+        :param cache: The kind of HTTP cache wanted, as passed to
+            `_get_paths`.
+        :param cache_path: The cache that `_get_paths` returned.
+        :return: A cache directory or cache object, for `__init__`.
+        """
+        if cache == 'sqlite':
+            from launchpadlib.sqlitecache import SQLiteCache
+            return SQLiteCache(cache_path)
+        return cache_path
+
+    @classmethod
+    def _get_paths(cls, service_root, launchpadlib_dir=None, cache=None):
         """Locate launchpadlib-related user paths and ensure they exist.
 
         This is a helper function used by login_with() and
@@ -595,9 +1282,14 @@ class Launchpad(ServiceRoot):
             directory, if known. This may be modified, expanded, or
             determined from the environment if missing. A definitive
             value will be returned.
+        :param cache: The kind of HTTP cache wanted: 'file' or None for
+            a cache directory, 'sqlite' for a `SQLiteCache`, or a cache
+            object, which is returned as is.
 
         :return: A 4-tuple:
-            (service_root_uri, launchpadlib_dir, cache_dir, service_root_dir)
+            (service_root_uri, launchpadlib_dir, cache, service_root_dir),
+            where cache is the cache directory, the path to the
+            `SQLiteCache` database, or a cache object. See `_make_cache`.
         """
         if launchpadlib_dir is None:
             launchpadlib_dir = os.path.join('~', '.launchpadlib')
@@ -616,10 +1308,20 @@ class Launchpad(ServiceRoot):
         # Each service root has its own cache and credential dirs.
         scheme, host_name, path, query, fragment = urlsplit(service_root)
         service_root_dir = os.path.join(launchpadlib_dir, host_name)
-        cache_path = os.path.join(service_root_dir, 'cache')
-        try:
-            os.makedirs(cache_path, 0o700)
-        except OSError as err:
-            if err.errno != errno.EEXIST:
-                raise
-        return (service_root, launchpadlib_dir, cache_path, service_root_dir)
+        if cache is None or cache == 'file':
+            cache = os.path.join(service_root_dir, 'cache')
+            try:
+                os.makedirs(cache, 0o700)
+            except OSError as err:
+                if err.errno != errno.EEXIST:
+                    raise
+        elif cache == 'sqlite':
+            try:
+                os.makedirs(service_root_dir, 0o700)
+            except OSError as err:
+                if err.errno != errno.EEXIST:
+                    raise
+            cache = os.path.join(service_root_dir, 'cache.sqlite')
+        elif isinstance(cache, basestring):
+            raise ValueError("Unknown kind of cache: %s" % cache)
+        return (service_root, launchpadlib_dir, cache, service_root_dir)
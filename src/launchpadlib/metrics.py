@@ -0,0 +1,319 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Find out what HTTP requests launchpadlib makes, and how long they take.
+
+    >>> metrics = RequestMetrics()
+    >>> launchpad.request_metrics = metrics
+    >>> for task in launchpad.projects['firefox'].searchTasks():
+    ...     pass
+    >>> print(metrics.summary())
+
+Every request is recorded as a `RequestRecord`, which is passed to
+any listeners and then added to running totals. The totals are broken
+down by method, URL template, resource type, status and cache outcome,
+and can be printed as a table or exported in the Prometheus text
+format.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'RequestMetrics',
+    'RequestRecord',
+    'resource_type_of',
+    'url_template',
+    ]
+
+import re
+import threading
+
+try:
+    from urllib.parse import parse_qsl, urlsplit
+except ImportError:
+    from urlparse import parse_qsl, urlsplit
+
+
+# The ways a request can be answered.
+CACHE_MISS = 'miss'
+CACHE_REVALIDATED = 'revalidated'
+CACHE_HIT = 'hit'
+# Answered without the network or the HTTP cache: by read-ahead, the
+# WADL cache, the entry cache or a lazy service root.
+CACHE_LOCAL = 'local'
+
+RESOURCE_TYPE_RE = re.compile(br'"resource_type_link": *"[^"#]*#([^"]+)"')
+
+# URL segments that are the same for every user of the web service:
+# top-level collections, and the names of collections and files that
+# belong to an entry. Launchpad names can't contain underscores, so
+# segments that do are always kept as well.
+FIXED_SEGMENTS = frozenset([
+    'activity', 'admins', 'architectures', 'archives', 'attachments',
+    'branches', 'bugs', 'bugtrackers', 'builders', 'builds', 'classes',
+    'components', 'countries', 'cves', 'data', 'dependencies',
+    'derivatives', 'devices', 'distros', 'drivers', 'duplicates', 'files',
+    'languages', 'members', 'messages', 'package-sets', 'packagesets',
+    'participants', 'people', 'ppas', 'processors', 'projectgroups',
+    'projects', 'questions', 'recipes', 'releases', 'series', 'sshkeys',
+    'subscribers', 'subscriptions', 'temporary-blobs', 'votes', 'watches',
+    ])
+
+
+def url_template(url):
+    """Turn a URL into a template that many similar URLs share.
+
+    The host and most of the query string are dropped, bug IDs and
+    other numbers become '{id}', people's names become '~{name}', and
+    project and distribution names become '{pillar}'. The names below
+    them, of series, milestones, source packages, archives and so on,
+    become '{name}'. Markers like '+source' and the names of
+    collections are kept, as is a named operation's name, so the
+    number of templates doesn't grow with the number of projects or
+    packages a script looks at.
+
+        >>> url_template('https://api.launchpad.net/1.0/bugs/1?ws.size=5')
+        '/1.0/bugs/{id}'
+        >>> url_template('https://api.launchpad.net/1.0/~salgado')
+        '/1.0/~{name}'
+        >>> url_template('https://api.launchpad.net/1.0/ubuntu/+source/vim')
+        '/1.0/{pillar}/+source/{name}'
+    """
+    scheme, netloc, path, query, fragment = urlsplit(str(url))
+    # The first segment is empty and the second is the version.
+    segments = path.split('/')
+    for index in range(2, len(segments)):
+        segment = segments[index]
+        if segment.isdigit():
+            segments[index] = '{id}'
+        elif segment.startswith('~'):
+            segments[index] = '~{name}'
+        elif (segment == '' or segment.startswith('+') or '_' in segment
+              or segment in FIXED_SEGMENTS):
+            pass
+        elif index == 2:
+            segments[index] = '{pillar}'
+        else:
+            segments[index] = '{name}'
+    template = '/'.join(segments)
+    operation = dict(parse_qsl(query)).get('ws.op')
+    if operation is not None:
+        template += '?ws.op=' + operation
+    return template
+
+
+def resource_type_of(response, content):
+    """Find the resource type of a JSON document, without parsing it.
+
+    :return: The resource type, such as 'bug' or 'bug_task-page-resource',
+        or None.
+    """
+    if not isinstance(content, bytes):
+        return None
+    if not response.get('content-type', '').startswith('application/json'):
+        return None
+    types = RESOURCE_TYPE_RE.findall(content)
+    if not types:
+        return None
+    # A page of a collection contains its entries as well, but the
+    # page's type is the interesting one.
+    for resource_type in types:
+        if resource_type.endswith(b'-page-resource'):
+            return resource_type.decode('utf-8')
+    return types[0].decode('utf-8')
+
+
+class RequestRecord:
+    """What happened when launchpadlib made one HTTP request.
+
+    :ivar method: The HTTP method.
+    :ivar url: The URL requested.
+    :ivar status: The response's status code.
+    :ivar latency: How long it took to get the response, in seconds.
+    :ivar request_bytes: The size of the request body.
+    :ivar response_bytes: The size of the response body.
+    :ivar cache: 'miss' if the response came from the server, 'hit' if
+        it came from the HTTP cache, 'revalidated' if the server said
+        the cached copy was still good, or 'local' if launchpadlib
+        answered without the network or the HTTP cache.
+    :ivar resource_type: The type of resource served, if known.
+    :ivar oauth_retry: True if the server rejected the OAuth token,
+        causing the request to be made again with a new token.
+    :ivar retry: True if the request failed in a way that's worth
+        retrying, and is going to be made again.
+    """
+
+    def __init__(self, method, url, status, latency, request_bytes=0,
+                 response_bytes=0, cache=CACHE_MISS, resource_type=None,
+                 oauth_retry=False, retry=False):
+        self.method = method
+        self.url = url
+        self.status = status
+        self.latency = latency
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        self.cache = cache
+        self.resource_type = resource_type
+        self.oauth_retry = oauth_retry
+        self.retry = retry
+
+    def __repr__(self):
+        return '<RequestRecord %s %s: %s in %.3fs (%s)>' % (
+            self.method, self.url, self.status, self.latency, self.cache)
+
+
+class _Totals:
+    """Running totals for requests that share the same labels."""
+
+    def __init__(self):
+        self.count = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.oauth_retries = 0
+        self.retries = 0
+
+    def add(self, record):
+        self.count += 1
+        self.latency += record.latency
+        self.max_latency = max(self.max_latency, record.latency)
+        self.request_bytes += record.request_bytes
+        self.response_bytes += record.response_bytes
+        if record.oauth_retry:
+            self.oauth_retries += 1
+        if record.retry:
+            self.retries += 1
+
+
+def _escape_label(value):
+    """Escape a Prometheus label value."""
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+class RequestMetrics:
+    """Collect a `RequestRecord` for every request a Launchpad object makes.
+
+    Assign an instance to a `Launchpad` object's `request_metrics`
+    attribute (or return one from `Launchpad.request_metrics_factory`)
+    to start collecting. Recording is thread-safe.
+
+    :ivar listeners: Callables that are passed each `RequestRecord`
+        as it's recorded.
+    """
+
+    LABELS = ('method', 'template', 'resource_type', 'status', 'cache')
+
+    def __init__(self, url_template=url_template):
+        """Constructor.
+
+        :param url_template: A callable that turns a URL into the
+            template it's counted under.
+        """
+        self.url_template = url_template
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def add_listener(self, listener):
+        """Call `listener` with each `RequestRecord` from now on."""
+        self.listeners.append(listener)
+
+    def record(self, record):
+        """Record a request."""
+        for listener in list(self.listeners):
+            listener(record)
+        key = (record.method, self.url_template(record.url),
+               record.resource_type or '', record.status, record.cache)
+        with self._lock:
+            totals = self._totals.get(key)
+            if totals is None:
+                totals = self._totals[key] = _Totals()
+            totals.add(record)
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._totals.clear()
+
+    def stats(self):
+        """The totals so far, slowest first.
+
+        :return: A list of dicts, one for each combination of method,
+            URL template, resource type, status and cache outcome.
+        """
+        with self._lock:
+            items = [(key, vars(totals).copy())
+                     for key, totals in self._totals.items()]
+        stats = []
+        for key, totals in items:
+            row = dict(zip(self.LABELS, key))
+            row.update(totals)
+            stats.append(row)
+        stats.sort(key=lambda row: row['latency'], reverse=True)
+        return stats
+
+    def summary(self):
+        """A table of the totals so far, slowest first."""
+        headings = ('Method', 'URL', 'Type', 'Status', 'Cache', 'Count',
+                    'Total (s)', 'Mean (ms)', 'Max (ms)', 'Sent', 'Received',
+                    'OAuth retries', 'Retries')
+        rows = [headings]
+        for row in self.stats():
+            rows.append((
+                row['method'], row['template'], row['resource_type'],
+                str(row['status']), row['cache'], str(row['count']),
+                '%.3f' % row['latency'],
+                '%.1f' % (1000 * row['latency'] / row['count']),
+                '%.1f' % (1000 * row['max_latency']),
+                str(row['request_bytes']), str(row['response_bytes']),
+                str(row['oauth_retries']), str(row['retries'])))
+        widths = [max(len(row[column]) for row in rows)
+                  for column in range(len(headings))]
+        return '\n'.join(
+            '  '.join(cell.ljust(width)
+                      for cell, width in zip(row, widths)).rstrip()
+            for row in rows)
+
+    def prometheus(self, prefix='launchpadlib'):
+        """The totals so far, in the Prometheus text exposition format."""
+        metrics = (
+            ('requests_total', 'counter',
+             'HTTP requests made.', 'count'),
+            ('request_duration_seconds_sum', 'counter',
+             'Time spent waiting for HTTP responses.', 'latency'),
+            ('request_bytes_total', 'counter',
+             'Bytes of request bodies sent.', 'request_bytes'),
+            ('response_bytes_total', 'counter',
+             'Bytes of response bodies received.', 'response_bytes'),
+            ('oauth_retries_total', 'counter',
+             'Requests retried after the OAuth token was rejected.',
+             'oauth_retries'),
+            ('retries_total', 'counter',
+             'Requests retried after a temporary failure.', 'retries'),
+            )
+        stats = self.stats()
+        lines = []
+        for name, metric_type, help_text, field in metrics:
+            name = '%s_%s' % (prefix, name)
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s %s' % (name, metric_type))
+            for row in stats:
+                labels = ','.join(
+                    '%s="%s"' % (label, _escape_label(row[label]))
+                    for label in self.LABELS)
+                lines.append('%s{%s} %s' % (name, labels, row[field]))
+        return '\n'.join(lines) + '\n'
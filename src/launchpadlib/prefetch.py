@@ -0,0 +1,309 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Read-ahead for paged collections.
+
+When a client iterates over a collection, lazr.restfulclient gets one
+page, yields its entries, and only then asks for the next page. A
+`PagePrefetcher` notices when a client follows a collection's
+'next_collection_link' and starts fetching the following pages in the
+background, so that by the time the client wants them they're already
+here.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'PagePrefetcher',
+    ]
+
+import atexit
+from collections import OrderedDict
+from concurrent.futures import Future
+import re
+import threading
+import time
+import weakref
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+
+NEXT_LINK_RE = re.compile(br'"next_collection_link": *("(?:[^"\\]|\\.)*")')
+START_RE = re.compile(r'[?&]ws\.start=(\d+)')
+
+# Every PagePrefetcher, so they can all be closed at exit.
+_prefetchers = weakref.WeakSet()
+
+# How long, in seconds, a process waits at exit for pages that are
+# still being fetched.
+EXIT_TIMEOUT = 2
+
+
+def _close_prefetchers():
+    """Stop reading ahead, and give fetches in flight a moment to end.
+
+    Pages nobody has asked for yet are never fetched, so a script that
+    stopped iterating early isn't held up at exit.
+    """
+    give_up = time.time() + EXIT_TIMEOUT
+    threads = []
+    for prefetcher in list(_prefetchers):
+        threads.extend(prefetcher.close())
+    for thread in threads:
+        thread.join(max(0, give_up - time.time()))
+
+
+atexit.register(_close_prefetchers)
+
+
+def next_collection_link(response, content):
+    """Find the link to the next page of a collection, if any.
+
+    :return: The URL of the next page, or None if this isn't a page of
+        a collection or it's the last page.
+    """
+    if response.status != 200 or not isinstance(content, bytes):
+        return None
+    if not response.get('content-type', '').startswith('application/json'):
+        return None
+    # Parsing the whole page here would double the cost of iterating
+    # over a collection, so just look for the link.
+    match = NEXT_LINK_RE.search(content)
+    if match is None:
+        return None
+    return json.loads(match.group(1).decode('utf-8'))
+
+
+def is_page_link(url):
+    """Does this URL look like a link to a page after the first?"""
+    match = START_RE.search(url)
+    return match is not None and int(match.group(1)) > 0
+
+
+class _Workers:
+    """Fetch pages in daemon threads.
+
+    A ThreadPoolExecutor's threads can't be daemon threads, so the
+    process would wait at exit for every page it had asked for.
+    """
+
+    def __init__(self, count):
+        self.count = count
+        self.threads = []
+        self._queue = queue.Queue()
+
+    def submit(self, function, *args):
+        """Call a function in a worker thread.
+
+        :return: A `concurrent.futures.Future` for its result.
+        """
+        future = Future()
+        self._queue.put((future, function, args))
+        if len(self.threads) < self.count:
+            thread = threading.Thread(
+                target=self._work, name='PagePrefetcher')
+            thread.daemon = True
+            self.threads.append(thread)
+            thread.start()
+        return future
+
+    def _work(self):
+        while True:
+            work = self._queue.get()
+            if work is None:
+                return
+            future, function, args = work
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = function(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self):
+        """Cancel the calls that haven't started, and stop the threads.
+
+        :return: The threads, which may still be finishing a call.
+        """
+        while True:
+            try:
+                work = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if work is not None:
+                work[0].cancel()
+        for thread in self.threads:
+            self._queue.put(None)
+        return self.threads
+
+
+class _Prefetch:
+    """A page being fetched in the background."""
+
+    def __init__(self, future, read_ahead):
+        self.future = future
+        # How many more pages to fetch after this one.
+        self.read_ahead = read_ahead
+
+
+class PagePrefetcher:
+    """Fetch the next pages of a collection before they're asked for.
+
+    Read-ahead only starts once a client asks for a second page of a
+    collection, so looking at the first few entries of a big
+    collection doesn't cost any extra requests.
+
+    The pages are fetched in daemon threads. When the process exits,
+    pages that haven't been started are forgotten, and the ones being
+    fetched get a couple of seconds to arrive.
+    """
+
+    DEFAULT_DEPTH = 2
+
+    def __init__(self, depth=DEFAULT_DEPTH, max_pending=None):
+        """Constructor.
+
+        :param depth: How many pages to stay ahead of the client.
+        :param max_pending: How many prefetched pages to hold on to.
+            Pages that nobody asked for (because a client stopped
+            iterating) are thrown away, oldest first, once there are
+            more than this. Defaults to four times `depth`.
+        """
+        if depth < 1:
+            raise ValueError("depth must be at least 1.")
+        self.depth = depth
+        if max_pending is None:
+            max_pending = 4 * depth
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()
+        # Pages that were recently handed over, so a late callback
+        # doesn't fetch them again.
+        self._taken = OrderedDict()
+        self._workers = None
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        _prefetchers.add(self)
+
+    def _key(self, url, headers):
+        accept = dict(
+            (key.lower(), value)
+            for key, value in (headers or {}).items()).get('accept')
+        return (str(url), accept)
+
+    def take(self, url, headers):
+        """Claim a page that was fetched in the background.
+
+        :return: A `concurrent.futures.Future` for a (response,
+            content) tuple, or None if the page wasn't prefetched.
+        """
+        if not is_page_link(str(url)):
+            return None
+        key = self._key(url, headers)
+        with self._lock:
+            prefetch = self._pending.pop(key, None)
+            if prefetch is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._taken[key] = True
+            while len(self._taken) > self.max_pending:
+                self._taken.popitem(last=False)
+            return prefetch.future
+
+    def page_delivered(self, request, url, headers, response, content):
+        """Note that a client received a page of a collection.
+
+        If the client got here by following a 'next_collection_link',
+        start fetching the pages after this one.
+
+        :param request: A callable that makes a GET request, given a
+            URL and headers, and returns a (response, content) tuple.
+        """
+        if not is_page_link(str(url)):
+            return
+        next_link = next_collection_link(response, content)
+        if next_link is not None:
+            with self._lock:
+                # The client may be going over the collection again.
+                self._taken.pop(self._key(next_link, headers), None)
+            self._schedule(request, next_link, headers, self.depth)
+
+    def _schedule(self, request, url, headers, read_ahead):
+        key = self._key(url, headers)
+        with self._lock:
+            if self._closed or key in self._taken:
+                return
+            prefetch = self._pending.get(key)
+            if prefetch is None:
+                if self._workers is None:
+                    self._workers = _Workers(self.depth)
+                prefetch = _Prefetch(
+                    self._workers.submit(request, url, headers), read_ahead)
+                self._pending[key] = prefetch
+                while len(self._pending) > self.max_pending:
+                    self._pending.popitem(last=False)
+                new = True
+            elif prefetch.read_ahead < read_ahead:
+                # The client caught up with an earlier prefetch, so
+                # read further ahead from here.
+                prefetch.read_ahead = read_ahead
+                new = False
+            else:
+                return
+        if new:
+            prefetch.future.add_done_callback(
+                lambda future: self._fetched(request, headers, prefetch))
+        elif prefetch.future.done():
+            # Otherwise the callback will see the new read-ahead.
+            self._fetched(request, headers, prefetch)
+
+    def _fetched(self, request, headers, prefetch):
+        """A page arrived. Fetch the one after it, if that's wanted."""
+        if prefetch.read_ahead <= 1 or prefetch.future.exception():
+            return
+        response, content = prefetch.future.result()
+        next_link = next_collection_link(response, content)
+        if next_link is not None:
+            self._schedule(
+                request, next_link, headers, prefetch.read_ahead - 1)
+
+    def close(self):
+        """Throw away any prefetched pages and stop the worker threads.
+
+        Pages that haven't started being fetched never will be, and
+        no more pages are read ahead.
+
+        :return: The worker threads, which may still be fetching a page.
+        """
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+            self._taken.clear()
+            workers, self._workers = self._workers, None
+        if workers is None:
+            return []
+        return workers.shutdown()
@@ -0,0 +1,64 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""HTTP caches that many threads can use at once.
+
+lazr.restfulclient tells its cache which media type is about to be
+requested by setting the cache's request_media_type attribute, and the
+cache uses it to pick the key for the representation. When several
+threads share a cache, one thread's request could be stored under
+another thread's media type. These caches keep the media type for
+each thread separately.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'PerThreadMediaTypeMixin',
+    'ThreadSafeRepresentationCache',
+    ]
+
+import threading
+
+from lazr.restfulclient._browser import MultipleRepresentationCache
+
+
+class PerThreadMediaTypeMixin:
+    """Keep a cache's request_media_type separately for each thread."""
+
+    def _media_types(self):
+        # dict.setdefault is atomic, so only one threading.local is
+        # ever used.
+        return self.__dict__.setdefault(
+            '_request_media_types', threading.local())
+
+    @property
+    def request_media_type(self):
+        return getattr(self._media_types(), 'value', None)
+
+    @request_media_type.setter
+    def request_media_type(self, value):
+        self._media_types().value = value
+
+
+class ThreadSafeRepresentationCache(
+    PerThreadMediaTypeMixin, MultipleRepresentationCache):
+    """A `MultipleRepresentationCache` that threads can share.
+
+    Each thread has its own `request_media_type`. Writing entries
+    atomically is inherited from lazr.restfulclient's `AtomicFileCache`,
+    which writes them to a temporary file and renames it into place, so
+    readers never see half-written entries.
+    """
@@ -0,0 +1,144 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Decide when to retry requests that failed for passing reasons.
+
+Launchpad sometimes answers with 502, 503 or 504 while it's being
+updated or is overloaded, and with 429 when a client is making too
+many requests. Such requests are worth making again after a while.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'RetryPolicy',
+    ]
+
+from email.utils import (
+    mktime_tz,
+    parsedate_tz,
+    )
+import logging
+import random
+import threading
+import time
+
+
+log = logging.getLogger('launchpadlib')
+
+
+def retry_after(response):
+    """How long a response asks the client to wait, in seconds, or None.
+
+    The Retry-After header holds either a number of seconds or a date.
+    """
+    value = response.get('retry-after')
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0.0, mktime_tz(date) - time.time())
+
+
+class RetryPolicy:
+    """When to retry a request, and how long to wait first.
+
+    Requests are retried after waiting for a random time of up to
+    `base_delay` * 2 ** attempt seconds ("full jitter"), so that many
+    clients that failed at once don't all try again at once. If the
+    server says how long to wait, with a Retry-After header, that's
+    how long is waited.
+
+    Requests with methods that aren't idempotent, like POST, are only
+    retried on a 429 response, which means the server refused to
+    process them; after a 5xx response they may have had an effect.
+
+    Every retry is logged to the 'launchpadlib' logger, and counted in
+    the Launchpad object's `RequestMetrics`, if it has one.
+
+    :ivar retries: How many requests have been retried.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+    def __init__(self, max_retries=5, base_delay=1.0, max_delay=60.0,
+                 budget=100, retry_statuses=RETRY_STATUSES,
+                 idempotent_methods=IDEMPOTENT_METHODS, sleep=time.sleep):
+        """Constructor.
+
+        :param max_retries: How many times to retry one request.
+        :param base_delay: The longest wait, in seconds, before the
+            first retry. It doubles for each retry after that.
+        :param max_delay: The longest wait, in seconds, before any
+            retry, even if the server asks for a longer one.
+        :param budget: How many retries to make in all. Once this
+            many requests have been retried, failures are passed on
+            straight away, so that a server that's down for good
+            doesn't keep a program waiting forever. None means there's
+            no limit.
+        :param retry_statuses: The response codes that are worth
+            retrying.
+        :param idempotent_methods: The HTTP methods that are safe to
+            retry after any of the `retry_statuses`.
+        :param sleep: A function that waits for a number of seconds.
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.retry_statuses = retry_statuses
+        self.idempotent_methods = idempotent_methods
+        self.sleep = sleep
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def should_retry(self, method, response, attempt):
+        """Decide whether to retry a request, using up the budget if so.
+
+        :param attempt: How many times the request has been retried.
+        """
+        if response.status not in self.retry_statuses:
+            return False
+        if attempt >= self.max_retries:
+            return False
+        if (method.upper() not in self.idempotent_methods
+            and response.status != 429):
+            return False
+        with self._lock:
+            if self.budget is not None and self.retries >= self.budget:
+                return False
+            self.retries += 1
+        return True
+
+    def delay(self, response, attempt):
+        """How long to wait before retrying, in seconds."""
+        delay = retry_after(response)
+        if delay is None:
+            delay = random.uniform(0, self.base_delay * 2 ** attempt)
+        return min(delay, self.max_delay)
+
+    def wait(self, method, url, response, attempt):
+        """Wait before retrying a request."""
+        delay = self.delay(response, attempt)
+        log.warning(
+            "%s %s failed with %s; retrying in %.1fs (retry %d of %d).",
+            method, url, response.status, delay, attempt + 1,
+            self.max_retries)
+        self.sleep(delay)
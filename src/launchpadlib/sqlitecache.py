@@ -0,0 +1,191 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""An HTTP cache kept in a single SQLite database.
+
+The default cache keeps each representation in a file of its own,
+which is slow on network filesystems and wasteful when lots of
+processes share a cache. `SQLiteCache` keeps them all in one database
+in write-ahead-log mode, so that any number of processes can read it
+while one writes.
+
+    >>> launchpad = Launchpad.login_with('my app', 'production',
+    ...                                  cache='sqlite')
+"""
+
+__metaclass__ = type
+__all__ = [
+    'SQLiteCache',
+    ]
+
+import os
+import sqlite3
+import threading
+import time
+
+from lazr.restfulclient._browser import MultipleRepresentationCache
+
+from launchpadlib.representationcache import PerThreadMediaTypeMixin
+
+
+class SQLiteCache(PerThreadMediaTypeMixin, MultipleRepresentationCache):
+    """An httplib2 cache kept in a SQLite database.
+
+    Like `MultipleRepresentationCache`, this keeps each media type's
+    representation of a resource separately. It can be shared between
+    threads and processes.
+    """
+
+    # Don't record every time an entry is read, only when it's first
+    # read in this long, to save a write per lookup.
+    ACCESS_GRANULARITY = 3600
+
+    def __init__(self, path, timeout=30):
+        """Constructor.
+
+        :param path: The database file. It's created if necessary.
+        :param timeout: How long, in seconds, to wait for another
+            process to finish writing.
+        """
+        # MultipleRepresentationCache's constructor would create a
+        # cache directory, which isn't needed.
+        self.path = path
+        self.timeout = timeout
+        self.request_media_type = None
+        self._local = threading.local()
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+            """)
+
+    def _connection(self):
+        """This thread's connection to the database.
+
+        SQLite connections can't be shared between threads, or
+        inherited by child processes.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _key(self, key):
+        if self.request_media_type is not None:
+            key = key + "-" + self.request_media_type
+        return key
+
+    def _get_key_path(self, key):
+        """Entries aren't kept in files, but they have distinct names."""
+        return self._key(key)
+
+    def get(self, key):
+        """Get the value of `key`, or None if it isn't cached."""
+        key = self._key(key)
+        connection = self._connection()
+        row = connection.execute(
+            'SELECT value, accessed FROM cache WHERE key = ?',
+            (key,)).fetchone()
+        if row is None:
+            return None
+        value, accessed = row
+        now = time.time()
+        if now - accessed > self.ACCESS_GRANULARITY:
+            connection.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', (now, key))
+        return bytes(value)
+
+    def set(self, key, value):
+        """Set `key` to `value`, which must be bytes."""
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache (key, value, size, accessed) '
+            'VALUES (?, ?, ?, ?)',
+            (self._key(key), sqlite3.Binary(value), len(value), time.time()))
+
+    def delete(self, key):
+        """Remove `key` from the cache, if it's there."""
+        self._connection().execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key),))
+
+    def usage(self):
+        """The cache's current size.
+
+        :return: A 2-tuple (entries, bytes).
+        """
+        count, total = self._connection().execute(
+            'SELECT COUNT(*), SUM(size) FROM cache').fetchone()
+        return count, total or 0
+
+    def vacuum(self, max_age=None, max_entries=None, max_bytes=None,
+               compact=False):
+        """Remove entries in bulk.
+
+        Entries not read within `max_age` seconds are removed, then the
+        least recently read entries until the cache is within
+        `max_entries` and `max_bytes`.
+
+        :param compact: If True, also give the space freed back to the
+            operating system. This rewrites the whole database.
+        :return: The number of entries removed.
+        """
+        connection = self._connection()
+        removed = 0
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if max_age is not None:
+                removed += connection.execute(
+                    'DELETE FROM cache WHERE accessed < ?',
+                    (time.time() - max_age,)).rowcount
+            if max_entries is not None:
+                removed += connection.execute(
+                    'DELETE FROM cache WHERE key IN ('
+                    ' SELECT key FROM cache ORDER BY accessed DESC'
+                    ' LIMIT -1 OFFSET ?)', (max_entries,)).rowcount
+            if max_bytes is not None:
+                # Keep the most recently read entries that fit.
+                keep = 0
+                doomed = []
+                for key, size in connection.execute(
+                    'SELECT key, size FROM cache ORDER BY accessed DESC'):
+                    keep += size
+                    if keep > max_bytes:
+                        doomed.append((key,))
+                connection.executemany(
+                    'DELETE FROM cache WHERE key = ?', doomed)
+                removed += len(doomed)
+            connection.execute('COMMIT')
+        except:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        if compact:
+            connection.execute('VACUUM')
+        return removed
+
+    def close(self):
+        """Close this thread's connection to the database."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
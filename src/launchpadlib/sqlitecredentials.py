@@ -0,0 +1,176 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Credentials for many consumers, kept in a single SQLite database.
+
+`UnencryptedFileCredentialStore` holds one set of credentials, and the
+keyring isn't meant for thousands of them. A service that acts for
+many users can keep all their credentials in one database instead:
+
+    >>> store = SQLiteCredentialStore('/srv/tokens/credentials.sqlite')
+    >>> launchpad = Launchpad.login_with(
+    ...     'my service', 'production', credential_store=store)
+
+The database is in write-ahead-log mode, so any number of threads and
+processes can read it while one writes. Each save is atomic. The file
+is created readable only by its owner, but the credentials in it
+aren't encrypted.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'SQLiteCredentialStore',
+    ]
+
+import os
+import sqlite3
+import stat
+import threading
+import time
+
+from launchpadlib.credentials import (
+    CredentialStore,
+    Credentials,
+    )
+
+
+class SQLiteCredentialStore(CredentialStore):
+    """A credential store holding any number of credentials.
+
+    Credentials are looked up by their unique key, which is the
+    table's primary key.
+    """
+
+    def __init__(self, path, credential_save_failed=None, timeout=30):
+        """Constructor.
+
+        :param path: The database file. It's created if necessary.
+        :param timeout: How long, in seconds, to wait for another
+            process to finish writing.
+        """
+        super(SQLiteCredentialStore, self).__init__(credential_save_failed)
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        # Create the file before SQLite does, so that nobody else can
+        # read it. SQLite gives its journal files the same permissions.
+        os.close(os.open(
+            path, os.O_CREAT | os.O_WRONLY, stat.S_IREAD | stat.S_IWRITE))
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS credentials (
+                unique_key TEXT PRIMARY KEY,
+                credentials BLOB NOT NULL,
+                saved REAL NOT NULL);
+            """)
+
+    def _connection(self):
+        """This thread's connection to the database.
+
+        SQLite connections can't be shared between threads, or
+        inherited by child processes.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _parse(credential_string):
+        try:
+            return Credentials.from_string(bytes(credential_string))
+        except:
+            # As with the keyring, corrupt credentials just mean the
+            # consumer has to be authorized again.
+            return None
+
+    def do_save(self, credentials, unique_key):
+        """Store newly-authorized credentials in the database."""
+        self._connection().execute(
+            'INSERT OR REPLACE INTO credentials '
+            '(unique_key, credentials, saved) VALUES (?, ?, ?)',
+            (unique_key, sqlite3.Binary(credentials.serialize()),
+             time.time()))
+
+    def do_load(self, unique_key):
+        """Retrieve credentials from the database."""
+        row = self._connection().execute(
+            'SELECT credentials FROM credentials WHERE unique_key = ?',
+            (unique_key,)).fetchone()
+        if row is None:
+            return None
+        return self._parse(row[0])
+
+    def delete(self, unique_key):
+        """Forget the credentials for `unique_key`, if there are any."""
+        self._connection().execute(
+            'DELETE FROM credentials WHERE unique_key = ?', (unique_key,))
+
+    def __len__(self):
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM credentials').fetchone()[0]
+
+    def import_credentials(self, credentials):
+        """Save many credentials at once, in a single transaction.
+
+        :param credentials: An iterable of (unique key, `Credentials`)
+            pairs, such as a dict's items() or what
+            `export_credentials` returns. Credentials already stored
+            under the same keys are replaced.
+        :return: The number of credentials saved.
+        """
+        now = time.time()
+        rows = [
+            (unique_key, sqlite3.Binary(value.serialize()), now)
+            for unique_key, value in credentials]
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT OR REPLACE INTO credentials '
+                '(unique_key, credentials, saved) VALUES (?, ?, ?)', rows)
+            connection.execute('COMMIT')
+        except:
+            connection.execute('ROLLBACK')
+            raise
+        return len(rows)
+
+    def export_credentials(self):
+        """Get every set of credentials in the store.
+
+        Credentials that can't be parsed are left out.
+
+        :return: An iterator of (unique key, `Credentials`) pairs,
+            ordered by key.
+        """
+        rows = self._connection().execute(
+            'SELECT unique_key, credentials FROM credentials '
+            'ORDER BY unique_key').fetchall()
+        for unique_key, credential_string in rows:
+            credentials = self._parse(credential_string)
+            if credentials is not None:
+                yield unique_key, credentials
+
+    def close(self):
+        """Close this thread's connection to the database."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
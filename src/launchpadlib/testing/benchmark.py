@@ -0,0 +1,331 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmarks for the things launchpadlib spends its time on.
+
+Each benchmark runs a Launchpad object against a `WebServiceServer`
+on a local port, so the results measure launchpadlib rather than the
+network. Run them all, and save the results as JSON:
+
+    $ python -m launchpadlib.testing.benchmark -o before.json
+
+Then, after changing something, run them again and compare:
+
+    $ python -m launchpadlib.testing.benchmark -o after.json \\
+    >     --compare before.json
+
+Any benchmark that got more than 20% worse is reported, and the exit
+status is 1. A server's latency can be simulated with --latency.
+
+Given --cassette, the benchmarks are recorded to a `Cassette` the
+first time, talking to a `FakeWebService` in the same process, and
+replayed from it after that, without any server at all.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'BenchmarkSuite',
+    'compare',
+    'main',
+    ]
+
+import json
+from optparse import OptionParser
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2.
+    tracemalloc = None
+
+import launchpadlib
+from launchpadlib.launchpad import Launchpad
+from launchpadlib.testing.cassette import Cassette
+from launchpadlib.testing.server import WebServiceServer
+from launchpadlib.testing.webservice import FakeWebService
+
+
+LOWER = 'lower'
+HIGHER = 'higher'
+
+
+def _timings(function, iterations):
+    """Call function(i) for each iteration, and summarize the times.
+
+    The value compared between runs is the median, in milliseconds.
+    """
+    times = []
+    for i in range(iterations):
+        start = time.time()
+        function(i)
+        times.append((time.time() - start) * 1000)
+    times.sort()
+    return dict(
+        value=times[len(times) // 2], unit='ms', better=LOWER,
+        iterations=iterations, mean=sum(times) / len(times),
+        min=times[0], max=times[-1])
+
+
+class BenchmarkSuite:
+    """Benchmarks sharing one set of fixture data.
+
+    Use a suite as a context manager, which starts and stops the
+    server, and call `run`.
+    """
+
+    BENCHMARKS = (
+        'login_cold', 'login_warm', 'get_paths', 'entry_get',
+        'collection_iteration', 'named_operation', 'lp_save',
+        'memory_per_10k_entries')
+
+    def __init__(self, latency=0, cassette=None, scale=1.0):
+        """Constructor.
+
+        :param latency: How long, in seconds, the server waits before
+            answering each request.
+        :param cassette: A cassette file to record to or replay from,
+            instead of using a server.
+        :param scale: Multiplies the number of iterations and entries.
+        """
+        self.latency = latency
+        self.scale = scale
+        self.entries = max(int(10000 * scale), 100)
+        self.cassette = None
+        self.server = None
+        if cassette is not None:
+            self.cassette = Cassette(cassette)
+        if self.cassette is None or self.cassette.mode == Cassette.RECORD:
+            if self.cassette is None:
+                self.server = WebServiceServer(latency=latency)
+                web_service = self.server.web_service
+            else:
+                web_service = FakeWebService()
+            self.add_fixtures(web_service)
+            self.web_service = web_service
+        else:
+            self.web_service = None
+        self.temp_dir = None
+
+    def __enter__(self):
+        self.temp_dir = tempfile.mkdtemp()
+        if self.server is not None:
+            self.server.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.server is not None:
+            self.server.stop()
+        elif self.web_service is not None:
+            self.web_service.cleanup()
+        if (self.cassette is not None and exc_info[0] is None
+            and self.cassette.mode == Cassette.RECORD):
+            self.cassette.save()
+        shutil.rmtree(self.temp_dir)
+
+    def add_fixtures(self, web_service):
+        """Add the bugs and the project the benchmarks use."""
+        for bug_id in range(1, self.entries + 1):
+            web_service.add_entry(
+                'bugs/%d' % bug_id, 'bug', id=bug_id, title='Bug %d' % bug_id)
+        web_service.add_entry('firefox', 'project', name='firefox')
+        web_service.add_operation(
+            'firefox', 'searchTasks', ['bugs/1', 'bugs/2', 'bugs/3'])
+
+    @property
+    def service_root(self):
+        if self.web_service is not None:
+            return self.web_service.service_root
+        return 'https://api.launchpad.net/'
+
+    @property
+    def launchpad_class(self):
+        if self.cassette is None:
+            return Launchpad
+        if self.cassette.mode == Cassette.RECORD:
+            return self.cassette.launchpad_class(
+                self.web_service.launchpad_class)
+        return self.cassette.launchpad_class()
+
+    def iterations(self, count):
+        return max(int(count * self.scale), 1)
+
+    def login(self, launchpadlib_dir=None):
+        if launchpadlib_dir is None:
+            launchpadlib_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        return self.launchpad_class.login_anonymously(
+            'benchmark', self.service_root,
+            launchpadlib_dir=launchpadlib_dir)
+
+    def run(self, names=None):
+        """Run benchmarks.
+
+        :param names: The benchmarks to run. By default, all of them.
+        :return: A dict mapping each benchmark's name to its results.
+        """
+        results = {}
+        for name in names or self.BENCHMARKS:
+            results[name] = getattr(self, 'bench_' + name)()
+        return results
+
+    def bench_login_cold(self):
+        """Log in with nothing cached, fetching and parsing the WADL."""
+        return _timings(lambda i: self.login(), self.iterations(10))
+
+    def bench_login_warm(self):
+        """Log in with the WADL cached on disk."""
+        launchpadlib_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        self.login(launchpadlib_dir)
+        return _timings(
+            lambda i: self.login(launchpadlib_dir), self.iterations(10))
+
+    def bench_get_paths(self):
+        """Work out where the credentials and caches go."""
+        launchpadlib_dir = tempfile.mkdtemp(dir=self.temp_dir)
+        return _timings(
+            lambda i: Launchpad._get_paths(
+                self.service_root, launchpadlib_dir),
+            self.iterations(1000))
+
+    def bench_entry_get(self):
+        """Get a bug that isn't cached."""
+        launchpad = self.login()
+        return _timings(
+            lambda i: launchpad.bugs[i + 1].title, self.iterations(100))
+
+    def bench_collection_iteration(self):
+        """Iterate over a big collection, a page at a time."""
+        launchpad = self.login()
+        start = time.time()
+        count = 0
+        for bug in launchpad.bugs:
+            count += 1
+        seconds = time.time() - start
+        return dict(
+            value=count / seconds, unit='entries/s', better=HIGHER,
+            entries=count, seconds=seconds)
+
+    def bench_named_operation(self):
+        """Invoke a named operation, and read its results."""
+        project = self.login().projects['firefox']
+        return _timings(
+            lambda i: list(project.searchTasks()), self.iterations(100))
+
+    def bench_lp_save(self):
+        """Change a bug, and save it."""
+        bug = self.login().bugs[1]
+
+        def save(i):
+            bug.title = 'Title %d' % i
+            bug.lp_save()
+        return _timings(save, self.iterations(50))
+
+    def bench_memory_per_10k_entries(self):
+        """Hold on to the entries of a big collection."""
+        if tracemalloc is None:
+            return None
+        launchpad = self.login()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            bugs = list(launchpad.bugs)
+            used = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        return dict(
+            value=used * 10000 // len(bugs), unit='bytes', better=LOWER,
+            entries=len(bugs))
+
+
+def compare(baseline, current, tolerance=0.2):
+    """Find the benchmarks that got worse.
+
+    :param baseline: Results from an earlier run, as written by `main`.
+    :param current: Results from this run.
+    :param tolerance: How much worse, as a fraction of the baseline,
+        a benchmark may get before it counts.
+    :return: A list of (name, baseline value, current value) tuples.
+    """
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        old = baseline['results'].get(name)
+        if result is None or old is None or not old['value']:
+            continue
+        change = (result['value'] - old['value']) / float(old['value'])
+        if result['better'] == HIGHER:
+            change = -change
+        if change > tolerance:
+            regressions.append((name, old['value'], result['value']))
+    return regressions
+
+
+def main(args=None):
+    parser = OptionParser(
+        usage="%prog [options] [BENCHMARK...]",
+        description="Benchmarks: " + ", ".join(BenchmarkSuite.BENCHMARKS))
+    parser.add_option(
+        "-o", "--output", help="Write the results to this JSON file.")
+    parser.add_option(
+        "--compare", metavar="FILE",
+        help="Report benchmarks that got worse since these results.")
+    parser.add_option(
+        "--tolerance", type="float", default=0.2,
+        help="How much worse a benchmark may get, as a fraction.")
+    parser.add_option(
+        "--latency", type="float", default=0,
+        help="Seconds the server waits before each response.")
+    parser.add_option(
+        "--cassette", help="Record to, or replay from, this cassette.")
+    parser.add_option(
+        "--scale", type="float", default=1.0,
+        help="Multiply the iterations and entries by this.")
+    options, names = parser.parse_args(args)
+    for name in names:
+        if name not in BenchmarkSuite.BENCHMARKS:
+            parser.error("No such benchmark: %s" % name)
+
+    with BenchmarkSuite(
+        options.latency, options.cassette, options.scale) as suite:
+        results = dict(
+            version=1, launchpadlib=launchpadlib.__version__,
+            python=platform.python_version(), latency=options.latency,
+            cassette=options.cassette, scale=options.scale,
+            results=suite.run(names))
+    for name, result in sorted(results['results'].items()):
+        if result is None:
+            print("%-24s (not available)" % name)
+        else:
+            print("%-24s %12.2f %s" % (name, result['value'], result['unit']))
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(baseline, results, options.tolerance)
+        for name, old, new in regressions:
+            print("Regression: %s went from %.2f to %.2f" % (name, old, new))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
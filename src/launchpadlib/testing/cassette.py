@@ -0,0 +1,256 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Record a Launchpad session's HTTP traffic, and play it back later.
+
+Timings taken against the real web service are mostly network noise.
+A `Cassette` records every request a Launchpad object makes, the WADL
+included, and the response it got, so that the same session can be
+run again without any network access, as often as necessary:
+
+    >>> with Cassette('triage.cassette') as cassette:
+    ...     launchpad = cassette.launchpad_class().login_anonymously(
+    ...         'benchmark', 'production', launchpadlib_dir=tempdir)
+    ...     triage(launchpad)
+
+The first time, there's no cassette file, so the requests go to
+Launchpad and are saved to the file when the block ends. After that,
+the file exists, and the responses come from it.
+
+Play a session back the way it was recorded: with an empty
+launchpadlib directory, and making the same requests. A request that
+wasn't recorded raises `UnrecordedRequest`. Request headers aren't
+recorded, so the file doesn't hold anyone's credentials.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'Cassette',
+    'CassetteLaunchpad',
+    'UnrecordedRequest',
+    ]
+
+from base64 import (
+    b64decode,
+    b64encode,
+    )
+from collections import deque
+import gzip
+import os
+import threading
+import time
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+import httplib2
+
+from launchpadlib.launchpad import Launchpad
+
+
+class UnrecordedRequest(Exception):
+    """A request was made that the cassette has no response for."""
+
+
+class Cassette:
+    """HTTP requests and responses, kept in a gzipped JSON file.
+
+    :ivar interactions: A list of dicts, one for each request.
+    """
+
+    RECORD = 'record'
+    REPLAY = 'replay'
+
+    # Response headers not worth keeping.
+    IGNORED_HEADERS = ('status', 'set-cookie')
+
+    def __init__(self, path, mode=None, realtime=False):
+        """Constructor.
+
+        :param path: The cassette file.
+        :param mode: RECORD or REPLAY. By default, a cassette replays
+            the file if it exists, and records it otherwise.
+        :param realtime: If True, a replayed response takes as long as
+            it took to arrive when it was recorded.
+        """
+        if mode is None:
+            if os.path.exists(path):
+                mode = self.REPLAY
+            else:
+                mode = self.RECORD
+        if mode not in (self.RECORD, self.REPLAY):
+            raise ValueError("Unknown cassette mode: %r" % mode)
+        self.path = path
+        self.mode = mode
+        self.realtime = realtime
+        self.interactions = []
+        self._lock = threading.Lock()
+        self._responses = {}
+        if mode == self.REPLAY:
+            self.load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.mode == self.RECORD and exc_info[0] is None:
+            self.save()
+
+    @staticmethod
+    def _key(method, uri, body, headers):
+        """What identifies a request when it's replayed.
+
+        The media type asked for matters, since the service root is
+        served as both JSON and WADL. Whether the request was
+        conditional matters too, since a 304 response is only any use
+        to a client with a cached copy.
+        """
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        headers = dict(
+            (name.lower(), value) for name, value in (headers or {}).items())
+        return (method, uri, headers.get('accept'), body or None,
+                'if-none-match' in headers)
+
+    def load(self):
+        """Read the cassette file."""
+        with gzip.open(self.path, 'rb') as cassette_file:
+            document = json.loads(cassette_file.read().decode('utf-8'))
+        self.interactions = document['interactions']
+        self._responses = {}
+        for interaction in self.interactions:
+            key = (interaction['method'], interaction['uri'],
+                   interaction['accept'], interaction['body'],
+                   interaction['conditional'])
+            self._responses.setdefault(key, deque()).append(interaction)
+
+    def save(self):
+        """Write the interactions recorded so far to the cassette file."""
+        with self._lock:
+            document = dict(version=1, interactions=self.interactions)
+        data = json.dumps(document, sort_keys=True).encode('utf-8')
+        with gzip.open(self.path, 'wb') as cassette_file:
+            cassette_file.write(data)
+
+    def record(self, method, uri, body, headers, response, content,
+               elapsed):
+        """Add a request and its response to the cassette."""
+        method, uri, accept, body, conditional = self._key(
+            method, uri, body, headers)
+        interaction = dict(
+            method=method, uri=uri, accept=accept, body=body,
+            conditional=conditional,
+            status=response.status, elapsed=round(elapsed, 4),
+            headers=dict(
+                (name, value) for name, value in response.items()
+                if name not in self.IGNORED_HEADERS))
+        try:
+            interaction['content'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            interaction['content_base64'] = b64encode(content).decode('ascii')
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def replay(self, method, uri, body, headers):
+        """Find the recorded response to a request.
+
+        Identical requests get the responses recorded for them in
+        order. Once those run out, the last one is used again.
+
+        :return: A 2-tuple (response, content), like httplib2's.
+        """
+        key = self._key(method, uri, body, headers)
+        with self._lock:
+            responses = self._responses.get(key)
+            if responses is None and key[-1]:
+                # A client with a cached copy can make do with a full
+                # response.
+                responses = self._responses.get(key[:-1] + (False,))
+            if not responses:
+                raise UnrecordedRequest("%s %s" % (method, uri))
+            if len(responses) > 1:
+                interaction = responses.popleft()
+            else:
+                interaction = responses[0]
+        if self.realtime:
+            time.sleep(interaction['elapsed'])
+        if 'content_base64' in interaction:
+            content = b64decode(interaction['content_base64'])
+        else:
+            content = interaction['content'].encode('utf-8')
+        info = dict(interaction['headers'])
+        info['status'] = str(interaction['status'])
+        return httplib2.Response(info), content
+
+    def wrap(self, http):
+        """Make an Http object record to, or replay from, this cassette.
+
+        :param http: An `httplib2.Http`, such as the one returned by
+            `Launchpad.httpFactory`.
+        :return: The same object.
+        """
+        if self.mode == self.REPLAY:
+            def _conn_request(conn, request_uri, method, body, headers):
+                return self.replay(
+                    method, self._absolute_uri(conn, request_uri), body,
+                    headers)
+        else:
+            send = http._conn_request
+
+            def _conn_request(conn, request_uri, method, body, headers):
+                start = time.time()
+                response, content = send(
+                    conn, request_uri, method, body, headers)
+                self.record(
+                    method, self._absolute_uri(conn, request_uri), body,
+                    headers, response, content, time.time() - start)
+                return response, content
+        http._conn_request = _conn_request
+        return http
+
+    @staticmethod
+    def _absolute_uri(conn, request_uri):
+        if isinstance(conn, httplib2.HTTPSConnectionWithTimeout):
+            scheme, default_port = 'https', 443
+        else:
+            scheme, default_port = 'http', 80
+        if conn.port in (None, default_port):
+            return '%s://%s%s' % (scheme, conn.host, request_uri)
+        return '%s://%s:%s%s' % (scheme, conn.host, conn.port, request_uri)
+
+    def launchpad_class(self, base=Launchpad):
+        """A `CassetteLaunchpad` subclass bound to this cassette.
+
+        :param base: The `Launchpad` class to start from.
+        """
+        return type(
+            'BoundCassetteLaunchpad', (CassetteLaunchpad, base),
+            dict(cassette=self))
+
+
+class CassetteLaunchpad(Launchpad):
+    """A Launchpad object whose requests go through a `Cassette`.
+
+    Don't use this class directly; use `Cassette.launchpad_class`.
+    """
+
+    cassette = None
+
+    def httpFactory(self, credentials, cache, timeout, proxy_info):
+        return self.cassette.wrap(super(CassetteLaunchpad, self).httpFactory(
+            credentials, cache, timeout, proxy_info))
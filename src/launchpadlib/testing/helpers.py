@@ -93,10 +93,12 @@ class NoNetworkLaunchpad(Launchpad):
     """
 
     def __init__(self, credentials, authorization_engine, credential_store,
-                 service_root, cache, timeout, proxy_info, version):
+                 service_root, cache, timeout, proxy_info, version,
+                 wadl_cache=None, lazy=False):
         self.credentials = credentials
         self.authorization_engine = authorization_engine
         self.credential_store = credential_store
+        self.wadl_cache = wadl_cache
         self.passed_in_args = dict(
             service_root=service_root, cache=cache, timeout=timeout,
             proxy_info=proxy_info, version=version)
@@ -0,0 +1,203 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""A stand-in for the Launchpad web service that listens on a socket.
+
+`FakeWebService` answers requests from inside the process, so it
+leaves out the network entirely. To load-test a client end to end,
+sockets and all, serve the same fixture data over HTTP:
+
+    >>> with WebServiceServer(latency=0.05) as server:
+    ...     server.web_service.add_entry('bugs/1', 'bug', id=1, title='Oops')
+    ...     launchpad = Launchpad(
+    ...         credentials, None, None, service_root=server.service_root)
+    ...     print(launchpad.bugs[1].title)
+    Oops
+
+The server speaks plain HTTP on the loopback interface, pages
+collections, answers conditional requests with ETags, and can insist
+on OAuth-signed requests. `TestableLaunchpad` can be pointed at it by
+passing its service_root.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'WebServiceServer',
+    ]
+
+import threading
+import time
+
+try:
+    from http.server import (
+        BaseHTTPRequestHandler,
+        HTTPServer,
+        )
+    from socketserver import ThreadingMixIn
+    from urllib.parse import unquote
+except ImportError:
+    from BaseHTTPServer import (
+        BaseHTTPRequestHandler,
+        HTTPServer,
+        )
+    from SocketServer import ThreadingMixIn
+    from urllib import unquote
+
+from launchpadlib.testing.webservice import FakeWebService
+
+
+# The OAuth parameters that every signed request carries. Anonymous
+# requests have no oauth_token.
+OAUTH_PARAMETERS = (
+    'oauth_consumer_key', 'oauth_signature', 'oauth_signature_method')
+
+TEXT_HEADERS = {'content-type': 'text/plain'}
+
+
+def _oauth_parameters(authorization):
+    """Parse an OAuth Authorization header.
+
+    :return: A dict of the parameters, or None if the header isn't an
+        OAuth header.
+    """
+    if authorization is None or not authorization.startswith('OAuth '):
+        return None
+    parameters = {}
+    for parameter in authorization[len('OAuth '):].split(','):
+        name, equals, value = parameter.strip().partition('=')
+        parameters[name] = unquote(value.strip('"'))
+    return parameters
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Pass each request on to the server's `FakeWebService`."""
+
+    protocol_version = 'HTTP/1.1'
+    # The headers and the body are written separately; without this,
+    # every response on a kept-alive connection waits for a delayed ACK.
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+        server = self.server.stand_in
+        length = int(self.headers.get('content-length') or 0)
+        body = self.rfile.read(length) if length else None
+        if body is not None:
+            body = body.decode('utf-8')
+        headers = dict(
+            (name.lower(), value) for name, value in self.headers.items())
+        status, response_headers, content = server.respond(
+            self.command, server.host_url + self.path, headers, body)
+        self.send_response(status)
+        for name, value in response_headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_DELETE = do_GET = do_PATCH = do_POST = do_PUT = _respond
+
+    def log_message(self, format, *args):
+        # Load tests make a lot of requests; don't log each one.
+        pass
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class WebServiceServer:
+    """Serve a `FakeWebService` over HTTP, in a thread.
+
+    The server listens as soon as it's created, so its service_root
+    is known, and starts answering when `start` is called or the
+    server is used as a context manager.
+
+    :ivar web_service: The `FakeWebService`, to add fixture data to.
+    :ivar service_root: The URL to pass to `Launchpad`.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0,
+                 require_oauth=False, access_tokens=None, **kwargs):
+        """Constructor.
+
+        :param host: The address to listen on.
+        :param port: The port to listen on. By default, any free port.
+        :param latency: How long, in seconds, to wait before answering
+            each request.
+        :param require_oauth: If True, requests without an OAuth
+            Authorization header get a 401 response.
+        :param access_tokens: If not None, the keys of the access
+            tokens to accept. Requests signed with other tokens get a
+            401 response, as they would for an expired token.
+        Other keyword arguments are passed to `FakeWebService`.
+        """
+        self.latency = latency
+        self.require_oauth = require_oauth
+        self.access_tokens = access_tokens
+        self._server = _ThreadingHTTPServer((host, port), _Handler)
+        self._server.stand_in = self
+        host, port = self._server.server_address[:2]
+        self.host_url = 'http://%s:%d' % (host, port)
+        self.service_root = self.host_url + '/'
+        self.web_service = FakeWebService(
+            service_root=self.service_root, **kwargs)
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """Start answering requests, in a daemon thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name='WebServiceServer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop answering requests, and close the socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        self.web_service.cleanup()
+
+    def respond(self, method, url, headers, body):
+        """Answer a request, as `FakeWebService.respond` does.
+
+        :param headers: The request headers, with lower-case names.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        oauth = _oauth_parameters(headers.get('authorization'))
+        if oauth is not None:
+            missing = [name for name in OAUTH_PARAMETERS if name not in oauth]
+            if missing:
+                return 400, TEXT_HEADERS, (
+                    'Missing OAuth parameters: %s' % ', '.join(missing)
+                    ).encode('utf-8')
+            token = oauth.get('oauth_token')
+            if (self.access_tokens is not None and token
+                and token not in self.access_tokens):
+                return 401, TEXT_HEADERS, (
+                    'Expired token (%s).' % token).encode('utf-8')
+        elif self.require_oauth:
+            return 401, TEXT_HEADERS, b'Unauthorized.'
+        return self.web_service.respond(method, url, headers, body)
@@ -0,0 +1,375 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""An in-process stand-in for the Launchpad web service.
+
+`FakeWebService` holds JSON fixture data and answers HTTP requests
+for it, using the Launchpad WADL bundled with launchpadlib. Unlike
+`launchpadlib.testing.launchpad.FakeLaunchpad`, which fakes the
+client-side objects, a `FakeWebService` sits underneath a real
+`Launchpad` object, so requests go through httplib2, its cache and
+lazr.restfulclient just as they would against a real server. Only the
+socket is missing.
+
+    >>> web_service = FakeWebService()
+    >>> bug_url = web_service.add_entry('bugs/1', 'bug', id=1, title='Oops')
+    >>> launchpad = web_service.login()
+    >>> print(launchpad.bugs[1].title)
+    Oops
+"""
+
+__metaclass__ = type
+__all__ = [
+    'FakeWebService',
+    'FakeWebServiceHttp',
+    'FakeWebServiceLaunchpad',
+    ]
+
+import shutil
+import tempfile
+
+try:
+    from urllib.parse import (
+        parse_qsl,
+        urlencode,
+        urlsplit,
+        urlunsplit,
+        )
+except ImportError:
+    from urllib import urlencode
+    from urlparse import parse_qsl, urlsplit, urlunsplit
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+from pkg_resources import resource_string
+
+import httplib2
+
+from launchpadlib.credentials import (
+    AnonymousAccessToken,
+    Credentials,
+    )
+from launchpadlib.launchpad import (
+    Launchpad,
+    LaunchpadOAuthAwareHttp,
+    )
+
+
+if bytes is str:
+    # Python 2
+    unicode_type = unicode
+else:
+    unicode_type = str
+
+WADL_MEDIA_TYPE = 'application/vnd.sun.wadl+xml'
+JSON_MEDIA_TYPE = 'application/json'
+
+# The top-level collections linked to from the service root.
+TOP_LEVEL_COLLECTIONS = (
+    'bugs', 'distributions', 'people', 'project_groups', 'projects')
+
+
+def _split_url(url):
+    """Split a URL into the URL without its query, and the query."""
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    return (urlunsplit((scheme, netloc, path, '', '')),
+            dict(parse_qsl(query)))
+
+
+class FakeWebService:
+    """Canned web service data, served by URL.
+
+    :ivar requests: A list of (method, url) tuples, one for each
+        request the web service has answered.
+    """
+
+    DEFAULT_PAGE_SIZE = 75
+
+    def __init__(self, service_root='https://api.launchpad.net/',
+                 version=Launchpad.DEFAULT_VERSION, wadl=None,
+                 page_size=DEFAULT_PAGE_SIZE):
+        """Constructor.
+
+        :param service_root: The URL the web service pretends to be at.
+        :param version: The web service version to serve.
+        :param wadl: The WADL document to serve. Defaults to the
+            Launchpad WADL bundled with launchpadlib, which describes
+            version 1.0, moved to `service_root`.
+        :param page_size: How many entries to put in a collection page
+            when the client doesn't ask for a particular size.
+        """
+        if wadl is None:
+            wadl = resource_string("launchpadlib.testing",
+                                   "launchpad-wadl.xml")
+            # Make the bundled WADL describe this web service's URLs.
+            wadl = wadl.replace(
+                b'https://api.launchpad.net/',
+                (service_root.rstrip('/') + '/').encode('utf-8'))
+        self.service_root = service_root
+        self.version = version
+        self.root_url = service_root.rstrip('/') + '/' + version + '/'
+        self.wadl = wadl
+        self.page_size = page_size
+        self.requests = []
+        self.entries = {}
+        self.collections = {}
+        self.operations = {}
+        self._cache_dirs = []
+        root = dict(
+            resource_type_link=self.resource_type_link('service-root'))
+        for name in TOP_LEVEL_COLLECTIONS:
+            root[name + '_collection_link'] = self.url_for(name)
+            self.add_collection(name, name, [])
+        self.root = root
+
+    def url_for(self, path):
+        """Turn a path relative to the service root into a URL."""
+        if '://' in path:
+            return path
+        return self.root_url + path.lstrip('/')
+
+    def resource_type_link(self, resource_type):
+        """The WADL link to the given resource type."""
+        return self.root_url + '#' + resource_type
+
+    def add_entry(self, path, resource_type, **fields):
+        """Make an entry available.
+
+        If the entry is in a top-level collection (like 'bugs/1'), it
+        will also show up when that collection is iterated over.
+
+        :return: The URL to the new entry.
+        """
+        url = self.url_for(path)
+        entry = dict(
+            self_link=url,
+            resource_type_link=self.resource_type_link(resource_type),
+            http_etag='"%s-1"' % url)
+        entry.update(fields)
+        self.entries[url] = entry
+        collection_url = url.rsplit('/', 1)[0]
+        if collection_url + '/' == self.root_url:
+            # A pillar, like 'firefox'. Projects, project groups and
+            # distributions all live directly under the root.
+            collection_url = self.url_for(
+                {'project': 'projects',
+                 'project_group': 'project_groups',
+                 'distribution': 'distributions'}.get(resource_type, ''))
+        if collection_url in self.collections:
+            self.collections[collection_url]['entries'].append(url)
+        return url
+
+    def add_collection(self, path, resource_type, entries):
+        """Make a collection available.
+
+        :param resource_type: The collection's resource type, such as
+            'bugs' or 'milestone-page-resource'.
+        :param entries: A list of paths to the collection's entries.
+        :return: The URL to the new collection.
+        """
+        url = self.url_for(path)
+        self.collections[url] = dict(
+            resource_type_link=self.resource_type_link(resource_type),
+            entries=[self.url_for(entry) for entry in entries])
+        return url
+
+    def add_operation(self, path, name, result):
+        """Make a named operation available.
+
+        :param path: The path to the resource that has the operation.
+        :param name: The operation's name, as sent in 'ws.op'.
+        :param result: What the operation returns. A callable is
+            called with a dict of the request parameters, and what it
+            returns is used instead. A list is treated as the paths to
+            the entries of a collection, served a page at a time.
+            Anything else is served as a JSON document.
+        """
+        self.operations[self.url_for(path), name] = result
+
+    def update_entry(self, url, **fields):
+        """Change an entry's fields, as if someone else had changed it."""
+        entry = self.entries[self.url_for(url)]
+        entry.update(fields)
+        generation = int(entry['http_etag'].rsplit('-', 1)[1][:-1]) + 1
+        entry['http_etag'] = '"%s-%d"' % (entry['self_link'], generation)
+
+    def _page(self, url, entries, params, resource_type_link=None):
+        """Serve one page of a collection, following lazr.restful."""
+        start = int(params.get('ws.start', 0))
+        size = int(params.get('ws.size', self.page_size))
+        page = dict(
+            total_size=len(entries), start=start,
+            entries=[self.entries[entry]
+                     for entry in entries[start:start + size]])
+        if resource_type_link is not None:
+            page['resource_type_link'] = resource_type_link
+        if start + size < len(entries):
+            next_params = dict(params)
+            next_params.update({'ws.start': start + size, 'ws.size': size})
+            page['next_collection_link'] = (
+                url + '?' + urlencode(sorted(next_params.items())))
+        if start > 0:
+            prev_params = dict(params)
+            prev_params.update(
+                {'ws.start': max(0, start - size), 'ws.size': size})
+            page['prev_collection_link'] = (
+                url + '?' + urlencode(sorted(prev_params.items())))
+        return page
+
+    def _operation(self, url, params):
+        """Invoke a named operation."""
+        name = params.pop('ws.op')
+        try:
+            result = self.operations[url, name]
+        except KeyError:
+            return 400, None, 'No such operation: %s' % name
+        if callable(result):
+            result = result(params)
+        if isinstance(result, list):
+            result = self._page(
+                url, [self.url_for(entry) for entry in result], params)
+        return 200, None, result
+
+    def respond(self, method, url, headers=None, body=None):
+        """Answer an HTTP request.
+
+        :return: A 3-tuple (status, headers, content), where content is
+            a byte string.
+        """
+        self.requests.append((method, url))
+        headers = dict(
+            (key.lower(), value) for key, value in (headers or {}).items())
+        status, response_headers, document = self._respond(
+            method, url, headers, body)
+        response_headers = dict(response_headers or {})
+        if isinstance(document, bytes):
+            content = document
+        elif (isinstance(document, (str, unicode_type))
+              and 'content-type' not in response_headers):
+            response_headers['content-type'] = 'text/plain'
+            content = document.encode('utf-8')
+        else:
+            response_headers.setdefault('content-type', JSON_MEDIA_TYPE)
+            content = json.dumps(document).encode('utf-8')
+        if isinstance(document, dict) and 'http_etag' in document:
+            response_headers['etag'] = document['http_etag']
+            if headers.get('if-none-match') == document['http_etag']:
+                return 304, response_headers, b''
+        return status, response_headers, content
+
+    def _respond(self, method, url, headers, body):
+        url, params = _split_url(url)
+        if method == 'POST':
+            params.update(parse_qsl(body or ''))
+        if 'ws.op' in params:
+            return self._operation(url, params)
+        if url == self.root_url:
+            if headers.get('accept') == WADL_MEDIA_TYPE:
+                return 200, {'content-type': WADL_MEDIA_TYPE}, self.wadl
+            return 200, None, self.root
+        if url in self.collections:
+            collection = self.collections[url]
+            return 200, None, self._page(
+                url, collection['entries'], params,
+                collection['resource_type_link'])
+        entry = self.entries.get(url)
+        if entry is None:
+            return 404, None, 'Object: %s, name: %s' % (
+                self.root_url, url[len(self.root_url):])
+        if method == 'GET':
+            return 200, None, entry
+        if method == 'PATCH':
+            if headers.get('if-match') not in (None, entry['http_etag']):
+                return 412, None, 'Precondition failed.'
+            changes = json.loads(body)
+            self.update_entry(url, **changes)
+            return 209, None, entry
+        if method == 'DELETE':
+            del self.entries[url]
+            return 200, None, ''
+        return 405, None, 'Method not allowed.'
+
+    def cleanup(self):
+        """Remove the cache directories that `login` created."""
+        while self._cache_dirs:
+            shutil.rmtree(self._cache_dirs.pop(), ignore_errors=True)
+
+    @property
+    def launchpad_class(self):
+        """A `FakeWebServiceLaunchpad` subclass bound to this service."""
+        return type(
+            'BoundFakeWebServiceLaunchpad', (FakeWebServiceLaunchpad,),
+            dict(web_service=self))
+
+    def login(self, consumer_name='launchpadlib tests', **kwargs):
+        """Get an anonymous `Launchpad` object that talks to this service.
+
+        Keyword arguments are passed into the `Launchpad` constructor.
+        Unless a cache is given, the `Launchpad` object gets a new cache
+        directory, which `cleanup` removes.
+        """
+        credentials = Credentials(
+            consumer_name, access_token=AnonymousAccessToken())
+        if 'cache' not in kwargs:
+            kwargs['cache'] = tempfile.mkdtemp()
+            self._cache_dirs.append(kwargs['cache'])
+        return self.launchpad_class(
+            credentials, None, None, service_root=self.service_root,
+            version=self.version, **kwargs)
+
+
+class FakeWebServiceHttp(LaunchpadOAuthAwareHttp):
+    """An Http object that asks a `FakeWebService` instead of a server.
+
+    Everything above the socket, including OAuth signing, caching and
+    connection handling, happens as usual.
+    """
+
+    def __init__(self, web_service, *args):
+        self.web_service = web_service
+        super(FakeWebServiceHttp, self).__init__(*args)
+
+    def _conn_request(self, conn, request_uri, method, body, headers):
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        scheme = urlsplit(self.web_service.root_url).scheme
+        url = '%s://%s%s' % (scheme, conn.host, request_uri)
+        if conn.port not in (None, 80, 443):
+            url = '%s://%s:%s%s' % (scheme, conn.host, conn.port, request_uri)
+        status, response_headers, content = self.web_service.respond(
+            method, url, headers, body)
+        info = dict(response_headers)
+        info['status'] = str(status)
+        info['content-length'] = str(len(content))
+        return httplib2.Response(info), content
+
+
+class FakeWebServiceLaunchpad(Launchpad):
+    """A Launchpad object that talks to a `FakeWebService`.
+
+    Don't use this class directly; use `FakeWebService.login` or
+    `FakeWebService.launchpad_class`.
+    """
+
+    web_service = None
+
+    def httpFactory(self, credentials, cache, timeout, proxy_info):
+        return FakeWebServiceHttp(
+            self.web_service, self, self.authorization_engine, credentials,
+            cache, timeout, proxy_info)
@@ -0,0 +1,114 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the asyncio proxies."""
+
+import shutil
+import sys
+import tempfile
+import unittest
+
+from launchpadlib.testing.webservice import FakeWebService
+
+if sys.version_info >= (3, 6):
+    import asyncio
+    from launchpadlib.aio import AsyncLaunchpad
+else:
+    AsyncLaunchpad = None
+
+
+@unittest.skipIf(AsyncLaunchpad is None, "Needs Python 3.6 or later.")
+class TestAsyncLaunchpad(unittest.TestCase):
+
+    def setUp(self):
+        self.web_service = FakeWebService(page_size=2)
+        self.addCleanup(self.web_service.cleanup)
+        ws = self.web_service
+        ws.add_entry('~salgado', 'person', name='salgado')
+        for i in range(1, 6):
+            ws.add_entry('bugs/%d' % i, 'bug', id=i, title='Bug %d' % i,
+                         owner_link=ws.url_for('~salgado'))
+        ws.add_entry('firefox', 'project', name='firefox')
+        ws.add_operation('firefox', 'searchTasks', ['bugs/2', 'bugs/4'])
+        self.temp_dir = tempfile.mkdtemp()
+        self.loop = asyncio.new_event_loop()
+
+        class TestingAsyncLaunchpad(AsyncLaunchpad):
+            launchpad_class = ws.launchpad_class
+        self.launchpad = self.wait(TestingAsyncLaunchpad.login_anonymously(
+            'test', service_root=ws.service_root,
+            launchpadlib_dir=self.temp_dir, loop=self.loop))
+
+    def tearDown(self):
+        self.loop.close()
+        shutil.rmtree(self.temp_dir)
+
+    def wait(self, awaitable):
+        return self.loop.run_until_complete(awaitable)
+
+    def collect(self, collection):
+        """Iterate over an async iterable, without 'async for'."""
+        iterator = collection.__aiter__()
+        items = []
+        while True:
+            try:
+                items.append(self.wait(iterator.__anext__()))
+            except StopAsyncIteration:
+                return items
+
+    def test_key_lookup(self):
+        bug = self.wait(self.launchpad.bugs[3])
+        self.assertEqual(self.wait(bug.title), 'Bug 3')
+
+    def test_missing_key(self):
+        self.assertRaises(KeyError, self.wait, self.launchpad.bugs[99])
+
+    def test_links_are_proxies(self):
+        bug = self.wait(self.launchpad.bugs[1])
+        owner = bug.owner
+        self.assertEqual(self.wait(owner.name), 'salgado')
+
+    def test_link_from_unfetched_entry(self):
+        # bugs(1) doesn't fetch the bug, so finding its owner means
+        # fetching the bug first.
+        owner = self.launchpad.bugs(1).owner
+        self.assertEqual(self.wait(owner.name), 'salgado')
+
+    def test_iteration(self):
+        titles = [self.wait(bug.title)
+                  for bug in self.collect(self.launchpad.bugs)]
+        self.assertEqual(titles, ['Bug %d' % i for i in range(1, 6)])
+
+    def test_named_operation(self):
+        project = self.wait(self.launchpad.projects['firefox'])
+        tasks = self.wait(project.searchTasks())
+        self.assertEqual(
+            [self.wait(task.id) for task in self.collect(tasks)], [2, 4])
+
+    def test_save(self):
+        bug = self.wait(self.launchpad.bugs[1])
+        bug.title = 'New title'
+        self.wait(bug.lp_save())
+        self.assertEqual(
+            self.web_service.entries[self.wait(bug.self_link)]['title'],
+            'New title')
+
+    def test_loop_not_blocked(self):
+        # Many lookups can be in flight at once.
+        lookups = [self.loop.create_task(self.launchpad.bugs[i])
+                   for i in range(1, 6)]
+        bugs = self.wait(asyncio.gather(*lookups))
+        self.assertEqual([self.wait(bug.id) for bug in bugs], [1, 2, 3, 4, 5])
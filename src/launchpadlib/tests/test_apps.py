@@ -0,0 +1,207 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the token-minting web application."""
+
+from io import BytesIO
+import json
+import socket
+import time
+import unittest
+try:
+    from urllib.parse import urlencode
+except ImportError:
+    from urllib import urlencode
+
+import httplib2
+
+from lazr.restfulclient.errors import HTTPError
+
+import launchpadlib.credentials
+from launchpadlib.apps import (
+    RateLimiter,
+    RequestTokenWSGIApp,
+    )
+
+
+class FakeTokenPages:
+    """Stand in for Launchpad's +request-token and +access-token pages.
+
+    :ivar decisions: A dict mapping request tokens to 'allow' or 'deny'.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.decisions = {}
+
+    def __call__(self, url, headers, params):
+        self.requests.append((url, params))
+        if url.endswith('+request-token'):
+            content = json.dumps(dict(
+                oauth_token='request-%d' % len(self.requests),
+                oauth_token_secret='secret',
+                oauth_token_consumer=params['oauth_consumer_key'],
+                access_levels=[]))
+        else:
+            decision = self.decisions.get(params['oauth_token'])
+            if decision is None:
+                status = '401'
+                content = 'Request token has not yet been reviewed.'
+            elif decision == 'deny':
+                status, content = '403', 'Request token has been declined.'
+            if decision != 'allow':
+                raise HTTPError(
+                    httplib2.Response({'status': status}),
+                    content.encode('utf-8'))
+            content = urlencode(dict(
+                oauth_token='access', oauth_token_secret='access secret',
+                **{'lp.context': 'firefox'}))
+        return httplib2.Response({'status': '200'}), content.encode('utf-8')
+
+
+class TestRequestTokenWSGIApp(unittest.TestCase):
+
+    def setUp(self):
+        self.pages = FakeTokenPages()
+        self.http_post = launchpadlib.credentials._http_post
+        launchpadlib.credentials._http_post = self.pages
+        self.app = RequestTokenWSGIApp(
+            'http://launchpad.dev/', consumers=['web'], burst=3)
+
+    def tearDown(self):
+        launchpadlib.credentials._http_post = self.http_post
+
+    def request(self, path, method='POST', body=None, length=None,
+                **form):
+        if body is None:
+            body = urlencode(form).encode('ascii')
+        if length is None:
+            length = str(len(body))
+        environ = {
+            'REQUEST_METHOD': method, 'PATH_INFO': path,
+            'CONTENT_LENGTH': length, 'wsgi.input': BytesIO(body)}
+        responses = []
+
+        def start_response(status, headers):
+            responses.append((status, dict(headers)))
+        body = b''.join(self.app(environ, start_response))
+        status, headers = responses[0]
+        self.assertEqual(headers['Content-Type'], 'application/json')
+        return int(status.split()[0]), headers, json.loads(body.decode())
+
+    def test_request_token(self):
+        status, headers, token = self.request(
+            '/request-token', consumer='web', context='firefox')
+        self.assertEqual(status, 200)
+        self.assertEqual(token['oauth_token'], 'request-1')
+        self.assertEqual(token['oauth_token_consumer'], 'web')
+        self.assertEqual(token['lp.context'], 'firefox')
+
+    def test_access_token(self):
+        form = dict(
+            consumer='web', oauth_token='request-1',
+            oauth_token_secret='secret')
+        status, headers, document = self.request('/access-token', **form)
+        self.assertEqual(status, 401)
+        self.assertEqual(
+            document['error'], 'Request token has not yet been reviewed.')
+        self.pages.decisions['request-1'] = 'allow'
+        status, headers, token = self.request('/access-token', **form)
+        self.assertEqual(status, 200)
+        self.assertEqual(token, {
+            'oauth_token': 'access', 'oauth_token_secret': 'access secret',
+            'lp.context': 'firefox'})
+        url, params = self.pages.requests[-1]
+        self.assertEqual(params['oauth_signature'], '&secret')
+
+    def test_declined(self):
+        self.pages.decisions['request-1'] = 'deny'
+        status, headers, document = self.request(
+            '/access-token', consumer='web', oauth_token='request-1',
+            oauth_token_secret='secret')
+        self.assertEqual(status, 403)
+
+    def test_rate_limit(self):
+        for i in range(3):
+            status, headers, token = self.request(
+                '/request-token', consumer='web')
+            self.assertEqual(status, 200)
+        status, headers, document = self.request(
+            '/request-token', consumer='web')
+        self.assertEqual(status, 429)
+        self.assertEqual(headers['Retry-After'], '1')
+        self.assertEqual(len(self.pages.requests), 3)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.request('/request-token')[0], 400)
+        self.assertEqual(
+            self.request('/request-token', consumer='other')[0], 403)
+        self.assertEqual(
+            self.request('/access-token', consumer='web')[0], 400)
+        self.assertEqual(self.request('/request-token', 'GET')[0], 405)
+        self.assertEqual(self.request('/other', consumer='web')[0], 404)
+
+    def test_malformed_requests(self):
+        self.assertEqual(
+            self.request('/request-token', length='abc')[0], 400)
+        self.assertEqual(
+            self.request('/request-token', length='-1')[0], 400)
+        self.assertEqual(
+            self.request('/request-token', body=b'consumer=\xff')[0], 400)
+        self.assertEqual(self.pages.requests, [])
+
+    def test_launchpad_unreachable(self):
+        def unreachable(url, headers, params):
+            raise socket.error("Connection refused")
+        launchpadlib.credentials._http_post = unreachable
+        status, headers, document = self.request(
+            '/request-token', consumer='web')
+        self.assertEqual(status, 502)
+        # The details are logged, not sent to the client.
+        self.assertEqual(document['error'], "Couldn't reach Launchpad.")
+
+    def test_local_errors_are_not_blamed_on_launchpad(self):
+        def broken(url, headers, params):
+            raise ValueError("Oops.")
+        launchpadlib.credentials._http_post = broken
+        self.assertRaises(
+            ValueError, self.request, '/request-token', consumer='web')
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        limiter = RateLimiter(rate=100, burst=2)
+        self.assertEqual(limiter.acquire('a'), 0)
+        self.assertEqual(limiter.acquire('a'), 0)
+        self.assertTrue(limiter.acquire('a') > 0)
+        # Other keys have buckets of their own.
+        self.assertEqual(limiter.acquire('b'), 0)
+        time.sleep(0.02)
+        self.assertEqual(limiter.acquire('a'), 0)
+
+    def test_rate_must_be_positive(self):
+        self.assertRaises(ValueError, RateLimiter, rate=0, burst=1)
+        self.assertRaises(ValueError, RateLimiter, rate=-1, burst=1)
+
+    def test_idle_keys_forgotten(self):
+        limiter = RateLimiter(rate=1000, burst=1)
+        limiter.MAX_KEYS = 2
+        for key in 'abc':
+            limiter.acquire(key)
+        time.sleep(0.01)
+        limiter.acquire('d')
+        self.assertEqual(list(limiter._buckets), ['d'])
@@ -0,0 +1,176 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the request token authorization engines."""
+
+import socket
+import threading
+import time
+import unittest
+
+try:
+    from urllib.parse import (
+        parse_qs,
+        urlsplit,
+        )
+    from urllib.request import urlopen
+    from urllib.error import HTTPError as URLError
+except ImportError:
+    from urlparse import (
+        parse_qs,
+        urlsplit,
+        )
+    from urllib2 import (
+        HTTPError as URLError,
+        urlopen,
+        )
+
+import httplib2
+
+from lazr.restfulclient.errors import HTTPError
+
+from launchpadlib.credentials import (
+    AccessToken,
+    AuthorizeRequestTokenWithCallback,
+    Credentials,
+    EndUserDeclinedAuthorization,
+    )
+
+
+class FakeLaunchpadCredentials(Credentials):
+    """Credentials whose token exchange is decided by the test.
+
+    :ivar decision: None until the end-user decides, then 'allow' or
+        'deny'.
+    :ivar exchanges: The times at which an access token was asked for.
+    """
+
+    def __init__(self):
+        super(FakeLaunchpadCredentials, self).__init__('consumer')
+        self.decision = None
+        self.exchanges = []
+
+    def exchange_request_token_for_access_token(self, web_root):
+        self.exchanges.append(time.time())
+        if self.decision is None:
+            raise HTTPError(httplib2.Response({'status': '401'}), b'')
+        if self.decision == 'deny':
+            raise HTTPError(
+                httplib2.Response({'status': '403'}), b'Declined.')
+        self.access_token = AccessToken('access', 'secret')
+
+
+class BrowserlessCallbackEngine(AuthorizeRequestTokenWithCallback):
+    """An engine whose end-user decides after a delay, without a browser.
+
+    The end-user's browser is sent to the oauth_callback, if there is
+    one, as Launchpad would.
+    """
+
+    def __init__(self, credentials, decision, delay=0.2):
+        super(BrowserlessCallbackEngine, self).__init__(
+            'http://api.example.com/', 'application')
+        self.credentials = credentials
+        self.decision = decision
+        self.delay = delay
+        self.authorization_urls = []
+        self.callback_status = None
+
+    def output(self, message):
+        pass
+
+    def open_authorization_page(self, authorization_url):
+        self.authorization_urls.append(authorization_url)
+        query = parse_qs(urlsplit(authorization_url).query)
+
+        def decide():
+            time.sleep(self.delay)
+            self.credentials.decision = self.decision
+            if 'oauth_callback' in query:
+                response = urlopen(
+                    query['oauth_callback'][0] + '&oauth_token=' +
+                    query['oauth_token'][0])
+                self.callback_status = response.getcode()
+                response.close()
+
+        self.browser = threading.Thread(target=decide)
+        self.browser.daemon = True
+        self.browser.start()
+
+
+class TestAuthorizeRequestTokenWithCallback(unittest.TestCase):
+
+    def setUp(self):
+        self.credentials = FakeLaunchpadCredentials()
+
+    def test_callback(self):
+        engine = BrowserlessCallbackEngine(self.credentials, 'allow')
+        start = time.time()
+        engine.make_end_user_authorize_token(self.credentials, 'request')
+        self.assertEqual(self.credentials.access_token.key, 'access')
+        engine.browser.join()
+        self.assertEqual(engine.callback_status, 200)
+        # The access token was asked for as soon as the browser came
+        # back, not after a poll interval.
+        self.assertEqual(len(self.credentials.exchanges), 1)
+        self.assertTrue(
+            self.credentials.exchanges[0] - start
+            < engine.MIN_POLL_INTERVAL)
+        self.assertTrue(
+            'oauth_callback=http%3A%2F%2F127.0.0.1%3A' in
+            engine.authorization_urls[0])
+        # The listener has gone away.
+        self.assertEqual(engine._callback_url, None)
+
+    def test_declined(self):
+        engine = BrowserlessCallbackEngine(self.credentials, 'deny')
+        self.assertRaises(
+            EndUserDeclinedAuthorization,
+            engine.make_end_user_authorize_token, self.credentials,
+            'request')
+
+    def test_wrong_request_token(self):
+        decided = threading.Event()
+        engine = BrowserlessCallbackEngine(self.credentials, 'allow')
+        stop_listening = engine.listen_for_callback('request', decided)
+        try:
+            self.assertRaises(
+                URLError, urlopen,
+                engine._callback_url.split('?')[0] + '?oauth_token=other')
+            self.assertFalse(decided.is_set())
+        finally:
+            stop_listening()
+
+    def test_polling_fallback(self):
+        # If nothing can listen, Launchpad is polled instead.
+        class NoListenerEngine(BrowserlessCallbackEngine):
+            MIN_POLL_INTERVAL = 0.05
+
+            def listen_for_callback(self, request_token, decided):
+                raise socket.error("Address in use")
+
+        engine = NoListenerEngine(self.credentials, 'allow')
+        engine.make_end_user_authorize_token(self.credentials, 'request')
+        self.assertEqual(self.credentials.access_token.key, 'access')
+        self.assertFalse('oauth_callback' in engine.authorization_urls[0])
+        self.assertTrue(len(self.credentials.exchanges) > 1)
+
+    def test_poll_intervals_back_off(self):
+        engine = BrowserlessCallbackEngine(self.credentials, 'allow')
+        intervals = engine.poll_intervals()
+        first = [next(intervals) for i in range(10)]
+        self.assertEqual(first[:3], [1, 1.5, 2.25])
+        self.assertEqual(first[-1], engine.MAX_POLL_INTERVAL)
@@ -0,0 +1,123 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for polling for many request tokens at once."""
+
+import itertools
+import threading
+import unittest
+
+import launchpadlib.credentials
+from launchpadlib.authpoller import AuthorizationPoller
+from launchpadlib.credentials import (
+    EndUserDeclinedAuthorization,
+    MemoryCredentialStore,
+    RequestTokenAuthorizationEngine,
+    TokenAuthorizationTimedOut,
+    )
+from launchpadlib.tests.test_authorization import FakeLaunchpadCredentials
+
+
+class NoNetworkEngine(RequestTokenAuthorizationEngine):
+    """An engine that makes up its request tokens."""
+
+    def __init__(self):
+        super(NoNetworkEngine, self).__init__(
+            'http://api.example.com/', consumer_name='onboarding')
+        self.tokens = itertools.count(1)
+
+    def get_request_token(self, credentials):
+        return 'request-%d' % next(self.tokens)
+
+
+class FastPoller(AuthorizationPoller):
+    MIN_POLL_INTERVAL = 0.01
+    MAX_POLL_INTERVAL = 0.05
+
+
+class TestAuthorizationPoller(unittest.TestCase):
+
+    def setUp(self):
+        self.poller = FastPoller(NoNetworkEngine())
+        self.addCleanup(self.poller.close)
+
+    def test_many_tokens(self):
+        credentials = [FakeLaunchpadCredentials() for i in range(20)]
+        pending = [self.poller.submit(c) for c in credentials]
+        self.assertEqual(pending[0].request_token, 'request-1')
+        self.assertTrue(
+            '+authorize-token?oauth_token=request-1' in
+            pending[0].authorization_url)
+        for c in credentials[::2]:
+            c.decision = 'allow'
+        for authorization in pending[::2]:
+            self.assertEqual(
+                authorization.result(5).access_token.key, 'access')
+        self.assertFalse(any(p.done() for p in pending[1::2]))
+        # Only one thread does the polling.
+        self.assertEqual(
+            len([thread for thread in threading.enumerate()
+                 if thread.name == 'AuthorizationPoller']), 1)
+        for c in credentials[1::2]:
+            c.decision = 'deny'
+        for authorization in pending[1::2]:
+            self.assertRaises(
+                EndUserDeclinedAuthorization, authorization.result, 5)
+
+    def test_polling_backs_off(self):
+        credentials = FakeLaunchpadCredentials()
+        self.poller.submit(credentials)
+        threading.Event().wait(0.3)
+        # Without backing off, there'd have been 30 polls.
+        self.assertTrue(len(credentials.exchanges) < 15)
+        intervals = [b - a for a, b in zip(
+            credentials.exchanges, credentials.exchanges[1:])]
+        self.assertTrue(intervals[-1] > intervals[0])
+
+    def test_credential_store(self):
+        store = MemoryCredentialStore()
+        self.poller.credential_store = store
+        credentials = FakeLaunchpadCredentials()
+        credentials.decision = 'allow'
+        self.poller.submit(credentials, unique_key='account 1').result(5)
+        self.assertEqual(
+            store.load('account 1').access_token.key, 'access')
+
+    def test_timeout(self):
+        timeout = launchpadlib.credentials.access_token_poll_timeout
+        launchpadlib.credentials.access_token_poll_timeout = 0.1
+        try:
+            authorization = self.poller.submit(FakeLaunchpadCredentials())
+            self.assertRaises(
+                TokenAuthorizationTimedOut, authorization.result, 5)
+        finally:
+            launchpadlib.credentials.access_token_poll_timeout = timeout
+
+    def test_cancel(self):
+        credentials = FakeLaunchpadCredentials()
+        authorization = self.poller.submit(credentials)
+        self.assertTrue(authorization.cancel())
+        threading.Event().wait(0.1)
+        polls = len(credentials.exchanges)
+        threading.Event().wait(0.1)
+        self.assertEqual(len(credentials.exchanges), polls)
+
+    def test_close_cancels_pending(self):
+        authorization = self.poller.submit(FakeLaunchpadCredentials())
+        self.poller.close()
+        self.assertTrue(authorization.cancelled())
+        self.assertRaises(
+            RuntimeError, self.poller.submit, FakeLaunchpadCredentials())
@@ -0,0 +1,107 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the benchmarks."""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from launchpadlib.testing.benchmark import (
+    BenchmarkSuite,
+    compare,
+    main,
+    )
+
+
+def results(**values):
+    return dict(results=dict(
+        (name, dict(value=value, better=better))
+        for name, (value, better) in values.items()))
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_run(self):
+        with BenchmarkSuite(scale=0.01) as suite:
+            results = suite.run(
+                ['entry_get', 'collection_iteration', 'named_operation'])
+        self.assertEqual(results['entry_get']['unit'], 'ms')
+        self.assertEqual(results['entry_get']['iterations'], 1)
+        self.assertEqual(results['collection_iteration']['entries'], 100)
+        self.assertEqual(results['collection_iteration']['better'], 'higher')
+
+    def test_cassette(self):
+        path = os.path.join(self.temp_dir, 'benchmark.cassette')
+        with BenchmarkSuite(cassette=path, scale=0.01) as suite:
+            self.assertFalse(suite.server)
+            suite.run(['login_cold', 'entry_get'])
+        with BenchmarkSuite(cassette=path, scale=0.01) as suite:
+            self.assertEqual(suite.web_service, None)
+            results = suite.run(['login_cold', 'entry_get'])
+        self.assertEqual(sorted(results), ['entry_get', 'login_cold'])
+
+    def test_main(self):
+        output = os.path.join(self.temp_dir, 'results.json')
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            status = main(['--scale', '0.01', '-o', output, 'get_paths'])
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        self.assertEqual(status, 0)
+        with open(output) as output_file:
+            document = json.load(output_file)
+        self.assertEqual(list(document['results']), ['get_paths'])
+        self.assertEqual(document['scale'], 0.01)
+
+
+class TestCompare(unittest.TestCase):
+
+    def test_lower_is_better(self):
+        baseline = results(entry_get=(10.0, 'lower'))
+        self.assertEqual(
+            compare(baseline, results(entry_get=(11.0, 'lower'))), [])
+        self.assertEqual(
+            compare(baseline, results(entry_get=(13.0, 'lower'))),
+            [('entry_get', 10.0, 13.0)])
+
+    def test_higher_is_better(self):
+        baseline = results(iteration=(1000, 'higher'))
+        self.assertEqual(
+            compare(baseline, results(iteration=(2000, 'higher'))), [])
+        self.assertEqual(
+            compare(baseline, results(iteration=(700, 'higher'))),
+            [('iteration', 1000, 700)])
+
+    def test_tolerance(self):
+        baseline = results(entry_get=(10.0, 'lower'))
+        self.assertEqual(
+            compare(baseline, results(entry_get=(13.0, 'lower')), 0.5), [])
+
+    def test_new_benchmarks_ignored(self):
+        self.assertEqual(
+            compare(results(), results(entry_get=(10.0, 'lower'))), [])
@@ -0,0 +1,121 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for making many changes at once."""
+
+import shutil
+import tempfile
+import threading
+import unittest
+
+from lazr.restfulclient.errors import HTTPError
+
+from launchpadlib.bulk import bulk_write
+from launchpadlib.credentials import (
+    AnonymousAccessToken,
+    Credentials,
+    )
+from launchpadlib.testing.webservice import FakeWebService
+
+
+class TestBulkWrite(unittest.TestCase):
+
+    def setUp(self):
+        self.web_service = FakeWebService()
+        self.addCleanup(self.web_service.cleanup)
+        for i in range(1, 7):
+            self.web_service.add_entry(
+                'bugs/%d' % i, 'bug', id=i, title='Bug %d' % i)
+        self.launchpad = self.web_service.login()
+
+    def modified_bugs(self):
+        bugs = [self.launchpad.bugs[i] for i in range(1, 7)]
+        for bug in bugs:
+            bug.title = 'New title %d' % bug.id
+        return bugs
+
+    def test_saves_entries(self):
+        bugs = self.modified_bugs()
+        results = bulk_write(bugs)
+        self.assertEqual([result.item for result in results], bugs)
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(
+            [self.launchpad.bugs[i].title for i in range(1, 7)],
+            ['New title %d' % i for i in range(1, 7)])
+
+    def test_failures_are_per_item(self):
+        bugs = self.modified_bugs()
+        # Someone else changes bug 3 in the meantime.
+        self.web_service.update_entry('bugs/3', title='Conflict')
+        results = bulk_write(bugs)
+        self.assertEqual(
+            [result.succeeded for result in results],
+            [True, True, False, True, True, True])
+        self.assertTrue(isinstance(results[2].error, HTTPError))
+        self.assertEqual(results[2].error.response.status, 412)
+        self.assertEqual(self.launchpad.bugs[3].title, 'Conflict')
+        self.assertEqual(self.launchpad.bugs[4].title, 'New title 4')
+
+    def test_progress(self):
+        calls = []
+        bulk_write(
+            self.modified_bugs(), max_workers=2,
+            progress=lambda done, total, result: calls.append(
+                (done, total, result.succeeded)))
+        self.assertEqual(calls, [(i, 6, True) for i in range(1, 7)])
+
+    def test_named_operations(self):
+        messages = []
+
+        def new_message(params):
+            messages.append(params['content'])
+            return {}
+        for i in (1, 2):
+            self.web_service.add_operation(
+                'bugs/%d' % i, 'newMessage', new_message)
+        bugs = [self.launchpad.bugs[i] for i in (1, 2)]
+        results = bulk_write(
+            [(bug, 'newMessage', {'content': 'Fixed.'}) for bug in bugs] +
+            [(self.launchpad.bugs[3], 'noSuchOperation')])
+        self.assertEqual(
+            [result.succeeded for result in results], [True, True, False])
+        self.assertTrue(isinstance(results[2].error, AttributeError))
+        self.assertEqual(messages, ['"Fixed."', '"Fixed."'])
+
+    def test_serial_without_connection_pool(self):
+        # Without a pool, threads would share httplib2's connections,
+        # so only one write is made at a time.
+        class Unpooled(self.web_service.launchpad_class):
+            @classmethod
+            def connection_pool_factory(cls):
+                return None
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        self.launchpad = Unpooled(
+            Credentials('test', access_token=AnonymousAccessToken()),
+            None, None, service_root=self.web_service.service_root,
+            cache=cache)
+        bugs = self.modified_bugs()
+        original_respond = self.web_service.respond
+        threads = set()
+
+        def respond(method, url, headers=None, body=None):
+            threads.add(threading.current_thread())
+            return original_respond(method, url, headers, body)
+        self.web_service.respond = respond
+        results = bulk_write(bugs)
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(len(threads), 1)
@@ -0,0 +1,156 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for keeping the cache directory within its limits."""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from launchpadlib.cachemanager import (
+    CacheManager,
+    ManagedRepresentationCache,
+    )
+from launchpadlib.testing.webservice import FakeWebService
+
+
+class TestCacheManager(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.now = time.time()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def make_entry(self, name, size=10, age=0):
+        path = os.path.join(self.cache_dir, name)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        os.utime(path, (self.now - age, self.now - age))
+        return path
+
+    def remaining(self):
+        return sorted(name for name in os.listdir(self.cache_dir)
+                      if not name.startswith('.'))
+
+    def test_within_limits(self):
+        for name in 'abc':
+            self.make_entry(name)
+        manager = CacheManager(self.cache_dir, max_entries=3)
+        self.assertEqual(manager.prune(), 0)
+        self.assertEqual(manager.usage(), (3, 30))
+
+    def test_lru_entry_limit(self):
+        # The least recently used entries are removed until the cache
+        # is down to the low water mark.
+        for age, name in enumerate('edcba'):
+            self.make_entry(name, age=age * 100)
+        manager = CacheManager(self.cache_dir, max_entries=4, low_water=0.5)
+        self.assertEqual(manager.prune(), 3)
+        self.assertEqual(self.remaining(), ['d', 'e'])
+
+    def test_lru_touch(self):
+        old = self.make_entry('old', age=200)
+        self.make_entry('new', age=100)
+        manager = CacheManager(self.cache_dir, max_entries=1, low_water=1)
+        manager.touch(old)
+        manager.prune()
+        self.assertEqual(self.remaining(), ['old'])
+
+    def test_byte_limit(self):
+        self.make_entry('big', size=100, age=100)
+        self.make_entry('small', size=10)
+        manager = CacheManager(self.cache_dir, max_bytes=50)
+        self.assertEqual(manager.prune(), 1)
+        self.assertEqual(self.remaining(), ['small'])
+
+    def test_lfu(self):
+        popular = self.make_entry('popular', age=200)
+        self.make_entry('unpopular', age=100)
+        manager = CacheManager(
+            self.cache_dir, max_entries=1, low_water=1,
+            policy=CacheManager.LFU)
+        manager.touch(popular)
+        manager.prune()
+        self.assertEqual(self.remaining(), ['popular'])
+
+    def test_lfu_counts_are_kept_between_runs(self):
+        popular = self.make_entry('popular', age=200)
+        self.make_entry('unpopular', age=100)
+        manager = CacheManager(self.cache_dir, policy=CacheManager.LFU)
+        manager.touch(popular)
+        manager.prune()
+        manager = CacheManager(
+            self.cache_dir, max_entries=1, low_water=1,
+            policy=CacheManager.LFU)
+        manager.prune()
+        self.assertEqual(self.remaining(), ['popular'])
+
+    def test_temporary_files_are_left_alone(self):
+        self.make_entry('.temp1234', age=1000)
+        self.make_entry('a')
+        manager = CacheManager(self.cache_dir, max_entries=1, low_water=0)
+        manager.prune()
+        self.assertTrue(
+            os.path.exists(os.path.join(self.cache_dir, '.temp1234')))
+
+    def test_maybe_prune_is_throttled(self):
+        manager = CacheManager(self.cache_dir, max_entries=10)
+        manager.maybe_prune().join()
+        self.assertEqual(manager.maybe_prune(), None)
+        manager.prune_interval = 0
+        self.assertNotEqual(manager.maybe_prune(), None)
+
+    def test_unknown_policy(self):
+        self.assertRaises(
+            ValueError, CacheManager, self.cache_dir, policy='fifo')
+
+
+class TestLaunchpadCacheManager(unittest.TestCase):
+
+    def setUp(self):
+        self.web_service = FakeWebService()
+        self.addCleanup(self.web_service.cleanup)
+        for i in range(1, 6):
+            self.web_service.add_entry('bugs/%d' % i, 'bug', id=i)
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_cache_is_managed(self):
+        launchpad = self.web_service.login(cache=self.cache_dir)
+        self.assertTrue(isinstance(
+            launchpad._browser._connection.cache,
+            ManagedRepresentationCache))
+        self.assertEqual(
+            launchpad.cache_manager.directory, self.cache_dir)
+
+    def test_writes_prompt_pruning(self):
+        launchpad = self.web_service.login(cache=self.cache_dir)
+        manager = launchpad.cache_manager
+        # Let the pruning started at login finish first.
+        manager._pruning.join()
+        manager.max_entries = 3
+        pruned = []
+        manager.prune_in_background = lambda: pruned.append(manager.prune())
+        for i in range(1, 6):
+            launchpad.bugs[i]
+        self.assertTrue(sum(pruned) > 0)
+        self.assertTrue(manager.usage()[0] <= 3)
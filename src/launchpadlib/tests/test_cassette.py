@@ -0,0 +1,130 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for recording and replaying HTTP traffic."""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from launchpadlib.credentials import (
+    AnonymousAccessToken,
+    Credentials,
+    )
+from launchpadlib.launchpad import Launchpad
+from launchpadlib.testing.cassette import (
+    Cassette,
+    UnrecordedRequest,
+    )
+from launchpadlib.testing.webservice import FakeWebService
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'session.cassette')
+        self.web_service = FakeWebService()
+        self.addCleanup(self.web_service.cleanup)
+        for i in (1, 2):
+            self.web_service.add_entry(
+                'bugs/%d' % i, 'bug', id=i, title='Bug %d' % i)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def login(self, cassette, base=Launchpad, cache=None):
+        if cache is None:
+            cache = tempfile.mkdtemp(dir=self.temp_dir)
+        credentials = Credentials(
+            'test', access_token=AnonymousAccessToken())
+        return cassette.launchpad_class(base)(
+            credentials, None, None,
+            service_root=self.web_service.service_root,
+            version=self.web_service.version, cache=cache)
+
+    def record(self, cache=None):
+        """Record a session that looks at bug 1."""
+        with Cassette(self.path) as cassette:
+            self.assertEqual(cassette.mode, Cassette.RECORD)
+            launchpad = self.login(
+                cassette, self.web_service.launchpad_class, cache)
+            self.assertEqual(launchpad.bugs[1].title, 'Bug 1')
+        return cassette
+
+    def test_record(self):
+        cassette = self.record()
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(
+            len(cassette.interactions), len(self.web_service.requests))
+        # The WADL is recorded too.
+        self.assertTrue(any(
+            interaction['headers'].get('content-type') ==
+            'application/vnd.sun.wadl+xml'
+            for interaction in cassette.interactions))
+
+    def test_replay(self):
+        self.record()
+        requests = len(self.web_service.requests)
+        cassette = Cassette(self.path)
+        self.assertEqual(cassette.mode, Cassette.REPLAY)
+        # A plain Launchpad object, with nowhere to send requests but
+        # the cassette.
+        launchpad = self.login(cassette)
+        self.assertEqual(launchpad.bugs[1].title, 'Bug 1')
+        self.assertEqual(len(self.web_service.requests), requests)
+
+    def test_unrecorded_request(self):
+        self.record()
+        launchpad = self.login(Cassette(self.path))
+        self.assertRaises(UnrecordedRequest, lambda: launchpad.bugs[2])
+
+    def test_conditional_request_gets_full_response(self):
+        # Replaying with a warm cache makes conditional requests that
+        # weren't recorded, and the full responses stand in for them.
+        cache = tempfile.mkdtemp(dir=self.temp_dir)
+        self.record(cache)
+        launchpad = self.login(Cassette(self.path), cache=cache)
+        self.assertEqual(launchpad.bugs[1].title, 'Bug 1')
+
+    def test_replay_conditional_request(self):
+        self.record()
+        cassette = Cassette(self.path)
+        bug_url = self.web_service.url_for('bugs/1')
+        response, content = cassette.replay(
+            'GET', bug_url, None,
+            {'Accept': 'application/json', 'If-None-Match': '"etag"'})
+        self.assertEqual(response.status, 200)
+        self.assertTrue(b'Bug 1' in content)
+
+    def test_media_types_kept_apart(self):
+        # The service root's WADL and JSON have the same URL.
+        self.record()
+        cassette = Cassette(self.path)
+        for accept in ('application/json', 'application/vnd.sun.wadl+xml'):
+            response, content = cassette.replay(
+                'GET', self.web_service.root_url, None, {'Accept': accept})
+            self.assertEqual(response['content-type'], accept)
+
+    def test_no_credentials_recorded(self):
+        self.record()
+        with gzip.open(self.path, 'rb') as cassette_file:
+            self.assertFalse(b'oauth_' in cassette_file.read())
+
+    def test_unknown_mode(self):
+        self.assertRaises(ValueError, Cassette, self.path, mode='rewind')
@@ -0,0 +1,178 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the connection pool."""
+
+import threading
+import unittest
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+from launchpadlib.connections import (
+    ConnectionPool,
+    PooledHttp,
+    )
+
+
+class FakeConnection:
+    """Something that can be closed, like a connection."""
+
+    def __init__(self):
+        self.sock = object()
+
+    def close(self):
+        self.sock = None
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests for the ConnectionPool class."""
+
+    def test_empty_pool_has_nothing_to_offer(self):
+        pool = ConnectionPool()
+        self.assertEqual(pool.acquire('http:example.com'), None)
+
+    def test_released_connection_is_reused(self):
+        pool = ConnectionPool()
+        connection = FakeConnection()
+        pool.created('http:example.com', connection)
+        pool.release('http:example.com', connection)
+        self.assertEqual(pool.acquire('http:example.com'), connection)
+        # But only for the same host.
+        self.assertEqual(pool.acquire('http:example.org'), None)
+
+    def test_full_pool_closes_connections(self):
+        pool = ConnectionPool(max_size=1)
+        first, second = FakeConnection(), FakeConnection()
+        for connection in (first, second):
+            pool.created('http:example.com', connection)
+        pool.release('http:example.com', first)
+        pool.release('http:example.com', second)
+        self.assertNotEqual(first.sock, None)
+        self.assertEqual(second.sock, None)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+    def test_idle_connections_expire(self):
+        pool = ConnectionPool(idle_timeout=-1)
+        connection = FakeConnection()
+        pool.created('http:example.com', connection)
+        pool.release('http:example.com', connection)
+        self.assertEqual(pool.acquire('http:example.com'), None)
+        self.assertEqual(connection.sock, None)
+        self.assertEqual(pool.stats()['expired'], 1)
+
+    def test_stats(self):
+        pool = ConnectionPool()
+        connection = FakeConnection()
+        pool.created('http:example.com', connection)
+        self.assertEqual(pool.stats()['in_use'], 1)
+        pool.release('http:example.com', connection)
+        pool.acquire('http:example.com')
+        self.assertEqual(
+            pool.stats(),
+            dict(idle=0, in_use=1, created=1, reused=1, expired=0,
+                 discarded=0))
+
+    def test_clear(self):
+        pool = ConnectionPool()
+        connection = FakeConnection()
+        pool.created('http:example.com', connection)
+        pool.release('http:example.com', connection)
+        pool.clear()
+        self.assertEqual(connection.sock, None)
+        self.assertEqual(pool.stats()['idle'], 0)
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Serve a tiny document over a persistent connection."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """A server that can keep many connections open at once."""
+
+    daemon_threads = True
+
+
+class TestPooledHttp(unittest.TestCase):
+    """Make real requests through a pool, against a local server."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.url = 'http://127.0.0.1:%d/' % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reused_across_http_objects(self):
+        pool = ConnectionPool()
+        for i in range(3):
+            response, content = PooledHttp(pool).request(self.url)
+            self.assertEqual(content, b'ok')
+        stats = pool.stats()
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['reused'], 2)
+        self.assertEqual(stats['idle'], 1)
+        pool.clear()
+
+    def test_threads_get_their_own_connections(self):
+        pool = ConnectionPool()
+        http = PooledHttp(pool)
+        errors = []
+
+        def fetch():
+            try:
+                for i in range(5):
+                    http.request(self.url)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=fetch) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        stats = pool.stats()
+        self.assertEqual(stats['in_use'], 0)
+        self.assertEqual(stats['created'] + stats['reused'], 20)
+        pool.clear()
+
+    def test_no_pool(self):
+        # Without a pool, PooledHttp is a plain httplib2 Http.
+        http = PooledHttp()
+        response, content = http.request(self.url)
+        self.assertEqual(content, b'ok')
+        self.assertEqual(len(http.connections), 1)
+        http.close()
@@ -17,6 +17,8 @@
 """Tests for the credential store classes."""
 
 import os
+import shutil
+import stat
 import tempfile
 import unittest
 
@@ -37,6 +39,9 @@ from launchpadlib.credentials import (
     AccessToken,
     Credentials,
     KeyringCredentialStore,
+    LayeredCredentialStore,
+    MemoryCredentialStore,
+    PrivateFileCredentialStore,
     UnencryptedFileCredentialStore,
 )
 
@@ -202,3 +207,117 @@ class TestKeyringCredentialStore(CredentialStoreTestCase):
             self.store.save(credential, "unique key")
             credential2 = self.store.load("unique key")
             self.assertIsNone(credential2)
+
+
+class TestMemoryCredentialStore(CredentialStoreTestCase):
+    """Tests for the MemoryCredentialStore class."""
+
+    def test_save_and_load(self):
+        store = MemoryCredentialStore()
+        self.assertIsNone(store.load("unique key"))
+        credential = self.make_credential("consumer key")
+        store.save(credential, "unique key")
+        credential.access_token = None
+        credential2 = store.load("unique key")
+        self.assertEqual(credential2.access_token.key, "consumer key")
+
+
+class TestPrivateFileCredentialStore(CredentialStoreTestCase):
+    """Tests for the PrivateFileCredentialStore class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.directory = os.path.join(self.temp_dir, 'credentials')
+        self.store = PrivateFileCredentialStore(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_save_and_load(self):
+        self.assertIsNone(self.store.load("unique key"))
+        self.store.save(self.make_credential("consumer key"), "unique key")
+        self.store.save(self.make_credential("other key"), "other")
+        self.assertEqual(
+            self.store.load("unique key").access_token.key, "consumer key")
+        self.assertEqual(
+            self.store.load("other").access_token.key, "other key")
+
+    def test_files_are_private(self):
+        self.store.save(self.make_credential("consumer key"), "unique key")
+        for name in os.listdir(self.directory):
+            mode = os.stat(os.path.join(self.directory, name)).st_mode
+            self.assertEqual(stat.S_IMODE(mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(self.directory).st_mode), 0o700)
+
+    def test_readable_file_ignored(self):
+        self.store.save(self.make_credential("consumer key"), "unique key")
+        [name] = os.listdir(self.directory)
+        os.chmod(os.path.join(self.directory, name), 0o644)
+        self.assertIsNone(self.store.load("unique key"))
+
+    def test_corrupted_file_handled(self):
+        self.store.save(self.make_credential("consumer key"), "unique key")
+        [name] = os.listdir(self.directory)
+        with open(os.path.join(self.directory, name), 'w') as f:
+            f.write("bad")
+        self.assertIsNone(self.store.load("unique key"))
+
+
+class FailingCredentialStore(MemoryCredentialStore):
+    """A store that can't save anything."""
+
+    def do_save(self, credentials, unique_key):
+        raise IOError("Disk full")
+
+
+class TestLayeredCredentialStore(CredentialStoreTestCase):
+    """Tests for the LayeredCredentialStore class."""
+
+    def setUp(self):
+        self.memory = MemoryCredentialStore()
+        self.keyring = InMemoryKeyring()
+        self.store = LayeredCredentialStore(
+            [self.memory, KeyringCredentialStore()])
+
+    def test_save_goes_to_every_store(self):
+        with fake_keyring(self.keyring):
+            self.store.save(self.make_credential("consumer key"), "unique key")
+            self.assertEqual(
+                self.memory.load("unique key").access_token.key,
+                "consumer key")
+            self.assertEqual(
+                KeyringCredentialStore().load("unique key").access_token.key,
+                "consumer key")
+
+    def test_load_fills_faster_stores(self):
+        with fake_keyring(self.keyring):
+            KeyringCredentialStore().save(
+                self.make_credential("consumer key"), "unique key")
+            self.assertEqual(
+                self.store.load("unique key").access_token.key,
+                "consumer key")
+        # The second time, the keyring isn't needed.
+        self.assertEqual(
+            self.store.load("unique key").access_token.key, "consumer key")
+
+    def test_not_found(self):
+        with fake_keyring(self.keyring):
+            self.assertIsNone(self.store.load("unique key"))
+
+    def test_failed_save(self):
+        failed = []
+        store = LayeredCredentialStore(
+            [FailingCredentialStore(), self.memory],
+            credential_save_failed=lambda: failed.append(True))
+        store.save(self.make_credential("consumer key"), "unique key")
+        # The other stores are still saved to.
+        self.assertEqual(failed, [True])
+        self.assertEqual(
+            self.memory.load("unique key").access_token.key, "consumer key")
+
+    def test_failed_fill_ignored(self):
+        store = LayeredCredentialStore(
+            [FailingCredentialStore(), self.memory])
+        self.memory.save(self.make_credential("consumer key"), "unique key")
+        self.assertEqual(
+            store.load("unique key").access_token.key, "consumer key")
@@ -0,0 +1,120 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the in-memory entry cache."""
+
+import unittest
+
+import httplib2
+
+from launchpadlib.entrycache import EntryCache
+from launchpadlib.testing.webservice import FakeWebService
+
+
+URL = 'https://api.launchpad.net/1.0/bugs/1'
+JSON = 'application/json'
+
+
+def bug_response(title='Bug 1'):
+    content = (
+        '{"resource_type_link": "https://api.launchpad.net/1.0/#bug",'
+        ' "title": "%s"}' % title).encode('utf-8')
+    return httplib2.Response(
+        {'status': '200', 'content-type': JSON}), content
+
+
+class TestEntryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.cache = EntryCache(clock=lambda: self.now)
+
+    def test_store_and_get(self):
+        self.assertEqual(self.cache.get(URL, JSON), None)
+        response, content = bug_response()
+        self.cache.store(URL, JSON, response, content)
+        cached_response, cached_content = self.cache.get(URL, JSON)
+        self.assertEqual(cached_response.status, 200)
+        self.assertEqual(cached_content, content)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_media_types_are_kept_apart(self):
+        self.cache.store(URL, JSON, *bug_response())
+        self.assertEqual(self.cache.get(URL, 'application/xhtml+xml'), None)
+
+    def test_ttl(self):
+        self.cache.store(URL, JSON, *bug_response())
+        self.now += 59
+        self.assertNotEqual(self.cache.get(URL, JSON), None)
+        self.now += 2
+        self.assertEqual(self.cache.get(URL, JSON), None)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_unlisted_types_are_not_kept(self):
+        self.cache = EntryCache(ttls={'person': 60})
+        self.cache.store(URL, JSON, *bug_response())
+        self.assertEqual(self.cache.get(URL, JSON), None)
+
+    def test_errors_are_not_kept(self):
+        response, content = bug_response()
+        response.status = 404
+        self.cache.store(URL, JSON, response, content)
+        self.assertEqual(self.cache.get(URL, JSON), None)
+
+    def test_memory_limit(self):
+        response, content = bug_response()
+        self.cache.max_bytes = len(content) * 2
+        for i in range(3):
+            self.cache.store(URL + str(i), JSON, response, content)
+        self.assertEqual(self.cache.get(URL + '0', JSON), None)
+        self.assertNotEqual(self.cache.get(URL + '2', JSON), None)
+        self.assertEqual(self.cache.size, len(content) * 2)
+
+    def test_invalidate(self):
+        self.cache.store(URL, JSON, *bug_response())
+        self.cache.invalidate(URL)
+        self.assertEqual(self.cache.get(URL, JSON), None)
+        self.assertEqual(self.cache.size, 0)
+
+
+class TestLaunchpadEntryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.web_service = FakeWebService()
+        self.addCleanup(self.web_service.cleanup)
+        self.web_service.add_entry('bugs/1', 'bug', id=1, title='Bug 1')
+        self.launchpad = self.web_service.login()
+        self.launchpad.entry_cache = EntryCache()
+
+    def bug_requests(self):
+        return [request for request in self.web_service.requests
+                if request[1].endswith('/bugs/1')]
+
+    def test_repeated_lookups_use_the_cache(self):
+        self.assertEqual(self.launchpad.bugs[1].title, 'Bug 1')
+        self.assertEqual(self.launchpad.bugs[1].title, 'Bug 1')
+        self.assertEqual(len(self.bug_requests()), 1)
+
+    def test_changes_invalidate(self):
+        bug = self.launchpad.bugs[1]
+        bug.title = 'New title'
+        bug.lp_save()
+        self.assertEqual(self.launchpad.bugs[1].title, 'New title')
+
+    def test_refresh_asks_the_server(self):
+        bug = self.launchpad.bugs[1]
+        bug.lp_refresh()
+        self.assertEqual(len(self.bug_requests()), 2)
@@ -0,0 +1,118 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for spreading work over worker processes."""
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from launchpadlib.fanout import (
+    process_map,
+    SessionBootstrap,
+    )
+from launchpadlib.sqlitecache import SQLiteCache
+from launchpadlib.testing.webservice import (
+    FakeWebService,
+    FakeWebServiceLaunchpad,
+    )
+
+
+# Worker processes import this module, and so get the same fixture.
+WEB_SERVICE = FakeWebService()
+for bug_id in range(1, 6):
+    WEB_SERVICE.add_entry(
+        'bugs/%d' % bug_id, 'bug', id=bug_id, title='Bug %d' % bug_id)
+
+
+class WorkerLaunchpad(FakeWebServiceLaunchpad):
+    """A Launchpad class that worker processes can find."""
+
+    web_service = WEB_SERVICE
+
+
+def bug_title(launchpad, bug_id):
+    return launchpad.bugs[bug_id].title, os.getpid()
+
+
+class TestSessionBootstrap(unittest.TestCase):
+
+    def setUp(self):
+        self.launchpadlib_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.launchpadlib_dir)
+
+    def login(self, **kwargs):
+        return WorkerLaunchpad.login_anonymously(
+            'test', service_root=WEB_SERVICE.service_root,
+            launchpadlib_dir=self.launchpadlib_dir, **kwargs)
+
+    def test_round_trip(self):
+        launchpad = self.login()
+        bootstrap = pickle.loads(pickle.dumps(
+            SessionBootstrap.from_launchpad(launchpad)))
+        self.assertEqual(bootstrap.launchpad_class, WorkerLaunchpad)
+        self.assertEqual(
+            bootstrap.cache,
+            os.path.join(self.launchpadlib_dir, 'api.launchpad.net', 'cache'))
+        self.assertEqual(
+            bootstrap.wadl_cache,
+            os.path.join(self.launchpadlib_dir, 'api.launchpad.net', 'wadl'))
+        copy = bootstrap.login()
+        self.assertEqual(copy.bugs[1].title, 'Bug 1')
+        self.assertEqual(
+            copy.credentials.consumer.key, launchpad.credentials.consumer.key)
+
+    def test_sqlite_cache(self):
+        launchpad = self.login(cache='sqlite')
+        bootstrap = SessionBootstrap.from_launchpad(launchpad)
+        self.assertEqual(bootstrap.cache, None)
+        copy = bootstrap.login()
+        self.assertTrue(isinstance(
+            copy._browser._connection.cache, SQLiteCache))
+
+    def test_lazy(self):
+        launchpad = self.login(lazy=True)
+        bootstrap = SessionBootstrap.from_launchpad(launchpad)
+        self.assertTrue('_deferred_init' in launchpad.__dict__)
+        self.assertTrue(bootstrap.cache.endswith('cache'))
+
+
+class TestProcessMap(unittest.TestCase):
+
+    def setUp(self):
+        self.launchpadlib_dir = tempfile.mkdtemp()
+        self.launchpad = WorkerLaunchpad.login_anonymously(
+            'test', service_root=WEB_SERVICE.service_root,
+            launchpadlib_dir=self.launchpadlib_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.launchpadlib_dir)
+
+    def test_process_map(self):
+        results = process_map(
+            self.launchpad, bug_title, [3, 1, 2], max_workers=2)
+        self.assertEqual(
+            [title for title, pid in results], ['Bug 3', 'Bug 1', 'Bug 2'])
+        self.assertFalse(os.getpid() in [pid for title, pid in results])
+
+    def test_exceptions_are_raised(self):
+        self.assertRaises(
+            Exception, process_map, self.launchpad, bug_title, [1, 99],
+            max_workers=1)
@@ -18,6 +18,7 @@
 
 from collections import deque
 import tempfile
+import threading
 import unittest
 
 try:
@@ -27,9 +28,13 @@ except ImportError:
     from simplejson import dumps, JSONDecodeError
 
 from launchpadlib.errors import Unauthorized
-from launchpadlib.credentials import UnencryptedFileCredentialStore
+from launchpadlib.credentials import (
+    AccessToken,
+    UnencryptedFileCredentialStore,
+    )
 from launchpadlib.launchpad import (
     Launchpad,
+    _signing_token_key,
     LaunchpadOAuthAwareHttp,
     )
 from launchpadlib.testing.helpers import NoNetworkAuthorizationEngine
@@ -100,6 +105,11 @@ class SimulatedResponsesLaunchpad(Launchpad):
         return UnencryptedFileCredentialStore(
             tempfile.mkstemp()[1], credential_save_failed)
 
+    @classmethod
+    def wadl_cache_factory(cls, service_root_dir):
+        # Every test must see the WADL it simulates.
+        return None
+
 
 class SimulatedResponsesTestCase(unittest.TestCase):
     """Test cases that give fake responses to launchpad's HTTP requests."""
@@ -248,3 +258,110 @@ class TestTokenFailureDuringRequest(SimulatedResponsesTestCase):
         self.assertRaises(
             Unauthorized, SimulatedResponsesLaunchpad.login_with,
             'application name', authorization_engine=self.engine)
+
+    def test_too_many_errors(self):
+        """A request is only retried with a new token so many times."""
+        SimulatedResponsesLaunchpad.responses = [
+            Response(401, b"Invalid token."),
+            Response(401, b"Invalid token."),
+            Response(401, b"Invalid token.")]
+        self.assertRaises(
+            Unauthorized, SimulatedResponsesLaunchpad.login_with,
+            'application name', authorization_engine=self.engine)
+        self.assertEqual(
+            self.engine.access_tokens_obtained,
+            1 + LaunchpadOAuthAwareHttp.MAX_REAUTHORIZATIONS)
+
+
+class NewTokenAuthorizationEngine(NoNetworkAuthorizationEngine):
+    """Hand out a different access token every time."""
+
+    def make_end_user_authorize_token(self, credentials, request_token):
+        self.access_tokens_obtained += 1
+        credentials.access_token = AccessToken(
+            'access_key:%d' % self.access_tokens_obtained,
+            'access_secret:168')
+
+
+class TestConcurrentTokenFailures(SimulatedResponsesTestCase):
+    """Threads that find the token is bad share one new token."""
+
+    def setUp(self):
+        super(TestConcurrentTokenFailures, self).setUp()
+        self.engine = NewTokenAuthorizationEngine(
+            'http://api.example.com/', 'application name')
+        self.launchpad = self.launchpad_with_responses(
+            Response(200, SIMPLE_WADL),
+            Response(200, SIMPLE_JSON))
+        self.http = self.launchpad._browser._connection
+
+    def test_one_thread_reauthorizes(self):
+        bad_key = self.launchpad.credentials.access_token.key
+        tokens_obtained = self.engine.access_tokens_obtained
+        threads = [
+            threading.Thread(target=self.http._reauthorize, args=(bad_key,))
+            for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            self.engine.access_tokens_obtained, tokens_obtained + 1)
+        self.assertNotEqual(
+            self.launchpad.credentials.access_token.key, bad_key)
+
+    def test_unknown_bad_token(self):
+        # If it isn't known which token was rejected, the current one
+        # is replaced.
+        tokens_obtained = self.engine.access_tokens_obtained
+        self.http._reauthorize(None)
+        self.assertEqual(
+            self.engine.access_tokens_obtained, tokens_obtained + 1)
+
+    def test_requests_are_signed_while_reauthorizing(self):
+        # Authorizing a new token can take minutes, while the end-user
+        # finds their browser. Other threads keep signing requests
+        # with the old token until then.
+        bad_key = self.launchpad.credentials.access_token.key
+        started = threading.Event()
+        authorized = threading.Event()
+        make_end_user_authorize_token = (
+            self.engine.make_end_user_authorize_token)
+
+        def slowly_authorize_token(credentials, request_token):
+            started.set()
+            authorized.wait()
+            make_end_user_authorize_token(credentials, request_token)
+        self.engine.make_end_user_authorize_token = slowly_authorize_token
+        thread = threading.Thread(
+            target=self.http._reauthorize, args=(bad_key,))
+        thread.start()
+        started.wait()
+        try:
+            headers = {}
+            self.launchpad.credentials.authorizeRequest(
+                'http://api.example.com/', 'GET', None, headers)
+            self.assertEqual(_signing_token_key(headers), bad_key)
+        finally:
+            authorized.set()
+            thread.join()
+        headers = {}
+        self.launchpad.credentials.authorizeRequest(
+            'http://api.example.com/', 'GET', None, headers)
+        self.assertNotEqual(_signing_token_key(headers), bad_key)
+
+    def test_declined_authorization(self):
+        # If no new token is authorized, the old one stays, and the
+        # request isn't retried.
+        bad_key = self.launchpad.credentials.access_token.key
+        self.engine.make_end_user_authorize_token = (
+            lambda credentials, request_token: None)
+        self.assertFalse(self.http._reauthorize(bad_key))
+        self.assertEqual(
+            self.launchpad.credentials.access_token.key, bad_key)
+
+    def test_signing_token_key(self):
+        self.assertEqual(_signing_token_key(
+            {'authorization': 'OAuth realm="API", oauth_token="key%3A1"'}),
+            'key:1')
+        self.assertEqual(_signing_token_key({}), None)
@@ -23,7 +23,10 @@ import os
 import shutil
 import socket
 import stat
+import subprocess
+import sys
 import tempfile
+import threading
 import unittest
 import warnings
 
@@ -31,6 +34,7 @@ from lazr.restfulclient.resource import ServiceRoot
 
 from launchpadlib.credentials import (
     AccessToken,
+    AnonymousAccessToken,
     Credentials,
     )
 
@@ -49,6 +53,7 @@ from launchpadlib.testing.helpers import (
 from launchpadlib.credentials import (
     KeyringCredentialStore,
     )
+from launchpadlib.testing.webservice import FakeWebService
 
 # A dummy service root for use in tests
 SERVICE_ROOT = "http://api.example.com/"
@@ -705,5 +710,238 @@ class TestMultipleSites(unittest.TestCase):
         self.assertNotEqual(application_key_1, application_key_2)
 
 
+class TestGetMany(unittest.TestCase):
+    """Tests for looking up many entries of a top-level collection."""
+
+    def setUp(self):
+        self.web_service = FakeWebService()
+        self.addCleanup(self.web_service.cleanup)
+        for i in range(1, 6):
+            self.web_service.add_entry('bugs/%d' % i, 'bug', id=i)
+        self.web_service.add_entry('firefox', 'project', name='firefox')
+        self.launchpad = self.web_service.login()
+
+    def test_results_are_in_order(self):
+        bugs = self.launchpad.bugs.get_many([4, 2, 5, 1], max_workers=3)
+        self.assertEqual(list(bugs.keys()), [4, 2, 5, 1])
+        self.assertEqual([bug.id for bug in bugs.values()], [4, 2, 5, 1])
+
+    def test_keys_are_deduplicated(self):
+        del self.web_service.requests[:]
+        bugs = self.launchpad.bugs.get_many([3, 3, 1, 3])
+        self.assertEqual(list(bugs.keys()), [3, 1])
+        self.assertEqual(len(self.web_service.requests), 2)
+
+    def test_missing_keys_are_reported(self):
+        bugs = self.launchpad.bugs.get_many([1, 99, 2, 98])
+        self.assertEqual(list(bugs.keys()), [1, 2])
+        self.assertEqual(bugs.missing, [99, 98])
+        self.assertEqual(bugs.errors, {})
+
+    def test_other_errors_are_reported(self):
+        original_respond = self.web_service.respond
+
+        def respond(method, url, headers=None, body=None):
+            if url.endswith('bugs/2'):
+                return 401, {}, b'Private.'
+            return original_respond(method, url, headers, body)
+        self.web_service.respond = respond
+        bugs = self.launchpad.bugs.get_many([1, 2])
+        self.assertEqual(list(bugs.keys()), [1])
+        self.assertEqual(list(bugs.errors.keys()), [2])
+        self.assertEqual(bugs.errors[2].response.status, 401)
+
+    def test_pillars(self):
+        projects = self.launchpad.projects.get_many(['firefox', 'nope'])
+        self.assertEqual(projects['firefox'].name, 'firefox')
+        self.assertEqual(projects.missing, ['nope'])
+
+    def test_serial(self):
+        bugs = self.launchpad.bugs.get_many([2, 1], max_workers=1)
+        self.assertEqual(list(bugs.keys()), [2, 1])
+
+    def test_nothing_to_look_up(self):
+        self.assertEqual(len(self.launchpad.bugs.get_many([])), 0)
+
+    def test_serial_without_connection_pool(self):
+        # Without a pool, threads would share httplib2's connections,
+        # so the lookups are all made from the calling thread.
+        class Unpooled(self.web_service.launchpad_class):
+            @classmethod
+            def connection_pool_factory(cls):
+                return None
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        launchpad = Unpooled(
+            Credentials('test', access_token=AnonymousAccessToken()),
+            None, None, service_root=self.web_service.service_root,
+            cache=cache)
+        original_respond = self.web_service.respond
+        threads = set()
+
+        def respond(method, url, headers=None, body=None):
+            threads.add(threading.current_thread())
+            return original_respond(method, url, headers, body)
+        self.web_service.respond = respond
+        bugs = launchpad.bugs.get_many([1, 2, 3, 99])
+        self.assertEqual(list(bugs.keys()), [1, 2, 3])
+        self.assertEqual(bugs.missing, [99])
+        self.assertEqual(threads, set([threading.current_thread()]))
+
+
+class TestLazyLogin(unittest.TestCase):
+    """Tests for Launchpad objects that put off talking to the server."""
+
+    def setUp(self):
+        self.web_service = FakeWebService()
+        self.addCleanup(self.web_service.cleanup)
+        self.web_service.add_entry('bugs/1', 'bug', id=1, title='Bug 1')
+        self.web_service.add_entry('firefox', 'project', name='firefox')
+        self.launchpadlib_dir = tempfile.mkdtemp()
+        self.launchpad = self.web_service.launchpad_class.login_anonymously(
+            'test', service_root=self.web_service.service_root,
+            launchpadlib_dir=self.launchpadlib_dir, lazy=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.launchpadlib_dir)
+
+    def root_requests(self):
+        return [url for method, url in self.web_service.requests
+                if url == self.web_service.root_url]
+
+    def test_login_makes_no_requests(self):
+        self.assertEqual(self.web_service.requests, [])
+        self.assertEqual(
+            self.launchpad.credentials.consumer.key, 'test')
+
+    def test_known_collection_skips_service_root(self):
+        # Only the WADL is fetched from the service root's URL.
+        self.assertEqual(self.launchpad.bugs[1].title, 'Bug 1')
+        self.assertEqual(
+            self.launchpad.projects['firefox'].name, 'firefox')
+        self.assertEqual(len(self.root_requests()), 1)
+
+    def test_other_attributes_fetch_service_root(self):
+        self.launchpad.bugs
+        self.launchpad.distributions
+        self.assertEqual(len(self.root_requests()), 2)
+        # The real service root has replaced the partial one.
+        self.assertEqual(
+            self.launchpad.distributions_collection_link,
+            self.web_service.url_for('distributions'))
+
+    def test_other_attribute_first(self):
+        # If something else is used first, the service root is fetched
+        # along with the WADL.
+        self.launchpad.distributions
+        self.assertEqual(len(self.root_requests()), 2)
+        self.assertEqual(self.launchpad.bugs[1].id, 1)
+        self.assertEqual(len(self.root_requests()), 2)
+
+    def test_not_lazy_by_default(self):
+        self.web_service.launchpad_class.login_anonymously(
+            'test', service_root=self.web_service.service_root,
+            launchpadlib_dir=self.launchpadlib_dir)
+        self.assertEqual(len(self.root_requests()), 2)
+
+
+class TestEntryIdentity(unittest.TestCase):
+    """Entries found by following links know their names and IDs."""
+
+    def setUp(self):
+        self.web_service = FakeWebService()
+        self.addCleanup(self.web_service.cleanup)
+        ws = self.web_service
+        ws.add_entry('~salgado', 'person', name='salgado',
+                     display_name='Guilherme Salgado')
+        ws.add_entry('firefox', 'project', name='firefox',
+                     owner_link=ws.url_for('~salgado'))
+        ws.add_entry('bugs/1', 'bug', id=1, title='Bug 1',
+                     owner_link=ws.url_for('~salgado'))
+        self.launchpad = ws.login()
+        del ws.requests[:]
+
+    def test_person_name(self):
+        bug = self.launchpad.bugs[1]
+        del self.web_service.requests[:]
+        self.assertEqual(bug.owner.name, 'salgado')
+        self.assertEqual(
+            bug.owner.self_link, self.web_service.url_for('~salgado'))
+        self.assertEqual(self.web_service.requests, [])
+
+    def test_other_fields_are_fetched(self):
+        owner = self.launchpad.bugs(1).owner
+        self.assertEqual(owner.display_name, 'Guilherme Salgado')
+        self.assertEqual(
+            self.web_service.requests,
+            [('GET', self.web_service.url_for('bugs/1')),
+             ('GET', self.web_service.url_for('~salgado'))])
+
+    def test_bug_id(self):
+        self.assertEqual(self.launchpad.bugs(1).id, 1)
+        self.assertEqual(self.web_service.requests, [])
+
+    def test_pillar_name(self):
+        self.assertEqual(self.launchpad.projects('firefox').name, 'firefox')
+        self.assertEqual(self.web_service.requests, [])
+
+    def test_fetched_entries_use_their_representation(self):
+        bug = self.launchpad.bugs[1]
+        self.web_service.update_entry('bugs/1', id=2)
+        self.assertEqual(bug.id, 1)
+        bug.lp_refresh()
+        self.assertEqual(bug.id, 2)
+
+
+class TestImport(unittest.TestCase):
+    """Importing launchpadlib.launchpad should be quick."""
+
+    # Modules that only some Launchpad objects use, or that are only
+    # used to authorize tokens.
+    DEFERRED_MODULES = (
+        'concurrent.futures',
+        'keyring',
+        'launchpadlib.cachemanager',
+        'launchpadlib.metrics',
+        'launchpadlib.prefetch',
+        'launchpadlib.retry',
+        'launchpadlib.sqlitecache',
+        'launchpadlib.wadlcache',
+        'sqlite3',
+        'webbrowser',
+        )
+
+    def imported_modules(self, script):
+        """Run a script in a new interpreter, and list what it imported.
+
+        A new interpreter is needed, since this one has imported
+        everything.
+        """
+        script += "\nimport sys\nprint('\\n'.join(sorted(sys.modules)))\n"
+        # The new interpreter should find launchpadlib where this one
+        # did, even if it isn't installed.
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.check_output(
+            [sys.executable, '-c', script], env=env)
+        return set(output.decode('ascii').split())
+
+    def test_deferred_modules_not_imported(self):
+        imported = self.imported_modules("import launchpadlib.launchpad")
+        self.assertTrue('launchpadlib.launchpad' in imported)
+        self.assertEqual(
+            [name for name in self.DEFERRED_MODULES if name in imported], [])
+
+    def test_deferred_modules_imported_when_used(self):
+        imported = self.imported_modules(
+            "from launchpadlib.testing.webservice import FakeWebService\n"
+            "web_service = FakeWebService()\n"
+            "web_service.login()\n"
+            "web_service.cleanup()\n")
+        for name in (
+            'launchpadlib.cachemanager', 'launchpadlib.prefetch',
+            'launchpadlib.retry'):
+            self.assertTrue(name in imported, name)
+
+
 def test_suite():
     return unittest.TestLoader().loadTestsFromName(__name__)
@@ -0,0 +1,198 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for request metrics."""
+
+import unittest
+
+import httplib2
+
+from launchpadlib.metrics import (
+    RequestMetrics,
+    RequestRecord,
+    resource_type_of,
+    url_template,
+    )
+from launchpadlib.testing.webservice import FakeWebService
+
+
+class TestURLTemplate(unittest.TestCase):
+
+    def test_ids_and_names(self):
+        self.assertEqual(
+            url_template('https://api.launchpad.net/1.0/bugs/1'),
+            '/1.0/bugs/{id}')
+        self.assertEqual(
+            url_template('https://api.launchpad.net/1.0/~salgado/ppas'),
+            '/1.0/~{name}/ppas')
+
+    def test_pillars_and_names_below_them(self):
+        self.assertEqual(
+            url_template('https://api.launchpad.net/1.0/firefox'),
+            '/1.0/{pillar}')
+        self.assertEqual(
+            url_template('https://api.launchpad.net/1.0/firefox/trunk'),
+            '/1.0/{pillar}/{name}')
+        self.assertEqual(
+            url_template(
+                'https://api.launchpad.net/1.0/ubuntu/+source/firefox'),
+            '/1.0/{pillar}/+source/{name}')
+        self.assertEqual(
+            url_template(
+                'https://api.launchpad.net/1.0/firefox/+milestone/1.0'),
+            '/1.0/{pillar}/+milestone/{name}')
+        self.assertEqual(
+            url_template('https://api.launchpad.net/1.0/'
+                         '~team/+archive/ubuntu/ppa'),
+            '/1.0/~{name}/+archive/{name}/{name}')
+        self.assertEqual(
+            url_template(
+                'https://api.launchpad.net/1.0/ubuntu/jammy/all_milestones'),
+            '/1.0/{pillar}/{name}/all_milestones')
+
+    def test_collections_are_kept(self):
+        self.assertEqual(
+            url_template('https://api.launchpad.net/1.0/bugs/1/messages/2'),
+            '/1.0/bugs/{id}/messages/{id}')
+        self.assertEqual(
+            url_template('https://api.launchpad.net/1.0/ubuntu/series'),
+            '/1.0/{pillar}/series')
+        self.assertEqual(
+            url_template('https://api.launchpad.net/1.0/'),
+            '/1.0/')
+
+    def test_query(self):
+        self.assertEqual(
+            url_template('https://api.launchpad.net/1.0/firefox'
+                         '?ws.op=searchTasks&status=New&ws.start=75'),
+            '/1.0/{pillar}?ws.op=searchTasks')
+        self.assertEqual(
+            url_template('https://api.launchpad.net/1.0/bugs?ws.start=75'),
+            '/1.0/bugs')
+
+
+class TestResourceTypeOf(unittest.TestCase):
+
+    def response(self, content_type='application/json'):
+        return httplib2.Response(
+            {'status': '200', 'content-type': content_type})
+
+    def test_entry(self):
+        self.assertEqual(resource_type_of(
+            self.response(),
+            b'{"resource_type_link": "https://api/1.0/#bug", "id": 1}'),
+            'bug')
+
+    def test_page(self):
+        self.assertEqual(resource_type_of(
+            self.response(),
+            b'{"entries": [{"resource_type_link": "https://api/1.0/#bug"}],'
+            b' "resource_type_link": "https://api/1.0/#bugs-page-resource"}'),
+            'bugs-page-resource')
+
+    def test_not_json(self):
+        self.assertEqual(resource_type_of(
+            self.response('text/plain'),
+            b'"resource_type_link": "https://api/1.0/#bug"'), None)
+
+
+class TestRequestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = RequestMetrics()
+        for i in range(1, 4):
+            self.metrics.record(RequestRecord(
+                'GET', 'https://api.launchpad.net/1.0/bugs/%d' % i, 200,
+                0.5, response_bytes=100, resource_type='bug'))
+        self.metrics.record(RequestRecord(
+            'GET', 'https://api.launchpad.net/1.0/bugs/1', 401, 0.25,
+            oauth_retry=True))
+
+    def test_stats(self):
+        stats = self.metrics.stats()
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(stats[0]['template'], '/1.0/bugs/{id}')
+        self.assertEqual(stats[0]['count'], 3)
+        self.assertEqual(stats[0]['latency'], 1.5)
+        self.assertEqual(stats[0]['response_bytes'], 300)
+        self.assertEqual(stats[1]['status'], 401)
+        self.assertEqual(stats[1]['oauth_retries'], 1)
+
+    def test_listeners(self):
+        records = []
+        self.metrics.add_listener(records.append)
+        record = RequestRecord('GET', 'https://api/', 200, 0.1)
+        self.metrics.record(record)
+        self.assertEqual(records, [record])
+
+    def test_summary(self):
+        lines = self.metrics.summary().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('Method'))
+        self.assertEqual(
+            lines[1].split(),
+            ['GET', '/1.0/bugs/{id}', 'bug', '200', 'miss', '3', '1.500',
+             '500.0', '500.0', '0', '300', '0', '0'])
+
+    def test_prometheus(self):
+        text = self.metrics.prometheus()
+        self.assertIn('# TYPE launchpadlib_requests_total counter\n', text)
+        self.assertIn(
+            'launchpadlib_requests_total{method="GET",'
+            'template="/1.0/bugs/{id}",resource_type="bug",status="200",'
+            'cache="miss"} 3\n', text)
+        self.assertIn(
+            'launchpadlib_oauth_retries_total{method="GET",'
+            'template="/1.0/bugs/{id}",resource_type="",status="401",'
+            'cache="miss"} 1\n', text)
+
+    def test_reset(self):
+        self.metrics.reset()
+        self.assertEqual(self.metrics.stats(), [])
+
+
+class TestLaunchpadMetrics(unittest.TestCase):
+    """Requests made by a Launchpad object are recorded."""
+
+    def setUp(self):
+        self.web_service = FakeWebService()
+        self.addCleanup(self.web_service.cleanup)
+        self.web_service.add_entry('bugs/1', 'bug', id=1, title='Bug 1')
+        self.launchpad = self.web_service.login()
+        self.launchpad.request_metrics = RequestMetrics()
+        self.records = []
+        self.launchpad.request_metrics.add_listener(self.records.append)
+
+    def test_requests_are_recorded(self):
+        self.launchpad.bugs[1]
+        self.launchpad.bugs[1]
+        self.assertEqual(
+            [(record.method, record.status, record.cache,
+              record.resource_type) for record in self.records],
+            [('GET', 200, 'miss', 'bug'), ('GET', 304, 'revalidated', None)])
+        self.assertTrue(self.records[0].response_bytes > 0)
+
+    def test_patch_sends_bytes(self):
+        bug = self.launchpad.bugs[1]
+        bug.title = 'New title'
+        bug.lp_save()
+        record = self.records[-1]
+        self.assertEqual((record.method, record.status), ('PATCH', 209))
+        self.assertTrue(record.request_bytes > 0)
+
+    def test_not_recorded_by_default(self):
+        launchpad = self.web_service.login()
+        self.assertEqual(launchpad.request_metrics, None)
@@ -0,0 +1,234 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for collection read-ahead."""
+
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import httplib2
+
+from launchpadlib.credentials import (
+    AnonymousAccessToken,
+    Credentials,
+    )
+from launchpadlib import prefetch
+from launchpadlib.prefetch import (
+    next_collection_link,
+    PagePrefetcher,
+    )
+from launchpadlib.testing.webservice import FakeWebService
+
+
+def json_response(content, status=200):
+    return httplib2.Response(
+        {'status': str(status), 'content-type': 'application/json'}), content
+
+
+class TestNextCollectionLink(unittest.TestCase):
+
+    def test_link_found(self):
+        response, content = json_response(
+            b'{"total_size": 9, "next_collection_link": '
+            b'"http://api/bugs?ws.start=2", "entries": []}')
+        self.assertEqual(next_collection_link(response, content),
+                         'http://api/bugs?ws.start=2')
+
+    def test_last_page(self):
+        self.assertEqual(
+            next_collection_link(*json_response(b'{"entries": []}')), None)
+
+    def test_not_json(self):
+        response = httplib2.Response({'status': '200',
+                                      'content-type': 'text/plain'})
+        self.assertEqual(next_collection_link(
+            response, b'"next_collection_link": "http://api/"'), None)
+
+    def test_error(self):
+        self.assertEqual(next_collection_link(*json_response(
+            b'{"next_collection_link": "http://api/"}', status=500)), None)
+
+
+class TestPagePrefetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.fetched = []
+        self.prefetcher = PagePrefetcher(depth=2)
+
+    def tearDown(self):
+        self.prefetcher.close()
+
+    def request(self, url, headers):
+        """Serve an endless collection, a page at a time."""
+        self.fetched.append(url)
+        start = int(url.split('ws.start=')[1])
+        return json_response(
+            ('{"next_collection_link": "http://api/bugs?ws.start=%d"}'
+             % (start + 1)).encode('ascii'))
+
+    def deliver(self, url):
+        future = self.prefetcher.take(url, {})
+        if future is None:
+            response, content = self.request(url, {})
+        else:
+            response, content = future.result()
+        self.prefetcher.page_delivered(
+            self.request, url, {}, response, content)
+        return future is not None
+
+    def test_first_page_not_read_ahead(self):
+        self.prefetcher.page_delivered(
+            self.request, 'http://api/bugs', {}, *json_response(
+                b'{"next_collection_link": "http://api/bugs?ws.start=1"}'))
+        self.assertEqual(self.fetched, [])
+
+    def test_reads_ahead(self):
+        self.assertFalse(self.deliver('http://api/bugs?ws.start=1'))
+        for start in range(2, 6):
+            self.assertTrue(
+                self.deliver('http://api/bugs?ws.start=%d' % start))
+        self.prefetcher.close()
+        # Each page was fetched only once, and we never got more than
+        # two pages ahead.
+        self.assertEqual(len(self.fetched), len(set(self.fetched)))
+        self.assertTrue(len(self.fetched) <= 7)
+
+    def test_invalid_depth(self):
+        self.assertRaises(ValueError, PagePrefetcher, depth=0)
+
+    def test_workers_cannot_delay_exit(self):
+        self.deliver('http://api/bugs?ws.start=1')
+        self.assertTrue(self.deliver('http://api/bugs?ws.start=2'))
+        threads = self.prefetcher._workers.threads
+        self.assertTrue(threads)
+        self.assertTrue(all(thread.daemon for thread in threads))
+
+    def test_close_cancels_waiting_fetches(self):
+        workers = prefetch._Workers(1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def stall():
+            started.set()
+            release.wait()
+        running = workers.submit(stall)
+        waiting = workers.submit(self.fail, "Fetched after shutdown.")
+        started.wait()
+        threads = workers.shutdown()
+        self.assertTrue(waiting.cancelled())
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(running.done())
+
+    def test_exit_waits_a_bounded_time(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def stalled_request(url, headers):
+            self.fetched.append(url)
+            started.set()
+            release.wait()
+            return json_response(b'{}')
+        self.prefetcher.page_delivered(
+            stalled_request, 'http://api/bugs?ws.start=1', {},
+            *self.request('http://api/bugs?ws.start=1', {}))
+        started.wait()
+        # Leave other tests' prefetchers alone.
+        prefetchers = prefetch._prefetchers
+        prefetch._prefetchers = set([self.prefetcher])
+        exit_timeout = prefetch.EXIT_TIMEOUT
+        prefetch.EXIT_TIMEOUT = 0.1
+        try:
+            start = time.time()
+            prefetch._close_prefetchers()
+            self.assertTrue(time.time() - start < 1)
+        finally:
+            prefetch._prefetchers = prefetchers
+            prefetch.EXIT_TIMEOUT = exit_timeout
+            release.set()
+        fetched = len(self.fetched)
+        # No more pages are read ahead once the prefetcher is closed.
+        self.assertFalse(self.deliver('http://api/bugs?ws.start=2'))
+        self.assertEqual(len(self.fetched), fetched + 1)
+
+
+class TestCollectionReadAhead(unittest.TestCase):
+    """Iterate over collections of a `FakeWebService`."""
+
+    def setUp(self):
+        self.web_service = FakeWebService(page_size=2)
+        self.addCleanup(self.web_service.cleanup)
+        for i in range(1, 11):
+            self.web_service.add_entry(
+                'bugs/%d' % i, 'bug', id=i, title='Bug %d' % i)
+        self.cache = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache)
+
+    def page_requests(self):
+        return [url for method, url in self.web_service.requests
+                if 'ws.start' in url]
+
+    def test_iteration(self):
+        launchpad = self.web_service.login(cache=self.cache)
+        self.assertEqual([bug.id for bug in launchpad.bugs],
+                         list(range(1, 11)))
+        prefetcher = launchpad.page_prefetcher
+        # The first page after the first wasn't read ahead, but the
+        # others were.
+        self.assertEqual((prefetcher.hits, prefetcher.misses), (3, 1))
+        self.assertEqual(
+            len(self.page_requests()), len(set(self.page_requests())))
+
+    def test_slice_does_not_read_ahead(self):
+        launchpad = self.web_service.login(cache=self.cache)
+        self.assertEqual([bug.id for bug in launchpad.bugs[:2]], [1, 2])
+        launchpad.page_prefetcher.close()
+        self.assertEqual(
+            self.page_requests(),
+            [self.web_service.url_for('bugs?ws.start=0')])
+
+    def test_disabled(self):
+        class NoReadAhead(self.web_service.launchpad_class):
+            @classmethod
+            def page_prefetcher_factory(cls):
+                return None
+        launchpad = NoReadAhead(
+            Credentials('test', access_token=AnonymousAccessToken()),
+            None, None, service_root=self.web_service.service_root,
+            cache=self.cache)
+        self.assertEqual([bug.id for bug in launchpad.bugs],
+                         list(range(1, 11)))
+        self.assertEqual(launchpad._browser._connection.page_prefetcher,
+                         None)
+
+    def test_no_read_ahead_without_connection_pool(self):
+        class Unpooled(self.web_service.launchpad_class):
+            @classmethod
+            def connection_pool_factory(cls):
+                return None
+        launchpad = Unpooled(
+            Credentials('test', access_token=AnonymousAccessToken()),
+            None, None, service_root=self.web_service.service_root,
+            cache=self.cache)
+        self.assertEqual([bug.id for bug in launchpad.bugs],
+                         list(range(1, 11)))
+        self.assertEqual(launchpad.page_prefetcher.hits, 0)
@@ -0,0 +1,140 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for retrying requests that failed for passing reasons."""
+
+from email.utils import formatdate
+import time
+import unittest
+
+import httplib2
+from lazr.restfulclient.errors import HTTPError
+
+from launchpadlib.metrics import RequestMetrics
+from launchpadlib.retry import (
+    retry_after,
+    RetryPolicy,
+    )
+from launchpadlib.testing.webservice import FakeWebService
+
+
+def response(status, **headers):
+    headers['status'] = str(status)
+    return httplib2.Response(headers)
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.sleeps = []
+        self.policy = RetryPolicy(
+            max_retries=2, budget=3, sleep=self.sleeps.append)
+
+    def test_retry_statuses(self):
+        self.assertTrue(self.policy.should_retry('GET', response(503), 0))
+        self.assertFalse(self.policy.should_retry('GET', response(404), 0))
+        self.assertFalse(self.policy.should_retry('GET', response(200), 0))
+
+    def test_max_retries(self):
+        self.assertTrue(self.policy.should_retry('GET', response(503), 1))
+        self.assertFalse(self.policy.should_retry('GET', response(503), 2))
+
+    def test_non_idempotent_methods(self):
+        # A POST may have had an effect, unless it was refused.
+        self.assertFalse(self.policy.should_retry('POST', response(503), 0))
+        self.assertFalse(self.policy.should_retry('PATCH', response(502), 0))
+        self.assertTrue(self.policy.should_retry('POST', response(429), 0))
+
+    def test_budget(self):
+        for i in range(3):
+            self.assertTrue(
+                self.policy.should_retry('GET', response(503), 0))
+        self.assertFalse(self.policy.should_retry('GET', response(503), 0))
+        self.assertEqual(self.policy.retries, 3)
+
+    def test_jittered_backoff(self):
+        for attempt in range(4):
+            delay = self.policy.delay(response(503), attempt)
+            self.assertTrue(0 <= delay <= 2 ** attempt)
+
+    def test_max_delay(self):
+        self.policy.max_delay = 5
+        self.assertEqual(
+            self.policy.delay(response(503, **{'retry-after': '120'}), 0), 5)
+
+    def test_retry_after_seconds(self):
+        self.assertEqual(retry_after(response(503, **{'retry-after': '7'})),
+                         7)
+        self.assertEqual(retry_after(response(503)), None)
+
+    def test_retry_after_date(self):
+        date = formatdate(time.time() + 30, usegmt=True)
+        delay = retry_after(response(503, **{'retry-after': date}))
+        self.assertTrue(25 < delay <= 30)
+
+    def test_wait(self):
+        self.policy.wait(
+            'GET', 'https://api/', response(503, **{'retry-after': '3'}), 0)
+        self.assertEqual(self.sleeps, [3])
+
+
+class FlakyWebService(FakeWebService):
+    """A web service that fails the first few requests for a URL."""
+
+    def __init__(self, *args, **kwargs):
+        super(FlakyWebService, self).__init__(*args, **kwargs)
+        self.failures = {}
+
+    def respond(self, method, url, headers=None, body=None):
+        if self.failures.get(url):
+            self.failures[url] -= 1
+            self.requests.append((method, url))
+            return 503, {'retry-after': '0'}, b'Try again later.'
+        return super(FlakyWebService, self).respond(
+            method, url, headers, body)
+
+
+class TestLaunchpadRetries(unittest.TestCase):
+
+    def setUp(self):
+        self.web_service = FlakyWebService()
+        self.addCleanup(self.web_service.cleanup)
+        self.url = self.web_service.add_entry('bugs/1', 'bug', id=1)
+        self.launchpad = self.web_service.login()
+        self.launchpad.request_metrics = RequestMetrics()
+        self.records = []
+        self.launchpad.request_metrics.add_listener(self.records.append)
+
+    def test_transient_failures_are_retried(self):
+        self.web_service.failures[self.url] = 2
+        self.assertEqual(self.launchpad.bugs[1].id, 1)
+        self.assertEqual(
+            [(record.status, record.retry) for record in self.records],
+            [(503, True), (503, True), (200, False)])
+        self.assertEqual(self.launchpad.retry_policy.retries, 2)
+
+    def test_gives_up(self):
+        self.launchpad.retry_policy.max_retries = 1
+        self.web_service.failures[self.url] = 3
+        self.assertRaises(HTTPError, self.launchpad.load, self.url)
+        self.assertEqual(len(self.records), 2)
+
+    def test_no_retry_policy(self):
+        self.launchpad.retry_policy = None
+        self.launchpad._browser.max_retries = 0
+        self.web_service.failures[self.url] = 1
+        self.assertRaises(HTTPError, self.launchpad.load, self.url)
+        self.assertEqual(len(self.records), 1)
@@ -0,0 +1,116 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the stand-in web service server."""
+
+import shutil
+import tempfile
+import time
+import unittest
+
+import httplib2
+
+from launchpadlib.credentials import (
+    AccessToken,
+    AnonymousAccessToken,
+    Credentials,
+    )
+from launchpadlib.errors import Unauthorized
+from launchpadlib.launchpad import Launchpad
+from launchpadlib.metrics import RequestMetrics
+from launchpadlib.testing.server import WebServiceServer
+
+
+class TestWebServiceServer(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def serve(self, **kwargs):
+        server = WebServiceServer(page_size=2, **kwargs)
+        for i in range(1, 6):
+            server.web_service.add_entry(
+                'bugs/%d' % i, 'bug', id=i, title='Bug %d' % i)
+        server.web_service.add_collection(
+            'bugs', 'bugs', ['bugs/%d' % i for i in range(1, 6)])
+        server.start()
+        self.addCleanup(server.stop)
+        return server
+
+    def login(self, server, access_token=None):
+        if access_token is None:
+            access_token = AnonymousAccessToken()
+        credentials = Credentials('test', access_token=access_token)
+        return Launchpad(
+            credentials, None, None, service_root=server.service_root,
+            version=server.web_service.version, cache=self.cache_dir)
+
+    def test_entries_and_pages(self):
+        server = self.serve()
+        launchpad = self.login(server)
+        self.assertEqual(launchpad.bugs[1].title, 'Bug 1')
+        self.assertEqual(
+            [bug.id for bug in launchpad.bugs], [1, 2, 3, 4, 5])
+        self.assertTrue(
+            ('GET', server.web_service.url_for('bugs') +
+             '?ws.size=2&ws.start=2') in server.web_service.requests)
+
+    def test_etags(self):
+        server = self.serve()
+        self.login(server).bugs[1]
+        launchpad = self.login(server)
+        records = []
+        launchpad.request_metrics = RequestMetrics()
+        launchpad.request_metrics.add_listener(records.append)
+        bug = launchpad.bugs[1]
+        # The HTTP cache's copy is revalidated with its ETag.
+        self.assertEqual(
+            [(record.status, record.cache) for record in records],
+            [(304, 'revalidated')])
+        bug.title = 'New title'
+        bug.lp_save()
+        self.assertEqual(self.login(server).bugs[1].title, 'New title')
+
+    def test_latency(self):
+        server = self.serve(latency=0.1)
+        http = httplib2.Http()
+        start = time.time()
+        response, content = http.request(server.service_root)
+        self.assertTrue(time.time() - start >= 0.1)
+
+    def test_require_oauth(self):
+        server = self.serve(require_oauth=True)
+        response, content = httplib2.Http().request(
+            server.web_service.url_for('bugs/1'))
+        self.assertEqual(response.status, 401)
+        launchpad = self.login(server)
+        self.assertEqual(launchpad.bugs[1].title, 'Bug 1')
+
+    def test_access_tokens(self):
+        server = self.serve(access_tokens=['good'])
+        launchpad = self.login(server, AccessToken('good', 'secret'))
+        self.assertEqual(launchpad.bugs[1].title, 'Bug 1')
+        self.assertRaises(
+            Unauthorized, self.login, server, AccessToken('bad', 'secret'))
+
+    def test_malformed_oauth(self):
+        server = self.serve()
+        response, content = httplib2.Http().request(
+            server.service_root, headers={'Authorization': 'OAuth realm=""'})
+        self.assertEqual(response.status, 400)
@@ -0,0 +1,141 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the SQLite HTTP cache."""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from launchpadlib.metrics import RequestMetrics
+from launchpadlib.sqlitecache import SQLiteCache
+from launchpadlib.testing.webservice import FakeWebService
+
+
+class TestSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = SQLiteCache(os.path.join(self.temp_dir, 'cache.sqlite'))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_get_set_delete(self):
+        self.assertEqual(self.cache.get('key'), None)
+        self.cache.set('key', b'value')
+        self.assertEqual(self.cache.get('key'), b'value')
+        self.cache.set('key', b'new value')
+        self.assertEqual(self.cache.get('key'), b'new value')
+        self.cache.delete('key')
+        self.assertEqual(self.cache.get('key'), None)
+
+    def test_media_types_are_kept_apart(self):
+        self.cache.request_media_type = 'application/json'
+        self.cache.set('key', b'{}')
+        self.cache.request_media_type = 'application/xhtml+xml'
+        self.assertEqual(self.cache.get('key'), None)
+        self.cache.set('key', b'<html/>')
+        self.cache.request_media_type = 'application/json'
+        self.assertEqual(self.cache.get('key'), b'{}')
+
+    def test_shared_between_connections(self):
+        # Another process (or thread) sees what's written.
+        other = SQLiteCache(self.cache.path)
+        self.cache.set('key', b'value')
+        self.assertEqual(other.get('key'), b'value')
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(other.get('key')))
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [b'value'])
+        other.close()
+
+    def test_usage(self):
+        self.cache.set('a', b'12345')
+        self.cache.set('b', b'123')
+        self.assertEqual(self.cache.usage(), (2, 8))
+
+    def test_vacuum_by_age(self):
+        self.cache.set('old', b'x')
+        self.cache.set('new', b'x')
+        self.cache._connection().execute(
+            "UPDATE cache SET accessed = ? WHERE key = 'old'",
+            (time.time() - 100,))
+        self.assertEqual(self.cache.vacuum(max_age=50), 1)
+        self.assertEqual(self.cache.get('old'), None)
+        self.assertEqual(self.cache.get('new'), b'x')
+
+    def test_vacuum_by_size(self):
+        for i, key in enumerate('abcd'):
+            self.cache.set(key, b'x' * 10)
+            self.cache._connection().execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', (i, key))
+        self.assertEqual(self.cache.vacuum(max_entries=3, max_bytes=20), 2)
+        self.assertEqual(self.cache.usage(), (2, 20))
+        self.assertEqual(self.cache.get('d'), b'x' * 10)
+        self.cache.vacuum(compact=True)
+
+
+class TestLaunchpadSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.web_service = FakeWebService()
+        self.addCleanup(self.web_service.cleanup)
+        self.web_service.add_entry('bugs/1', 'bug', id=1, title='Bug 1')
+        self.launchpadlib_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.launchpadlib_dir)
+
+    def test_login_with_sqlite_cache(self):
+        launchpad = self.web_service.launchpad_class.login_anonymously(
+            'test', service_root=self.web_service.service_root,
+            launchpadlib_dir=self.launchpadlib_dir, cache='sqlite')
+        cache = launchpad._browser._connection.cache
+        self.assertTrue(isinstance(cache, SQLiteCache))
+        self.assertEqual(
+            cache.path, os.path.join(
+                self.launchpadlib_dir, 'api.launchpad.net', 'cache.sqlite'))
+        launchpad.request_metrics = RequestMetrics()
+        records = []
+        launchpad.request_metrics.add_listener(records.append)
+        self.assertEqual(launchpad.bugs[1].title, 'Bug 1')
+        # The second time the bug is fetched, the cached copy is
+        # revalidated.
+        launchpad.bugs[1]
+        self.assertEqual(
+            [record.cache for record in records], ['miss', 'revalidated'])
+
+    def test_get_paths_opens_nothing(self):
+        paths = self.web_service.launchpad_class._get_paths(
+            self.web_service.service_root, self.launchpadlib_dir,
+            cache='sqlite')
+        path = os.path.join(
+            self.launchpadlib_dir, 'api.launchpad.net', 'cache.sqlite')
+        self.assertEqual(paths[2], path)
+        self.assertFalse(os.path.exists(path))
+
+    def test_unknown_cache(self):
+        self.assertRaises(
+            ValueError, self.web_service.launchpad_class.login_anonymously,
+            'test', service_root=self.web_service.service_root,
+            launchpadlib_dir=self.launchpadlib_dir, cache='memcached')
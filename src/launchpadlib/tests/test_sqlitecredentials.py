@@ -0,0 +1,110 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the SQLite credential store."""
+
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import unittest
+
+from launchpadlib.credentials import (
+    AccessToken,
+    Credentials,
+    )
+from launchpadlib.sqlitecredentials import SQLiteCredentialStore
+
+
+def make_credential(key):
+    return Credentials(
+        "app name", consumer_secret='consumer_secret:42',
+        access_token=AccessToken(key, 'access_secret:168'))
+
+
+class TestSQLiteCredentialStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = SQLiteCredentialStore(
+            os.path.join(self.temp_dir, 'credentials.sqlite'))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_save_load_delete(self):
+        self.assertEqual(self.store.load('key'), None)
+        self.store.save(make_credential('token'), 'key')
+        self.assertEqual(self.store.load('key').access_token.key, 'token')
+        self.store.save(make_credential('new token'), 'key')
+        self.assertEqual(
+            self.store.load('key').access_token.key, 'new token')
+        self.assertEqual(len(self.store), 1)
+        self.store.delete('key')
+        self.assertEqual(self.store.load('key'), None)
+
+    def test_many_credentials(self):
+        for i in range(3):
+            self.store.save(make_credential('token %d' % i), 'key %d' % i)
+        self.assertEqual(
+            self.store.load('key 1').access_token.key, 'token 1')
+        self.assertEqual(len(self.store), 3)
+
+    def test_file_is_private(self):
+        mode = os.stat(self.store.path).st_mode
+        self.assertEqual(stat.S_IMODE(mode), 0o600)
+
+    def test_shared_between_connections(self):
+        other = SQLiteCredentialStore(self.store.path)
+        self.store.save(make_credential('token'), 'key')
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(other.load('key')))
+        thread.start()
+        thread.join()
+        self.assertEqual(results[0].access_token.key, 'token')
+        other.close()
+
+    def test_corrupt_credentials(self):
+        self.store._connection().execute(
+            "INSERT INTO credentials VALUES ('key', X'626164', 0)")
+        self.assertEqual(self.store.load('key'), None)
+        self.assertEqual(list(self.store.export_credentials()), [])
+
+    def test_import_and_export(self):
+        count = self.store.import_credentials(
+            ('key %d' % i, make_credential('token %d' % i))
+            for i in range(100))
+        self.assertEqual(count, 100)
+        exported = list(self.store.export_credentials())
+        self.assertEqual(len(exported), 100)
+        self.assertEqual(exported[0][0], 'key 0')
+        self.assertEqual(exported[0][1].access_token.key, 'token 0')
+        other = SQLiteCredentialStore(
+            os.path.join(self.temp_dir, 'other.sqlite'))
+        other.import_credentials(exported)
+        self.assertEqual(other.load('key 99').access_token.key, 'token 99')
+        other.close()
+
+    def test_failed_import_saves_nothing(self):
+        def credentials():
+            yield 'key', make_credential('token')
+            yield 'bad', None
+        self.assertRaises(
+            AttributeError, self.store.import_credentials, credentials())
+        self.assertEqual(len(self.store), 0)
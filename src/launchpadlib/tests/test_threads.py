@@ -0,0 +1,83 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for sharing one Launchpad object between threads."""
+
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+import tempfile
+import threading
+import unittest
+
+from launchpadlib.representationcache import ThreadSafeRepresentationCache
+from launchpadlib.testing.webservice import FakeWebService
+
+
+class TestThreadSafeRepresentationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = ThreadSafeRepresentationCache(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_media_type_is_per_thread(self):
+        self.cache.request_media_type = 'application/json'
+        seen = []
+
+        def other_thread():
+            seen.append(self.cache.request_media_type)
+            self.cache.request_media_type = 'application/xhtml+xml'
+            self.cache.set('key', b'<html/>')
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, [None])
+        self.assertEqual(self.cache.request_media_type, 'application/json')
+        self.assertEqual(self.cache.get('key'), None)
+        self.cache.request_media_type = 'application/xhtml+xml'
+        self.assertEqual(self.cache.get('key'), b'<html/>')
+
+
+class TestSharedLaunchpad(unittest.TestCase):
+
+    def setUp(self):
+        self.web_service = FakeWebService()
+        self.addCleanup(self.web_service.cleanup)
+        for i in range(1, 17):
+            self.web_service.add_entry(
+                'bugs/%d' % i, 'bug', id=i, title='Bug %d' % i)
+        self.launchpad = self.web_service.login()
+
+    def test_many_threads(self):
+        def title(bug_id):
+            return self.launchpad.bugs[bug_id].title
+        bug_ids = list(range(1, 17)) * 2
+        with ThreadPoolExecutor(8) as pool:
+            titles = list(pool.map(title, bug_ids))
+        self.assertEqual(titles, ['Bug %d' % i for i in bug_ids])
+
+    def test_many_threads_saving(self):
+        def save(bug_id):
+            bug = self.launchpad.bugs[bug_id]
+            bug.title = 'New title %d' % bug_id
+            bug.lp_save()
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(save, range(1, 17)))
+        self.assertEqual(
+            [self.launchpad.bugs[i].title for i in range(1, 17)],
+            ['New title %d' % i for i in range(1, 17)])
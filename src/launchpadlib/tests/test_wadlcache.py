@@ -0,0 +1,145 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""Tests for the persistent WADL cache."""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from launchpadlib import wadlcache
+from launchpadlib.testing.webservice import FakeWebService
+from launchpadlib.wadlcache import WADLCache
+
+
+URL = 'https://api.launchpad.net/1.0/'
+
+
+class TestWADLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = WADLCache(os.path.join(self.temp_dir, 'wadl'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_empty(self):
+        self.assertEqual(self.cache.get(URL), None)
+
+    def test_store_and_get(self):
+        self.cache.store(URL, '"etag"', b'<application/>')
+        self.assertEqual(self.cache.get(URL), ('"etag"', b'<application/>'))
+
+    def test_no_etag(self):
+        self.cache.store(URL, None, b'<application/>')
+        self.assertEqual(self.cache.get(URL), (None, b'<application/>'))
+
+    def test_keyed_by_version(self):
+        self.cache.store(URL, None, b'<application/>')
+        self.assertEqual(
+            self.cache.get('https://api.launchpad.net/devel/'), None)
+
+    def test_revalidate_stores_new_document(self):
+        self.cache.store(URL, '"old"', b'<old/>')
+        sent = []
+
+        class Response(dict):
+            status = 200
+
+        def request(url, headers, timeout):
+            sent.append((headers, timeout))
+            return Response(etag='"new"'), b'<new/>'
+        self.cache.revalidate(URL, '"old"', request).join()
+        self.assertEqual(sent, [({'If-None-Match': '"old"'}, 10)])
+        self.assertEqual(self.cache.get(URL), ('"new"', b'<new/>'))
+
+    def test_revalidate_ignores_errors(self):
+        self.cache.store(URL, '"old"', b'<old/>')
+
+        def request(url, headers, timeout):
+            raise IOError("No network.")
+        self.cache.revalidate(URL, '"old"', request).join()
+        self.assertEqual(self.cache.get(URL), ('"old"', b'<old/>'))
+
+    def test_revalidation_cannot_delay_exit(self):
+        finished = threading.Event()
+
+        def request(url, headers, timeout):
+            finished.wait()
+            raise IOError("No network.")
+        thread = self.cache.revalidate(URL, None, request)
+        self.assertTrue(thread.daemon)
+        self.assertTrue(thread in wadlcache._revalidations)
+        finished.set()
+        thread.join()
+        self.assertFalse(thread in wadlcache._revalidations)
+
+
+class ThreadRecordingWebService(FakeWebService):
+    """Note which thread asked for the WADL."""
+
+    def __init__(self, *args, **kwargs):
+        super(ThreadRecordingWebService, self).__init__(*args, **kwargs)
+        self.wadl_threads = []
+
+    def respond(self, method, url, headers=None, body=None):
+        accept = dict((key.lower(), value)
+                      for key, value in (headers or {}).items()).get('accept')
+        if accept == 'application/vnd.sun.wadl+xml':
+            self.wadl_threads.append(threading.current_thread().name)
+        return super(ThreadRecordingWebService, self).respond(
+            method, url, headers, body)
+
+
+class TestLaunchpadWADLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.web_service = ThreadRecordingWebService()
+        self.addCleanup(self.web_service.cleanup)
+        self.web_service.add_entry('bugs/1', 'bug', id=1, title='Bug 1')
+        self.launchpadlib_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.launchpadlib_dir)
+
+    def login(self):
+        return self.web_service.launchpad_class.login_anonymously(
+            'test', service_root=self.web_service.service_root,
+            launchpadlib_dir=self.launchpadlib_dir)
+
+    def test_second_login_uses_cached_wadl(self):
+        self.login()
+        self.assertEqual(len(self.web_service.wadl_threads), 1)
+        original_wadl = self.web_service.wadl
+        self.web_service.wadl = original_wadl + b'<!-- New version -->'
+        launchpad = self.login()
+        self.assertEqual(launchpad.bugs[1].title, 'Bug 1')
+        launchpad.wadl_cache.revalidation.join()
+        # The cached copy was used, and only the background thread
+        # asked the server for the new one, which is saved for next
+        # time.
+        self.assertEqual(
+            self.web_service.wadl_threads[1:], ['WADL revalidation'])
+        etag, markup = launchpad.wadl_cache.get(self.web_service.root_url)
+        self.assertEqual(markup, self.web_service.wadl)
+
+    def test_cache_lives_under_service_root_dir(self):
+        self.login()
+        self.assertTrue(os.path.exists(os.path.join(
+            self.launchpadlib_dir, 'api.launchpad.net', 'wadl', '1.0.wadl')))
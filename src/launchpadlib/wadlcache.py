@@ -0,0 +1,152 @@
+# Copyright 2017 Canonical Ltd.
+
+# This file is part of launchpadlib.
+#
+# launchpadlib is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as published by the
+# Free Software Foundation, version 3 of the License.
+#
+# launchpadlib is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU Lesser General Public License
+# for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with launchpadlib. If not, see <http://www.gnu.org/licenses/>.
+
+"""A persistent cache of web service definitions.
+
+Creating a `Launchpad` object means getting the WADL document that
+describes the web service, which is over a megabyte. A `WADLCache`
+keeps the most recent copy of each version's WADL on disk, along with
+its ETag, so a new `Launchpad` object can start with what's on disk
+straight away. The cached copy is then checked against the server in
+the background, ready for next time.
+"""
+
+__metaclass__ = type
+__all__ = [
+    'WADLCache',
+    ]
+
+import atexit
+import errno
+import os
+import tempfile
+import threading
+import time
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+
+# Revalidations still running. They're daemon threads, so they can't
+# keep a process alive, but they're given a moment to finish at exit.
+_revalidations = set()
+
+# How long, in seconds, a process waits at exit for revalidations.
+EXIT_TIMEOUT = 2
+
+
+def _finish_revalidations():
+    give_up = time.time() + EXIT_TIMEOUT
+    for thread in list(_revalidations):
+        thread.join(max(0, give_up - time.time()))
+
+
+atexit.register(_finish_revalidations)
+
+
+class WADLCache:
+    """Keep each version's WADL document in a directory.
+
+    :ivar revalidation: The thread checking the most recent cache hit
+        against the server, or None.
+    """
+
+    def __init__(self, directory, timeout=10):
+        """Constructor.
+
+        :param directory: Where to keep the documents.
+        :param timeout: How long, in seconds, a revalidation request
+            may wait for the server.
+        """
+        self.directory = directory
+        self.timeout = timeout
+        self.revalidation = None
+
+    def _path(self, url):
+        """The file holding the WADL for a service root URL."""
+        version = urlsplit(str(url)).path.rstrip('/').rsplit('/', 1)[-1]
+        if version in ('', '.', '..'):
+            version = 'default'
+        return os.path.join(self.directory, version + '.wadl')
+
+    def get(self, url):
+        """Find the cached WADL for a service root.
+
+        :return: A 2-tuple (etag, markup), where etag may be None, or
+            None if nothing is cached.
+        """
+        try:
+            with open(self._path(url), 'rb') as cache_file:
+                etag = cache_file.readline().rstrip(b'\n')
+                markup = cache_file.read()
+        except (IOError, OSError):
+            return None
+        if not markup:
+            return None
+        return etag.decode('utf-8') or None, markup
+
+    def store(self, url, etag, markup):
+        """Replace the cached WADL for a service root."""
+        try:
+            os.makedirs(self.directory, 0o700)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+        # Write to a temporary file and rename it into place, so other
+        # processes never see half a document.
+        fd, temp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write((etag or '').encode('utf-8') + b'\n')
+                temp_file.write(markup)
+            os.rename(temp_path, self._path(url))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def revalidate(self, url, etag, request):
+        """Check a cached WADL document against the server, in a thread.
+
+        If the server has a different document, it's cached for next
+        time; the document in use now isn't affected. Errors are
+        ignored, since the cached copy is still usable.
+
+        :param request: A callable that makes a GET request, given the
+            URL, a dict of headers and a timeout, and returns a
+            (response, content) tuple.
+        """
+        def check():
+            headers = {}
+            if etag is not None:
+                headers['If-None-Match'] = etag
+            try:
+                response, content = request(url, headers, self.timeout)
+                if response.status == 200:
+                    self.store(url, response.get('etag'), content)
+            except Exception:
+                pass
+            finally:
+                _revalidations.discard(thread)
+        # A daemon thread, so a stalled network can't stop the process
+        # exiting. Short scripts still wait a little for it at exit.
+        thread = threading.Thread(target=check, name='WADL revalidation')
+        thread.daemon = True
+        _revalidations.add(thread)
+        self.revalidation = thread
+        thread.start()
+        return thread